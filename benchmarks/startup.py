@@ -0,0 +1,54 @@
+"""Measures the start-up time of the CLI until the arguments are parsed."""
+import subprocess
+import sys
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+
+COMMANDS = (
+  ("import", ["-c", "import txt_utils_cli.cli"]),
+  ("init parser", ["-c", "from txt_utils_cli.cli import _init_parser; _init_parser()"]),
+  ("--help", ["-m", "txt_utils_cli.cli", "--help"]),
+  ("replace --help", ["-m", "txt_utils_cli.cli", "replace", "--help"]),
+)
+
+HEAVY_MODULES = ("pandas", "tqdm", "pronunciation_dictionary",
+                 "multiprocessing", "importlib.metadata", "txt_utils.transcription")
+
+
+def measure(args, runs: int) -> float:
+  durations = []
+  for _ in range(runs):
+    start = perf_counter()
+    subprocess.run([sys.executable] + args, stdout=subprocess.DEVNULL, check=True)
+    durations.append(perf_counter() - start)
+  return median(durations)
+
+
+def get_imported_heavy_modules():
+  code = (
+    "import sys\n"
+    "from txt_utils_cli.cli import _init_parser\n"
+    "_init_parser()\n"
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+  )
+  result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+  return [m for m in result.stdout.strip().split(",") if m != ""]
+
+
+def main():
+  parser = ArgumentParser()
+  parser.add_argument("--runs", type=int, default=20)
+  args = parser.parse_args()
+
+  baseline = measure(["-c", "pass"], args.runs)
+  print(f"Python interpreter: {baseline * 1000:.1f} ms (median of {args.runs} runs)")
+  for name, command in COMMANDS:
+    duration = measure(command, args.runs)
+    print(f"{name}: {duration * 1000:.1f} ms (+{(duration - baseline) * 1000:.1f} ms)")
+  heavy_modules = get_imported_heavy_modules()
+  print(f"Heavy modules imported while building the parser: {', '.join(heavy_modules) or '-'}")
+
+
+if __name__ == "__main__":
+  main()
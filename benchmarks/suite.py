@@ -0,0 +1,296 @@
+"""Benchmarks the library functions and the CLI subcommands on synthetic Zipfian corpora."""
+import json
+import platform
+import random
+import shutil
+import subprocess
+import sys
+from argparse import ArgumentParser, Namespace
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+from tempfile import TemporaryDirectory, gettempdir
+from time import perf_counter, process_time
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+  import resource
+except ImportError:
+  # not available on Windows
+  resource = None
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+MISSING_WORDS_RATIO = 0.02
+MULTIPLE_PRONUNCIATIONS_RATIO = 0.1
+
+# name -> method(data, n_jobs, tmp_dir); the method prepares the input and returns the method to measure
+Benchmark = Callable[[Path, int, Path], Callable[[], Any]]
+
+
+def get_corpus_path(data_dir: Path) -> Path:
+  return data_dir / "corpus.txt"
+
+
+def get_dictionary_path(data_dir: Path) -> Path:
+  return data_dir / "dictionary.dict"
+
+
+def get_words(vocabulary_size: int, rng: random.Random) -> List[str]:
+  words = set()
+  while len(words) < vocabulary_size:
+    # frequent words are usually short
+    length = min(2 + int(rng.expovariate(0.35)) + len(words) // 10_000, 20)
+    words.add("".join(rng.choices(LETTERS, k=length)))
+  result = list(words)
+  result.sort(key=len)
+  return result
+
+
+def generate_corpus(path: Path, lines: int, vocabulary_size: int, exponent: float, words_per_line: int, seed: int) -> List[str]:
+  """Writes a Zipfian corpus and returns its vocabulary ordered by rank."""
+  rng = random.Random(seed)
+  words = get_words(vocabulary_size, rng)
+  cum_weights = []
+  total = 0.0
+  for rank in range(1, vocabulary_size + 1):
+    total += 1 / rank ** exponent
+    cum_weights.append(total)
+  with path.open(mode="w", encoding="UTF-8", newline="") as file:
+    for line_nr in range(lines):
+      if line_nr > 0:
+        file.write("\n")
+      count = max(1, round(rng.gauss(words_per_line, words_per_line / 3)))
+      file.write(" ".join(rng.choices(words, cum_weights=cum_weights, k=count)))
+  return words
+
+
+def generate_dictionary(path: Path, words: List[str], seed: int) -> None:
+  rng = random.Random(seed)
+  with path.open(mode="w", encoding="UTF-8", newline="") as file:
+    for word in words:
+      if rng.random() < MISSING_WORDS_RATIO:
+        continue
+      file.write(f"{word}  {' '.join(word.upper())}\n")
+      if rng.random() < MULTIPLE_PRONUNCIATIONS_RATIO:
+        file.write(f"{word}  {' '.join(reversed(word.upper()))}\n")
+
+
+def prepare_data(data_dir: Path, ns: Namespace) -> None:
+  if get_corpus_path(data_dir).is_file() and get_dictionary_path(data_dir).is_file():
+    return
+  data_dir.mkdir(parents=True, exist_ok=True)
+  print(f"Generating corpus and dictionary in {data_dir}...", file=sys.stderr)
+  words = generate_corpus(get_corpus_path(data_dir), ns.lines, ns.vocabulary_size,
+                          ns.exponent, ns.words_per_line, ns.seed)
+  generate_dictionary(get_dictionary_path(data_dir), words, ns.seed)
+
+
+def get_data_dir(ns: Namespace) -> Path:
+  name = f"lines={ns.lines}-vocabulary={ns.vocabulary_size}-exponent={ns.exponent}-words={ns.words_per_line}-seed={ns.seed}"
+  return ns.data_dir / name
+
+
+def copy_corpus(data_dir: Path, tmp_dir: Path) -> Path:
+  path = tmp_dir / "corpus.txt"
+  shutil.copyfile(get_corpus_path(data_dir), path)
+  return path
+
+
+def read_corpus(data_dir: Path) -> str:
+  return get_corpus_path(data_dir).read_text("UTF-8")
+
+
+def load_dictionary(data_dir: Path):
+  from pronunciation_dictionary import DeserializationOptions, MultiprocessingOptions, load_dict
+  return load_dict(get_dictionary_path(data_dir), "UTF-8", DeserializationOptions(False, False, False, False),
+                   MultiprocessingOptions(1, None, 100_000))
+
+
+def bench_extract_vocabulary_from_text(data_dir: Path, n_jobs: int, tmp_dir: Path):
+  from txt_utils import extract_vocabulary_from_text
+  content = read_corpus(data_dir)
+  return lambda: extract_vocabulary_from_text(content, n_jobs=n_jobs, silent=True)
+
+
+def bench_transcribe_text_using_dict(data_dir: Path, n_jobs: int, tmp_dir: Path):
+  from txt_utils import transcribe_text_using_dict
+  content = read_corpus(data_dir)
+  dictionary = load_dictionary(data_dir)
+  return lambda: transcribe_text_using_dict(content, dictionary, seed=1, n_jobs=n_jobs, silent=True)
+
+
+def bench_get_unit_count_statistics(data_dir: Path, n_jobs: int, tmp_dir: Path):
+  from txt_utils import get_unit_count_statistics
+  content = read_corpus(data_dir)
+  return lambda: get_unit_count_statistics(content, n_jobs=n_jobs, silent=True)
+
+
+def bench_replace_text(data_dir: Path, n_jobs: int, tmp_dir: Path):
+  from txt_utils import replace_text
+  content = read_corpus(data_dir)
+  return lambda: replace_text(content, r"\b([a-e])([a-z]*)\b", r"\2\1")
+
+
+def get_cli_benchmark(get_args: Callable[[Path, Path, int], List[str]]) -> Benchmark:
+  def bench_cli(data_dir: Path, n_jobs: int, tmp_dir: Path):
+    from txt_utils_cli.cli import parse_args
+    path = copy_corpus(data_dir, tmp_dir)
+    args = get_args(path, data_dir, n_jobs) + ["--log"]
+
+    def run_cli():
+      try:
+        parse_args(args)
+      except SystemExit as error:
+        if error.code != 0:
+          raise RuntimeError(f"CLI exited with code {error.code}!") from error
+    return run_cli
+  return bench_cli
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+  "extract_vocabulary_from_text": bench_extract_vocabulary_from_text,
+  "transcribe_text_using_dict": bench_transcribe_text_using_dict,
+  "get_unit_count_statistics": bench_get_unit_count_statistics,
+  "replace_text": bench_replace_text,
+  "cli merge": get_cli_benchmark(lambda path, data_dir, n_jobs: [
+    "merge", str(path), str(get_corpus_path(data_dir)), str(path.parent / "merged.txt")]),
+  "cli extract-vocabulary": get_cli_benchmark(lambda path, data_dir, n_jobs: [
+    "extract-vocabulary", str(path), str(path.parent / "vocabulary.txt"), "-j", str(n_jobs)]),
+  "cli transcribe": get_cli_benchmark(lambda path, data_dir, n_jobs: [
+    "transcribe", str(path), str(get_dictionary_path(data_dir)), "--seed", "1", "--no-dict-cache", "-j", str(n_jobs)]),
+  "cli transcribe --vocabulary-first": get_cli_benchmark(lambda path, data_dir, n_jobs: [
+    "transcribe", str(path), str(get_dictionary_path(data_dir)), "--seed", "1", "--no-dict-cache", "--vocabulary-first", "-j", str(n_jobs)]),
+  "cli replace": get_cli_benchmark(lambda path, data_dir, n_jobs: [
+    "replace", str(path), r"\b([a-e])([a-z]*)\b", r"\2\1", "-j", str(n_jobs)]),
+  "cli replace-line": get_cli_benchmark(lambda path, data_dir, n_jobs: [
+    "replace-line", str(path), r"^([a-z]+) ", r"\1\t", "-j", str(n_jobs)]),
+  "cli trim-units": get_cli_benchmark(lambda path, data_dir, n_jobs: [
+    "trim-units", str(path), "both", "ae", "-j", str(n_jobs)]),
+  "cli remove-units": get_cli_benchmark(lambda path, data_dir, n_jobs: [
+    "remove-units", str(path), "a", "b", "c", "-j", str(n_jobs)]),
+  "cli create-unit-occurrence-stats": get_cli_benchmark(lambda path, data_dir, n_jobs: [
+    "create-unit-occurrence-stats", str(path), str(path.parent / "stats.csv"), "-j", str(n_jobs)]),
+  "cli pipeline": get_cli_benchmark(lambda path, data_dir, n_jobs: [
+    "pipeline", str(path), "--trim-units", "both", "ae", "--remove-units", "a", "b", "c", "--replace-text", "  ", " "]),
+}
+
+
+def get_peak_rss_mb() -> Optional[float]:
+  """Includes the peak RSS of the largest terminated child process."""
+  if resource is None:
+    return None
+  peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+             resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+  # kilobytes on Linux, bytes on macOS
+  return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(name: str, data_dir: Path, n_jobs: int) -> Dict[str, Any]:
+  with TemporaryDirectory(prefix="txt-utils-benchmark-") as tmp_dir:
+    method = BENCHMARKS[name](data_dir, n_jobs, Path(tmp_dir))
+    start_cpu = process_time()
+    start = perf_counter()
+    method()
+    wall_time = perf_counter() - start
+    cpu_time = process_time() - start_cpu
+  return {
+    "wall_time_s": wall_time,
+    "cpu_time_s": cpu_time,
+    "peak_rss_mb": get_peak_rss_mb(),
+  }
+
+
+def run_benchmark_in_subprocess(name: str, data_dir: Path, n_jobs: int, verbose: bool) -> Dict[str, Any]:
+  result = subprocess.run(
+    [sys.executable, __file__, "--run", name, "--data-dir", str(data_dir), "--jobs", str(n_jobs)],
+    stdout=subprocess.PIPE, stderr=None if verbose else subprocess.DEVNULL, text=True,
+  )
+  if result.returncode != 0:
+    return {"error": f"exit code {result.returncode}"}
+  return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(name: str, runs: List[Dict[str, Any]], lines: int) -> Dict[str, Any]:
+  errors = [run["error"] for run in runs if "error" in run]
+  if len(errors) > 0:
+    return {"name": name, "error": errors[0]}
+  wall_time = median(run["wall_time_s"] for run in runs)
+  peak_rss_values = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+  return {
+    "name": name,
+    "wall_time_s": wall_time,
+    "cpu_time_s": median(run["cpu_time_s"] for run in runs),
+    "lines_per_s": lines / wall_time if wall_time > 0 else None,
+    "peak_rss_mb": max(peak_rss_values) if len(peak_rss_values) > 0 else None,
+    "runs": len(runs),
+  }
+
+
+def get_version() -> Optional[str]:
+  from importlib.metadata import PackageNotFoundError, version
+  try:
+    return version("txt-utils")
+  except PackageNotFoundError:
+    return None
+
+
+def main():
+  parser = ArgumentParser()
+  parser.add_argument("--lines", type=int, default=100_000, help="amount of lines of the corpus")
+  parser.add_argument("--vocabulary-size", type=int, default=50_000, help="amount of distinct words")
+  parser.add_argument("--exponent", type=float, default=1.1, help="exponent of the Zipf distribution")
+  parser.add_argument("--words-per-line", type=int, default=12, help="average amount of words per line")
+  parser.add_argument("--seed", type=int, default=1234)
+  parser.add_argument("--jobs", type=int, default=1, help="amount of parallel jobs")
+  parser.add_argument("--repeat", type=int, default=3, help="amount of runs per benchmark; the median is reported")
+  parser.add_argument("--only", type=str, nargs="+", choices=list(BENCHMARKS), metavar="NAME",
+                      help="run only these benchmarks", default=None)
+  parser.add_argument("--data-dir", type=Path, default=Path(gettempdir()) / "txt-utils-benchmarks",
+                      help="directory of the generated corpora and dictionaries")
+  parser.add_argument("--output", type=Path, default=None, help="write the results as JSON to this file")
+  parser.add_argument("--verbose", action="store_true", help="show the output of the benchmarks")
+  parser.add_argument("--run", type=str, choices=list(BENCHMARKS), help="internal: run a single benchmark")
+  ns = parser.parse_args()
+
+  if ns.run is not None:
+    print(json.dumps(run_benchmark(ns.run, ns.data_dir, ns.jobs)))
+    return
+
+  data_dir = get_data_dir(ns)
+  prepare_data(data_dir, ns)
+
+  results = []
+  for name in ns.only or BENCHMARKS:
+    runs = [run_benchmark_in_subprocess(name, data_dir, ns.jobs, ns.verbose) for _ in range(ns.repeat)]
+    result = summarize(name, runs, ns.lines)
+    results.append(result)
+    if "error" in result:
+      print(f"{name}: failed ({result['error']})")
+    else:
+      print(f"{name}: {result['wall_time_s']:.3f} s, {result['lines_per_s']:.0f} lines/s, "
+            f"peak RSS {result['peak_rss_mb'] or 0:.0f} MB")
+
+  if ns.output is not None:
+    report = {
+      "txt_utils_version": get_version(),
+      "python_version": platform.python_version(),
+      "platform": platform.platform(),
+      "created": datetime.now(timezone.utc).isoformat(),
+      "config": {
+        "lines": ns.lines,
+        "vocabulary_size": ns.vocabulary_size,
+        "exponent": ns.exponent,
+        "words_per_line": ns.words_per_line,
+        "seed": ns.seed,
+        "jobs": ns.jobs,
+        "repeat": ns.repeat,
+      },
+      "results": results,
+    }
+    ns.output.parent.mkdir(parents=True, exist_ok=True)
+    ns.output.write_text(json.dumps(report, indent=2), "UTF-8")
+    print(f"Written results to: {ns.output.absolute()}")
+
+
+if __name__ == "__main__":
+  main()
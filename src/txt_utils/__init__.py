@@ -1,4 +1,28 @@
-from txt_utils.replacement import replace_text
-from txt_utils.statistics_unit_counts import get_unit_count_statistics
-from txt_utils.transcription import transcribe_text_using_dict
-from txt_utils.vocabulary_exporting import extract_vocabulary_from_text
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+  from txt_utils.replacement import replace_text
+  from txt_utils.statistics_unit_counts import get_unit_count_statistics
+  from txt_utils.transcription import transcribe_text_using_dict
+  from txt_utils.vocabulary_exporting import extract_vocabulary_from_text
+
+# the submodules are imported on first access because some of them have expensive dependencies
+_LAZY_IMPORTS = {
+  "replace_text": "txt_utils.replacement",
+  "get_unit_count_statistics": "txt_utils.statistics_unit_counts",
+  "transcribe_text_using_dict": "txt_utils.transcription",
+  "extract_vocabulary_from_text": "txt_utils.vocabulary_exporting",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name: str) -> Any:
+  if name not in _LAZY_IMPORTS:
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  return getattr(import_module(_LAZY_IMPORTS[name]), name)
+
+
+def __dir__():
+  return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,278 @@
+import mmap
+import typing
+from collections import Counter
+from importlib.util import find_spec
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from txt_utils.compression import is_compressed, open_binary_file
+from txt_utils.shared_text import can_map_file
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+DEFAULT_READ_SIZE = 16 * DEFAULT_BLOCK_SIZE
+# odd, i.e., invertible modulo 2^64
+HASH_BASE = 0x100000001B3
+HASH_BASE_INVERSE = pow(HASH_BASE, -1, 2 ** 64)
+
+
+def is_numpy_available() -> bool:
+  return find_spec("numpy") is not None
+
+
+def can_count_bytes(encoding: str, line_sep: str, word_sep: str) -> bool:
+  if not can_map_file(encoding, line_sep):
+    return False
+  if len(line_sep.encode(encoding)) != 1 or len(word_sep.encode(encoding)) != 1:
+    return False
+  return is_numpy_available()
+
+
+def count_byte_units(buffer: Union[bytes, memoryview, mmap.mmap], encoding: str, line_sep: str, word_sep: str, *, block_size: int = DEFAULT_BLOCK_SIZE) -> typing.Counter[str]:
+  """Like `get_unit_counts` but hashes the encoded units; requires numpy."""
+  import numpy as np
+
+  if block_size <= 0:
+    raise ValueError("Block size needs to be greater than zero!")
+  line_sep_byte = line_sep.encode(encoding)[0]
+  word_sep_byte = word_sep.encode(encoding)[0]
+  data = np.frombuffer(buffer, dtype=np.uint8)
+  length = len(data)
+
+  # sorted hashes of the distinct units, their counts and the position and length of their bytes in `known_bytes`
+  known_hashes = np.empty(0, dtype=np.uint64)
+  known_counts = np.empty(0, dtype=np.int64)
+  known_starts = np.empty(0, dtype=np.int64)
+  known_lengths = np.empty(0, dtype=np.int64)
+  known_bytes = np.empty(0, dtype=np.uint8)
+  known_bytes_length = 0
+  units: Dict[int, str] = {}
+  # units whose hash belongs to another unit; they are counted on their decoded text
+  collided_units: typing.Counter[str] = Counter()
+  start = 0
+  while True:
+    end = get_block_end(data, start, block_size, line_sep_byte, word_sep_byte)
+    block = data[start:end]
+    powers, inverse_powers = get_powers(len(block) + 1)
+    hashes, unit_starts, unit_ends = hash_units(block, line_sep_byte, word_sep_byte, powers, inverse_powers)
+    unique_hashes, unit_indices, counts, groups = count_hashes(hashes)
+    unit_lengths = unit_ends - unit_starts
+    group_starts = unit_starts[unit_indices]
+    group_lengths = unit_lengths[unit_indices]
+
+    is_same_unit = are_units_in_block_equal(block, unit_starts, unit_ends, group_starts[groups], group_lengths[groups])
+    if not is_same_unit.all():
+      collided = np.flatnonzero(~is_same_unit)
+      collided_units.update(decode_units(block, unit_starts[collided], unit_ends[collided], encoding, word_sep))
+      counts = counts - np.bincount(groups[collided], minlength=len(counts))
+    del hashes, groups, is_same_unit
+
+    positions = np.searchsorted(known_hashes, unique_hashes)
+    is_known = positions < len(known_hashes)
+    is_known[is_known] = known_hashes[positions[is_known]] == unique_hashes[is_known]
+    known = np.flatnonzero(is_known)
+    is_same_unit = are_units_equal(block, group_starts[known], group_lengths[known], known_bytes,
+                                   known_starts[positions[known]], known_lengths[positions[known]])
+    if not is_same_unit.all():
+      collided = known[~is_same_unit]
+      collided_units.update(dict(zip(
+        decode_units(block, group_starts[collided], group_starts[collided] + group_lengths[collided], encoding, word_sep),
+        counts[collided].tolist(),
+      )))
+      known = known[is_same_unit]
+    known_counts[positions[known]] += counts[known]
+
+    is_new = ~is_known
+    new_unit_indices = unit_indices[is_new]
+    new_units = decode_units(block, unit_starts[new_unit_indices],
+                             unit_ends[new_unit_indices], encoding, word_sep)
+    units.update(zip(unique_hashes[is_new].tolist(), new_units))
+    new_lengths = group_lengths[is_new]
+    new_byte_positions, _ = get_unit_byte_positions(group_starts[is_new], new_lengths)
+    new_bytes_length = len(new_byte_positions)
+    if known_bytes_length + new_bytes_length > len(known_bytes):
+      known_bytes = np.resize(known_bytes, max(2 * len(known_bytes), known_bytes_length + new_bytes_length))
+    known_bytes[known_bytes_length:known_bytes_length + new_bytes_length] = block[new_byte_positions]
+    new_starts = known_bytes_length + np.cumsum(new_lengths) - new_lengths
+    known_bytes_length += new_bytes_length
+    known_hashes = np.insert(known_hashes, positions[is_new], unique_hashes[is_new])
+    known_counts = np.insert(known_counts, positions[is_new], counts[is_new])
+    known_starts = np.insert(known_starts, positions[is_new], new_starts)
+    known_lengths = np.insert(known_lengths, positions[is_new], new_lengths)
+    del block, unit_starts, unit_ends, new_byte_positions
+    if end == length:
+      break
+    # the separator at `end` separates the blocks
+    start = end + 1
+
+  # the units of different hashes are different
+  result: typing.Counter[str] = Counter(dict(zip(
+    map(units.__getitem__, known_hashes.tolist()),
+    known_counts.tolist(),
+  )))
+  result.update(collided_units)
+  return result
+
+
+def count_byte_units_in_file(path: Path, encoding: str, line_sep: str, word_sep: str) -> Optional[typing.Counter[str]]:
+  """Returns None if the file contains carriage returns."""
+  if is_compressed(path):
+    with open_binary_file(path) as stream:
+      return count_byte_units_in_stream(stream, encoding, line_sep, word_sep)
+  if path.stat().st_size == 0:
+    return Counter({"": 1})
+  with path.open(mode="rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    if mm.find(b"\r") != -1:
+      return None
+    return count_byte_units(mm, encoding, line_sep, word_sep)
+
+
+def count_byte_units_in_stream(stream: BinaryIO, encoding: str, line_sep: str, word_sep: str, *, read_size: int = DEFAULT_READ_SIZE) -> Optional[typing.Counter[str]]:
+  line_sep_bytes = line_sep.encode(encoding)
+  counts: typing.Counter[str] = Counter()
+  rest = b""
+  while True:
+    block = stream.read(read_size)
+    if block == b"":
+      break
+    if b"\r" in block:
+      return None
+    block = rest + block
+    end = block.rfind(line_sep_bytes)
+    if end == -1:
+      rest = block
+      continue
+    counts.update(count_byte_units(memoryview(block)[:end], encoding, line_sep, word_sep))
+    rest = block[end + len(line_sep_bytes):]
+    del block
+  if rest == b"":
+    # the last line is empty
+    counts[""] += 1
+  else:
+    counts.update(count_byte_units(rest, encoding, line_sep, word_sep))
+  return counts
+
+
+def get_block_end(data, start: int, block_size: int, line_sep_byte: int, word_sep_byte: int) -> int:
+  import numpy as np
+
+  length = len(data)
+  if start + block_size >= length:
+    return length
+  window = data[start:start + block_size]
+  separator_positions = np.flatnonzero((window == line_sep_byte) | (window == word_sep_byte))
+  if len(separator_positions) > 0:
+    return start + int(separator_positions[-1])
+  # the unit is longer than the block
+  rest = data[start + block_size:]
+  separator_positions = np.flatnonzero((rest == line_sep_byte) | (rest == word_sep_byte))
+  if len(separator_positions) > 0:
+    return start + block_size + int(separator_positions[0])
+  return length
+
+
+cached_powers: Optional[Tuple] = None
+
+
+def get_powers(size: int) -> Tuple:
+  import numpy as np
+
+  global cached_powers
+  if cached_powers is None or len(cached_powers[0]) < size:
+    # at least one default block
+    size = max(size, DEFAULT_BLOCK_SIZE + 1)
+    powers = np.full(size, HASH_BASE, dtype=np.uint64)
+    powers[0] = 1
+    inverse_powers = np.full(size, HASH_BASE_INVERSE, dtype=np.uint64)
+    inverse_powers[0] = 1
+    # the products overflow, i.e., they are calculated modulo 2^64
+    cached_powers = np.cumprod(powers, dtype=np.uint64), np.cumprod(inverse_powers, dtype=np.uint64)
+  return cached_powers
+
+
+def hash_units(block, line_sep_byte: int, word_sep_byte: int, powers, inverse_powers) -> Tuple:
+  import numpy as np
+
+  separator_positions = np.flatnonzero((block == line_sep_byte) | (block == word_sep_byte))
+  unit_starts = np.concatenate(([0], separator_positions + 1))
+  unit_ends = np.concatenate((separator_positions, [len(block)]))
+  # the digits start at one, so that units consisting of null bytes have different hashes
+  digits = block.astype(np.uint64) + np.uint64(1)
+  prefix_hashes = np.zeros(len(block) + 1, dtype=np.uint64)
+  np.cumsum(digits * powers[:len(block)], dtype=np.uint64, out=prefix_hashes[1:])
+  del digits
+  # sum of digit_i * base^(i - start)
+  hashes = (prefix_hashes[unit_ends] - prefix_hashes[unit_starts]) * inverse_powers[unit_starts]
+  return hashes, unit_starts, unit_ends
+
+
+def count_hashes(hashes) -> Tuple:
+  """Like `np.unique` but returns the index of any occurrence, which allows an unstable sort."""
+  import numpy as np
+
+  order = np.argsort(hashes)
+  sorted_hashes = hashes[order]
+  is_first = np.empty(len(sorted_hashes), dtype=bool)
+  is_first[:1] = True
+  np.not_equal(sorted_hashes[1:], sorted_hashes[:-1], out=is_first[1:])
+  starts = np.flatnonzero(is_first)
+  counts = np.diff(np.append(starts, len(sorted_hashes)))
+  groups = np.empty(len(sorted_hashes), dtype=np.int64)
+  groups[order] = np.cumsum(is_first) - 1
+  return sorted_hashes[starts], order[starts], counts, groups
+
+
+def get_unit_byte_positions(unit_starts, unit_lengths) -> Tuple:
+  import numpy as np
+
+  # position of each unit in the joined units
+  offsets = np.cumsum(unit_lengths) - unit_lengths
+  unit_nrs = np.repeat(np.arange(len(unit_lengths)), unit_lengths)
+  positions = np.arange(len(unit_nrs)) + np.repeat(unit_starts - offsets, unit_lengths)
+  return positions, unit_nrs
+
+
+def are_units_in_block_equal(block, unit_starts, unit_ends, other_starts, other_lengths):
+  import numpy as np
+
+  unit_lengths = unit_ends - unit_starts
+  result = unit_lengths == other_lengths
+  # distance of each byte of a unit to the corresponding byte of the other unit; the units with different lengths aren't compared
+  distances = np.where(result, other_starts - unit_starts, 0)
+  # the units and their separators cover the whole block
+  positions = np.arange(len(block)) + np.repeat(distances, unit_lengths + 1)[:len(block)]
+  # the separator after the last unit could be compared to the end of the block
+  np.minimum(positions, len(block) - 1, out=positions)
+  is_different = block != block[positions]
+  # separators aren't part of the units
+  is_different[unit_ends[:-1]] = False
+  different_positions = np.flatnonzero(is_different)
+  result[np.searchsorted(unit_starts, different_positions, side="right") - 1] = False
+  return result
+
+
+def are_units_equal(data1, starts1, lengths1, data2, starts2, lengths2):
+  import numpy as np
+
+  result = lengths1 == lengths2
+  candidates = np.flatnonzero(result)
+  positions1, unit_nrs = get_unit_byte_positions(starts1[candidates], lengths1[candidates])
+  positions2, _ = get_unit_byte_positions(starts2[candidates], lengths2[candidates])
+  is_different = data1[positions1] != data2[positions2]
+  result[candidates[unit_nrs[is_different]]] = False
+  return result
+
+
+def decode_units(block, unit_starts, unit_ends, encoding: str, word_sep: str) -> List[str]:
+  import numpy as np
+
+  if len(unit_starts) == 0:
+    return []
+  lengths = unit_ends - unit_starts
+  # position of each unit in the joined units
+  offsets = np.cumsum(lengths + 1) - (lengths + 1)
+  joined = np.full(int(offsets[-1] + lengths[-1]), word_sep.encode(encoding)[0], dtype=np.uint8)
+  is_unit_byte = np.ones(len(joined), dtype=bool)
+  is_unit_byte[(offsets + lengths)[:-1]] = False
+  unit_byte_positions = np.flatnonzero(is_unit_byte)
+  joined[unit_byte_positions] = block[np.repeat(unit_starts - offsets, lengths) + unit_byte_positions]
+  return str(joined.tobytes(), encoding).split(word_sep)
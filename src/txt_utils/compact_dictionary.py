@@ -0,0 +1,202 @@
+import mmap
+import struct
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Dict, Generator, Iterator, List, Mapping, Optional, Tuple
+from zlib import crc32
+
+from pronunciation_dictionary import Pronunciations
+
+# name of the shared memory
+CompactDictSource = str
+
+MAGIC = b"TXUD"
+VERSION = 1
+# magic, version, byte order marker, amount of words, pronunciations, symbol references and symbols, length of the word and symbol blob, size of the hash table
+HEADER = struct.Struct("=4sII7Q")
+BYTE_ORDER_MARKER = 1
+ENCODING = "utf-8"
+
+
+class CompactPronunciationDict(Mapping[str, Pronunciations]):
+  """Read-only pronunciation dictionary backed by a buffer created with `compile_dict`."""
+
+  def __init__(self, buffer: memoryview, path: Optional[Path] = None) -> None:
+    super().__init__()
+    magic, version, byte_order_marker, n_words, n_prons, n_symbol_refs, n_symbols, word_blob_len, symbol_blob_len, table_size = HEADER.unpack_from(
+      buffer)
+    if magic != MAGIC or version != VERSION or byte_order_marker != BYTE_ORDER_MARKER:
+      raise ValueError("Buffer doesn't contain a compatible compact dictionary!")
+    self.__buffer = buffer
+    self.__path = path
+    self.__n_words = n_words
+
+    sections = _get_section_bounds(n_words, n_prons, n_symbol_refs,
+                                   n_symbols, word_blob_len, symbol_blob_len, table_size)
+    if sections[-1][1] > len(buffer):
+      raise ValueError("Buffer contains an incomplete compact dictionary!")
+    self.__table = buffer[sections[0][0]:sections[0][1]].cast("Q")
+    self.__word_offsets = buffer[sections[1][0]:sections[1][1]].cast("Q")
+    self.__word_pron_offsets = buffer[sections[2][0]:sections[2][1]].cast("Q")
+    self.__pron_symbol_offsets = buffer[sections[3][0]:sections[3][1]].cast("Q")
+    self.__weights = buffer[sections[4][0]:sections[4][1]].cast("d")
+    symbol_offsets = buffer[sections[5][0]:sections[5][1]].cast("Q")
+    self.__symbol_refs = buffer[sections[6][0]:sections[6][1]].cast("I")
+    self.__word_blob = buffer[sections[7][0]:sections[7][1]]
+    symbol_blob = buffer[sections[8][0]:sections[8][1]]
+    # the symbol inventory is small, therefore it is decoded once
+    self.__symbols = tuple(
+      str(symbol_blob[symbol_offsets[i]:symbol_offsets[i + 1]], ENCODING)
+      for i in range(n_symbols)
+    )
+
+  @property
+  def buffer(self) -> memoryview:
+    return self.__buffer
+
+  @property
+  def path(self) -> Optional[Path]:
+    return self.__path
+
+  def __find(self, word: str) -> int:
+    word_bytes = word.encode(ENCODING)
+    mask = len(self.__table) - 1
+    slot = crc32(word_bytes) & mask
+    while True:
+      entry = self.__table[slot]
+      if entry == 0:
+        return -1
+      word_nr = entry - 1
+      if self.__word_blob[self.__word_offsets[word_nr]:self.__word_offsets[word_nr + 1]] == word_bytes:
+        return word_nr
+      slot = (slot + 1) & mask
+
+  def __contains__(self, word: object) -> bool:
+    return isinstance(word, str) and self.__find(word) != -1
+
+  def __getitem__(self, word: str) -> Pronunciations:
+    word_nr = self.__find(word) if isinstance(word, str) else -1
+    if word_nr == -1:
+      raise KeyError(word)
+    return self.__get_pronunciations(word_nr)
+
+  def __get_pronunciations(self, word_nr: int) -> Pronunciations:
+    result: Pronunciations = OrderedDict()
+    for pron_nr in range(self.__word_pron_offsets[word_nr], self.__word_pron_offsets[word_nr + 1]):
+      symbol_refs = self.__symbol_refs[self.__pron_symbol_offsets[pron_nr]:self.__pron_symbol_offsets[pron_nr + 1]]
+      pronunciation = tuple(self.__symbols[symbol_ref] for symbol_ref in symbol_refs)
+      result[pronunciation] = self.__weights[pron_nr]
+    return result
+
+  def __iter__(self) -> Iterator[str]:
+    for word_nr in range(self.__n_words):
+      yield str(self.__word_blob[self.__word_offsets[word_nr]:self.__word_offsets[word_nr + 1]], ENCODING)
+
+  def __len__(self) -> int:
+    return self.__n_words
+
+
+def _get_section_bounds(n_words: int, n_prons: int, n_symbol_refs: int, n_symbols: int, word_blob_len: int, symbol_blob_len: int, table_size: int) -> List[Tuple[int, int]]:
+  sizes = (
+    8 * table_size,
+    8 * (n_words + 1),
+    8 * (n_words + 1),
+    8 * (n_prons + 1),
+    8 * n_prons,
+    8 * (n_symbols + 1),
+    4 * n_symbol_refs,
+    word_blob_len,
+    symbol_blob_len,
+  )
+  bounds = []
+  start = HEADER.size
+  for size in sizes:
+    bounds.append((start, start + size))
+    # keep all sections 8 byte aligned
+    start += size + (-size % 8)
+  return bounds
+
+
+def compile_dict(dictionary: Mapping[str, Pronunciations]) -> bytes:
+  word_blob = bytearray()
+  word_offsets = array("Q", [0])
+  word_pron_offsets = array("Q", [0])
+  pron_symbol_offsets = array("Q", [0])
+  weights = array("d")
+  symbol_refs = array("I")
+  symbol_ids: Dict[str, int] = {}
+
+  for word, pronunciations in dictionary.items():
+    word_blob += word.encode(ENCODING)
+    word_offsets.append(len(word_blob))
+    for pronunciation, weight in pronunciations.items():
+      for symbol in pronunciation:
+        symbol_refs.append(symbol_ids.setdefault(symbol, len(symbol_ids)))
+      pron_symbol_offsets.append(len(symbol_refs))
+      weights.append(weight)
+    word_pron_offsets.append(len(weights))
+
+  n_words = len(word_offsets) - 1
+  table_size = 1
+  while table_size < 2 * n_words:
+    table_size *= 2
+  table = array("Q", bytes(8 * table_size))
+  mask = table_size - 1
+  for word_nr in range(n_words):
+    slot = crc32(word_blob[word_offsets[word_nr]:word_offsets[word_nr + 1]]) & mask
+    while table[slot] != 0:
+      slot = (slot + 1) & mask
+    table[slot] = word_nr + 1
+
+  symbol_blob = bytearray()
+  symbol_offsets = array("Q", [0])
+  for symbol in symbol_ids:
+    symbol_blob += symbol.encode(ENCODING)
+    symbol_offsets.append(len(symbol_blob))
+
+  header = HEADER.pack(MAGIC, VERSION, BYTE_ORDER_MARKER, n_words, len(weights), len(symbol_refs),
+                       len(symbol_ids), len(word_blob), len(symbol_blob), table_size)
+  parts = [header]
+  for section in (table, word_offsets, word_pron_offsets, pron_symbol_offsets, weights, symbol_offsets, symbol_refs, word_blob, symbol_blob):
+    section_bytes = section.tobytes() if isinstance(section, array) else bytes(section)
+    parts.append(section_bytes)
+    parts.append(bytes(-len(section_bytes) % 8))
+  return b"".join(parts)
+
+
+def save_compact_dict(data: bytes, path: Path) -> None:
+  path.parent.mkdir(parents=True, exist_ok=True)
+  path.write_bytes(data)
+
+
+def load_compact_dict(path: Path) -> CompactPronunciationDict:
+  with path.open(mode="rb") as file:
+    mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+  return CompactPronunciationDict(memoryview(mm), path)
+
+
+@contextmanager
+def share_compact_dict(dictionary: Mapping[str, Pronunciations]) -> Generator[CompactDictSource, None, None]:
+  """Copies the dictionary into shared memory; workers attach via `attach_compact_dict`."""
+  data = dictionary.buffer if isinstance(dictionary, CompactPronunciationDict) else compile_dict(dictionary)
+  shm = SharedMemory(create=True, size=len(data))
+  try:
+    shm.buf[:len(data)] = data
+    del data
+    yield shm.name
+  finally:
+    shm.close()
+    shm.unlink()
+
+
+process_shms: List[SharedMemory] = []
+
+
+def attach_compact_dict(source: CompactDictSource) -> CompactPronunciationDict:
+  shm = SharedMemory(name=source)
+  # the shared memory needs to stay open as long as the dictionary is used
+  process_shms.append(shm)
+  return CompactPronunciationDict(shm.buf)
@@ -0,0 +1,145 @@
+import bz2
+import gzip
+import io
+import lzma
+from importlib.util import find_spec
+from pathlib import Path
+from typing import IO, BinaryIO, Optional, cast
+
+GZIP = "gzip"
+BZIP2 = "bzip2"
+XZ = "xz"
+ZSTD = "zstd"
+
+COMPRESSION_SUFFIXES = {
+  ".gz": GZIP,
+  ".bz2": BZIP2,
+  ".xz": XZ,
+  ".zst": ZSTD,
+  ".zstd": ZSTD,
+}
+
+# the magic number of bzip2 is followed by the block size ("1" to "9") and the signature of the first block
+BZIP2_MAGIC_NUMBER = b"BZh"
+BZIP2_BLOCK_MAGIC_NUMBER = b"\x31\x41\x59\x26\x53\x59"
+MAGIC_NUMBERS = (
+  (b"\x1f\x8b", GZIP),
+  (b"\xfd7zXZ\x00", XZ),
+  (b"\x28\xb5\x2f\xfd", ZSTD),
+)
+MAGIC_NUMBER_LENGTH = 10
+
+# level 6 is the default of the gzip program; Python defaults to the much slower level 9
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+DETECT = "detect"
+
+zstd_threads = 0
+
+
+def set_compression_threads(threads: int) -> None:
+  """Sets the threads which compress zstd files (0 = calling thread, -1 = one per CPU)."""
+  global zstd_threads
+  zstd_threads = threads
+
+
+def is_zstandard_available() -> bool:
+  return find_spec("zstandard") is not None
+
+
+def get_compression_from_suffix(path: Path) -> Optional[str]:
+  return COMPRESSION_SUFFIXES.get(path.suffix.lower())
+
+
+def get_compression_from_magic_number(start: bytes) -> Optional[str]:
+  for magic_number, compression in MAGIC_NUMBERS:
+    if start.startswith(magic_number):
+      return compression
+  if start.startswith(BZIP2_MAGIC_NUMBER) and start[3:4].isdigit() and start[4:10] == BZIP2_BLOCK_MAGIC_NUMBER:
+    return BZIP2
+  return None
+
+
+def get_compression(path: Path) -> Optional[str]:
+  """Detects the compression by the magic number of non-empty files, otherwise by the suffix."""
+  if path.is_file():
+    with path.open(mode="rb") as stream:
+      start = stream.read(MAGIC_NUMBER_LENGTH)
+    if len(start) > 0:
+      return get_compression_from_magic_number(start)
+  return get_compression_from_suffix(path)
+
+
+def detect_compression(path: Path, mode: str) -> Optional[str]:
+  return get_compression(path) if mode == "r" else get_compression_from_suffix(path)
+
+
+def is_compressed(path: Path) -> bool:
+  return get_compression(path) is not None
+
+
+def get_uncompressed_suffix(path: Path) -> str:
+  if get_compression_from_suffix(path) is None:
+    return path.suffix
+  return Path(path.stem).suffix
+
+
+def open_binary_file(path: Path, mode: str = "r", *, compression: Optional[str] = DETECT) -> BinaryIO:
+  """Opens the file in binary mode and (de)compresses it while it is streamed."""
+  if mode not in ("r", "w"):
+    raise ValueError(f"Mode \"{mode}\" is not supported!")
+  if compression == DETECT:
+    compression = detect_compression(path, mode)
+  if compression is None:
+    return cast(BinaryIO, path.open(mode=f"{mode}b"))
+  if compression == GZIP:
+    return cast(BinaryIO, gzip.open(path, mode=f"{mode}b", compresslevel=GZIP_LEVEL))
+  if compression == BZIP2:
+    return cast(BinaryIO, bz2.open(path, mode=f"{mode}b"))
+  if compression == XZ:
+    return cast(BinaryIO, lzma.open(path, mode=f"{mode}b"))
+  if compression == ZSTD:
+    return open_zstd_file(path, mode)
+  raise ValueError(f"Compression \"{compression}\" is not supported!")
+
+
+def open_zstd_file(path: Path, mode: str) -> BinaryIO:
+  if not is_zstandard_available():
+    raise ImportError("zstd files require zstandard, e.g., pip install txt-utils[zstd]")
+  import zstandard
+
+  stream = path.open(mode=f"{mode}b")
+  try:
+    if mode == "r":
+      # files of multiple frames are created by concatenating files or by some parallel compressors
+      return cast(BinaryIO, zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True, closefd=True))
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=zstd_threads)
+    return cast(BinaryIO, compressor.stream_writer(stream, closefd=True))
+  except BaseException:
+    stream.close()
+    raise
+
+
+def open_file(path: Path, mode: str = "r", encoding: Optional[str] = None, *, newline: Optional[str] = None, compression: Optional[str] = DETECT) -> IO[str]:
+  """Like `path.open()` in text mode but (de)compresses compressed files."""
+  if compression == DETECT:
+    compression = detect_compression(path, mode)
+  if compression is None:
+    return path.open(mode=mode, encoding=encoding, newline=newline)
+  binary_stream = open_binary_file(path, mode, compression=compression)
+  try:
+    return io.TextIOWrapper(binary_stream, encoding=encoding, newline=newline)
+  except BaseException:
+    binary_stream.close()
+    raise
+
+
+def read_text(path: Path, encoding: str) -> str:
+  with open_file(path, encoding=encoding) as stream:
+    return stream.read()
+
+
+def write_text(path: Path, text: str, encoding: str, *, compression: Optional[str] = DETECT) -> None:
+  with open_file(path, "w", encoding, compression=compression) as stream:
+    stream.write(text)
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import struct
+from logging import getLogger
+from pathlib import Path
+from typing import Optional
+
+from pronunciation_dictionary import DeserializationOptions, MultiprocessingOptions, load_dict
+
+from txt_utils.compact_dictionary import (VERSION, CompactPronunciationDict, compile_dict,
+                                          load_compact_dict, save_compact_dict)
+from txt_utils.streaming import get_temp_path, replace_file
+
+DEFAULT_MAX_CACHE_SIZE = 2 * 1024 ** 3
+CACHE_FILE_SUFFIX = ".dict"
+
+
+def get_default_cache_dir() -> Path:
+  """Returns $XDG_CACHE_HOME/txt-utils or ~/.cache/txt-utils."""
+  return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "txt-utils"
+
+
+def get_cache_key(path: Path, encoding: str, options: DeserializationOptions) -> str:
+  stat = path.stat()
+  key_data = {
+    "path": str(path.absolute()),
+    "size": stat.st_size,
+    "mtime": stat.st_mtime_ns,
+    "encoding": encoding,
+    "consider_comments": options.consider_comments,
+    "consider_word_nrs": options.consider_word_nrs,
+    "consider_pronunciation_comments": options.consider_pronunciation_comments,
+    "consider_weights": options.consider_weights,
+    "version": VERSION,
+  }
+  key = hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+  return key
+
+
+def load_dict_cached(path: Path, encoding: str, options: DeserializationOptions, mp_options: MultiprocessingOptions, *, cache_dir: Optional[Path] = None, max_cache_size: Optional[int] = DEFAULT_MAX_CACHE_SIZE) -> CompactPronunciationDict:
+  """Loads the dictionary memory mapped from the cache or parses and caches it."""
+  logger = getLogger(__name__)
+  if cache_dir is None:
+    cache_dir = get_default_cache_dir()
+  cache_path = cache_dir / f"{get_cache_key(path, encoding, options)}{CACHE_FILE_SUFFIX}"
+
+  if cache_path.is_file():
+    try:
+      result = load_compact_dict(cache_path)
+    except (ValueError, TypeError, struct.error):
+      logger.debug(f"Cached dictionary \"{cache_path}\" is not compatible or corrupt, recreating it...")
+    else:
+      logger.debug(f"Loaded dictionary from cache \"{cache_path}\".")
+      # the modification time is used to determine the least recently used entries
+      os.utime(cache_path)
+      return result
+
+  dictionary = load_dict(path, encoding, options, mp_options)
+  logger.debug("Compiling dictionary...")
+  data = compile_dict(dictionary)
+  del dictionary
+
+  cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+  tmp_path = get_temp_path(cache_path)
+  try:
+    save_compact_dict(data, tmp_path)
+    replace_file(tmp_path, cache_path)
+  finally:
+    if tmp_path.exists():
+      tmp_path.unlink()
+  del data
+  logger.debug(f"Added dictionary to cache \"{cache_path}\".")
+
+  if max_cache_size is not None:
+    evict_cache_entries(cache_dir, max_cache_size, keep=cache_path)
+
+  return load_compact_dict(cache_path)
+
+
+def evict_cache_entries(cache_dir: Path, max_cache_size: int, *, keep: Optional[Path] = None) -> int:
+  logger = getLogger(__name__)
+  entries = []
+  for entry in cache_dir.glob(f"*{CACHE_FILE_SUFFIX}"):
+    try:
+      stat = entry.stat()
+    except FileNotFoundError:
+      continue
+    entries.append((stat.st_mtime_ns, stat.st_size, entry))
+
+  total_size = sum(size for _, size, _ in entries)
+  removed_count = 0
+  for _, size, entry in sorted(entries):
+    if total_size <= max_cache_size:
+      break
+    if entry == keep:
+      continue
+    try:
+      entry.unlink()
+    except OSError:
+      # e.g., the entry is in use on Windows
+      continue
+    logger.debug(f"Removed cached dictionary \"{entry}\".")
+    total_size -= size
+    removed_count += 1
+  return removed_count
@@ -0,0 +1,51 @@
+import traceback
+from functools import partial
+from logging import getLogger
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Callable, Generator, Optional, Sequence, Tuple, TypeVar
+
+from tqdm import tqdm
+
+from txt_utils.profiling import get_worker_initializer
+
+R = TypeVar("R")
+
+# (file, result of the method or None if it failed, formatted exception or None if it succeeded)
+FileResult = Tuple[Path, Optional[R], Optional[str]]
+
+
+def process_files(paths: Sequence[Path], method: Callable[[Path], R], *, n_jobs: int = 4, maxtasksperchild: Optional[int] = None, initializer: Optional[Callable[..., None]] = None, initargs: Tuple = (), desc: str = "Processing", silent: bool = False) -> Generator[FileResult[R], None, None]:
+  """Yields the result of each file in the order in which the files are finished."""
+  logger = getLogger(__name__)
+  n_jobs = min(n_jobs, len(paths))
+  if n_jobs == 0:
+    return
+  logger.debug(f"Jobs (files): {n_jobs}")
+  if initializer is None:
+    initializer = init_nothing
+  method_proxy = partial(process_file, method=method)
+  with Pool(
+    processes=n_jobs,
+    initializer=get_worker_initializer(initializer),
+    initargs=initargs,
+    maxtasksperchild=maxtasksperchild,
+  ) as pool:
+    iterator = tqdm(pool.imap_unordered(method_proxy, enumerate(paths), chunksize=1), desc=desc,
+                    total=len(paths), unit=" file(s)", disable=silent)
+    for index, result, error in iterator:
+      yield paths[index], result, error
+
+
+def init_nothing(*args: Any) -> None:
+  pass
+
+
+def process_file(indexed_path: Tuple[int, Path], method: Callable[[Path], R]) -> Tuple[int, Optional[R], Optional[str]]:
+  index, path = indexed_path
+  try:
+    result = method(path)
+  except Exception:
+    # the exception itself could be unpicklable
+    return index, None, traceback.format_exc()
+  return index, result, None
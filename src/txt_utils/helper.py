@@ -1,7 +1,73 @@
-from typing import List
+import glob
+import os
+from collections import deque
+from itertools import islice
+from multiprocessing.pool import AsyncResult, Pool
+from pathlib import Path
+from typing import Callable, Deque, Generator, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from txt_utils.compression import get_uncompressed_suffix
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+GLOB_CHARACTERS = "*?["
 
 
 def split_adv(s: str, sep: str) -> List[str]:
   if sep == "":
     return list(s)
   return s.split(sep)
+
+
+def iter_chunks(items: Iterable[T], chunk_size: int) -> Generator[List[T], None, None]:
+  if chunk_size <= 0:
+    raise ValueError("Chunk size needs to be greater than zero!")
+  iterator = iter(items)
+  while True:
+    chunk = list(islice(iterator, chunk_size))
+    if len(chunk) == 0:
+      break
+    yield chunk
+
+
+def imap_ordered(pool: Pool, method: Callable[[T], R], items: Iterable[T], window: int) -> Generator[Tuple[T, R], None, None]:
+  """Like `pool.imap` but consumes `items` lazily and keeps at most `window` in flight."""
+  if window <= 0:
+    raise ValueError("Window needs to be greater than zero!")
+  pending: Deque[Tuple[T, AsyncResult]] = deque()
+  for item in items:
+    if len(pending) == window:
+      done_item, done_result = pending.popleft()
+      yield done_item, done_result.get()
+      del done_item, done_result
+    pending.append((item, pool.apply_async(method, (item,))))
+  while len(pending) > 0:
+    done_item, done_result = pending.popleft()
+    yield done_item, done_result.get()
+    del done_item, done_result
+
+
+def get_files(path: Path, suffixes: Optional[Set[str]] = None) -> List[Path]:
+  """Returns the file, the files in the directory or the files matching the glob pattern."""
+  if path.is_file():
+    return [path]
+  if path.is_dir():
+    files = (
+      Path(root) / name
+      for root, _, names in os.walk(path)
+      for name in names
+    )
+  elif any(character in str(path) for character in GLOB_CHARACTERS):
+    files = (Path(match) for match in glob.iglob(str(path), recursive=True))
+    files = (file for file in files if file.is_file())
+  else:
+    raise FileNotFoundError(f"File was not found: {path}")
+  result = sorted(
+    file
+    for file in files
+    if suffixes is None or file.suffix.lower() in suffixes or get_uncompressed_suffix(file).lower() in suffixes
+  )
+  if len(result) == 0 and not path.is_dir():
+    raise FileNotFoundError(f"No files were found: {path}")
+  return result
@@ -0,0 +1,163 @@
+import json
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter, process_time
+from typing import Any, Dict, Generator, List, Optional
+
+try:
+  import resource
+except ImportError:
+  # not available on Windows
+  resource = None
+
+PROC_STATUS_PATH = Path("/proc/self/status")
+PROC_CLEAR_REFS_PATH = Path("/proc/self/clear_refs")
+
+
+class Stage():
+  def __init__(self, name: str, depth: int) -> None:
+    self.name = name
+    self.depth = depth
+    self.items: Optional[int] = None
+    self.wall_time = 0.0
+    self.cpu_time = 0.0
+    self.children_cpu_time = 0.0
+    self.peak_rss: Optional[int] = None
+    self.children_peak_rss: Optional[int] = None
+
+  def add_items(self, count: int) -> None:
+    self.items = count if self.items is None else self.items + count
+
+  def to_dict(self) -> Dict[str, Any]:
+    return {
+      "name": self.name,
+      "depth": self.depth,
+      "wall_time_s": self.wall_time,
+      "cpu_time_s": self.cpu_time,
+      "children_cpu_time_s": self.children_cpu_time,
+      "peak_rss_mb": to_mb(self.peak_rss),
+      "children_peak_rss_mb": to_mb(self.children_peak_rss),
+      "items": self.items,
+    }
+
+
+def to_mb(size: Optional[int]) -> Optional[float]:
+  return None if size is None else size / 1024 ** 2
+
+
+class DisabledStage(Stage):
+  def add_items(self, count: int) -> None:
+    pass
+
+
+# one instance for all stages while the instrumentation is disabled, i.e., measuring a stage costs one function call
+DISABLED_STAGE = DisabledStage("", 0)
+
+instrumentation_enabled = False
+# in the order in which they were started
+recorded_stages: List[Stage] = []
+active_stages: List[Stage] = []
+
+
+def enable_instrumentation() -> None:
+  global instrumentation_enabled
+  instrumentation_enabled = True
+  recorded_stages.clear()
+  active_stages.clear()
+
+
+def disable_instrumentation() -> None:
+  global instrumentation_enabled
+  instrumentation_enabled = False
+
+
+def is_instrumentation_enabled() -> bool:
+  return instrumentation_enabled
+
+
+@contextmanager
+def stage(name: str) -> Generator[Stage, None, None]:
+  """Measures wall time, CPU time, peak RSS and processed items if instrumentation is enabled."""
+  if not instrumentation_enabled:
+    yield DISABLED_STAGE
+    return
+
+  current = Stage(name, len(active_stages))
+  update_peak_rss_of_active_stages(get_peak_rss())
+  reset_peak_rss()
+  recorded_stages.append(current)
+  active_stages.append(current)
+  start_times = os.times()
+  start_cpu = process_time()
+  start = perf_counter()
+  try:
+    yield current
+  finally:
+    current.wall_time = perf_counter() - start
+    current.cpu_time = process_time() - start_cpu
+    end_times = os.times()
+    current.children_cpu_time = (
+      (end_times.children_user - start_times.children_user)
+      + (end_times.children_system - start_times.children_system)
+    )
+    current.children_peak_rss = get_children_peak_rss()
+    update_peak_rss_of_active_stages(get_peak_rss())
+    active_stages.pop()
+
+
+def add_stage_items(count: int) -> None:
+  if instrumentation_enabled and len(active_stages) > 0:
+    active_stages[-1].add_items(count)
+
+
+def update_peak_rss_of_active_stages(peak_rss: Optional[int]) -> None:
+  if peak_rss is None:
+    return
+  for active_stage in active_stages:
+    if active_stage.peak_rss is None or active_stage.peak_rss < peak_rss:
+      active_stage.peak_rss = peak_rss
+
+
+def get_peak_rss() -> Optional[int]:
+  try:
+    with PROC_STATUS_PATH.open(mode="r", encoding="ascii") as file:
+      for line in file:
+        if line.startswith("VmHWM:"):
+          return int(line.split()[1]) * 1024
+  except (OSError, ValueError):
+    pass
+  if resource is None:
+    return None
+  peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  # bytes on macOS, kilobytes otherwise
+  return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def get_children_peak_rss() -> Optional[int]:
+  if resource is None:
+    return None
+  peak_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+  if peak_rss == 0:
+    return None
+  return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def reset_peak_rss() -> bool:
+  try:
+    PROC_CLEAR_REFS_PATH.write_text("5", "ascii")
+  except OSError:
+    return False
+  return True
+
+
+def get_stage_report() -> Dict[str, Any]:
+  return {
+    "stages": [recorded_stage.to_dict() for recorded_stage in recorded_stages],
+  }
+
+
+def write_stage_report(path: Path) -> None:
+  path.parent.mkdir(parents=True, exist_ok=True)
+  path.write_text(json.dumps(get_stage_report(), indent=2), "UTF-8")
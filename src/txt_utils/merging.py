@@ -0,0 +1,172 @@
+import codecs
+from functools import partial
+from logging import getLogger
+from pathlib import Path
+from queue import Full, Queue
+from threading import Event, Thread
+from typing import BinaryIO, Callable, Generator, Iterable, List, Optional, Tuple, TypeVar, Union
+
+from tqdm import tqdm
+
+from txt_utils.compression import get_compression_from_suffix, open_binary_file, open_file
+from txt_utils.shared_text import MAPPABLE_ENCODINGS
+from txt_utils.streaming import DEFAULT_BUFFER_SIZE, get_temp_path, replace_file
+
+DEFAULT_READ_AHEAD = 16
+
+T = TypeVar("T")
+# block of a file, None after the last block of a file or the exception raised while reading it
+ReadAheadItem = Tuple[int, Union[T, None, Exception]]
+
+
+def can_copy_bytes(encoding: str) -> bool:
+  return codecs.lookup(encoding).name in MAPPABLE_ENCODINGS
+
+
+def merge_files(paths: Iterable[Path], output: Path, encoding: str, *, sep: str = "\n", buffer_size: int = DEFAULT_BUFFER_SIZE, read_ahead: int = DEFAULT_READ_AHEAD, silent: bool = False) -> Tuple[int, List[Path]]:
+  """Returns the amount of merged files and the files which couldn't be read."""
+  compression = get_compression_from_suffix(output)
+  tmp_path = get_temp_path(output)
+  try:
+    with open_binary_file(tmp_path, "w", compression=compression) as out_stream:
+      result = merge_files_into_stream(paths, out_stream, encoding, sep=sep, buffer_size=buffer_size,
+                                       read_ahead=read_ahead, silent=silent, remove_failed=compression is None)
+    replace_file(tmp_path, output)
+  finally:
+    if tmp_path.exists():
+      tmp_path.unlink()
+  return result
+
+
+def merge_files_into_stream(paths: Iterable[Path], out_stream: BinaryIO, encoding: str, *, sep: str = "\n", buffer_size: int = DEFAULT_BUFFER_SIZE, read_ahead: int = DEFAULT_READ_AHEAD, silent: bool = False, remove_failed: Optional[bool] = None) -> Tuple[int, List[Path]]:
+  """Like `merge_files` but writes into a binary stream."""
+  logger = getLogger(__name__)
+  if buffer_size <= 0:
+    raise ValueError("Buffer size needs to be greater than zero!")
+  if read_ahead <= 0:
+    raise ValueError("Read ahead needs to be greater than zero!")
+  paths = list(paths)
+  read_blocks: Callable[[Path], Iterable[Union[bytes, str]]]
+  if can_copy_bytes(encoding):
+    read_blocks = partial(read_translated_byte_blocks, encoding=encoding, buffer_size=buffer_size)
+  else:
+    read_blocks = partial(read_text_blocks, encoding=encoding, buffer_size=buffer_size)
+  encoder = codecs.getincrementalencoder(encoding)()
+  if remove_failed is None:
+    remove_failed = out_stream.seekable()
+  failed: List[Path] = []
+  merged_count = 0
+
+  # byte order mark if the encoding has one; it isn't removed if the first file fails
+  out_stream.write(encoder.encode(""))
+  # whether the next file needs to be preceded by the separator
+  needs_sep = False
+  # position before the current file (and its separator) or None until its first block is received or if failed files aren't removed
+  file_start: Optional[int] = None
+  file_started = False
+  blocks = iter_blocks_read_ahead(paths, read_blocks, read_ahead)
+  progress_bar = tqdm(total=len(paths), desc="Merging", unit=" file(s)", disable=silent)
+  try:
+    for index, block in blocks:
+      if isinstance(block, Exception):
+        logger.debug(f"File: {paths[index].absolute()}", exc_info=block)
+        failed.append(paths[index])
+        if file_started and file_start is not None:
+          # remove the separator and the part of the file which was already written
+          out_stream.seek(file_start)
+          out_stream.truncate()
+          needs_sep = merged_count > 0
+        file_started = False
+        progress_bar.update()
+        continue
+      if not file_started:
+        file_started = True
+        file_start = out_stream.tell() if remove_failed else None
+        if needs_sep:
+          out_stream.write(encoder.encode(sep))
+        needs_sep = True
+      if block is None:
+        merged_count += 1
+        file_started = False
+        progress_bar.update()
+      else:
+        out_stream.write(block if isinstance(block, bytes) else encoder.encode(block))
+  finally:
+    progress_bar.close()
+    blocks.close()
+  out_stream.write(encoder.encode("", final=True))
+  return merged_count, failed
+
+
+def read_translated_byte_blocks(path: Path, encoding: str, buffer_size: int) -> Generator[bytes, None, None]:
+  """Yields the bytes of the file with newlines translated like in text mode."""
+  decoder = codecs.getincrementaldecoder(encoding)()
+  with open_binary_file(path) as stream:
+    pending_cr = False
+    while True:
+      block = stream.read(buffer_size)
+      if block == b"":
+        decoder.decode(b"", final=True)
+        break
+      decoder.decode(block)
+      if pending_cr:
+        block = b"\r" + block
+      # a CR at the end of the block could be followed by a LF in the next block
+      pending_cr = block.endswith(b"\r")
+      if pending_cr:
+        block = block[:-1]
+      if b"\r" in block:
+        block = block.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+      yield block
+    if pending_cr:
+      yield b"\n"
+
+
+def read_text_blocks(path: Path, encoding: str, buffer_size: int) -> Generator[str, None, None]:
+  with open_file(path, encoding=encoding) as stream:
+    while True:
+      block = stream.read(buffer_size)
+      if block == "":
+        break
+      yield block
+
+
+def iter_blocks_read_ahead(paths: List[Path], read_blocks: Callable[[Path], Iterable[T]], read_ahead: int) -> Generator[ReadAheadItem[T], None, None]:
+  """Reads the blocks in a background thread; each file ends with None or the exception."""
+  queue: "Queue[Optional[ReadAheadItem[T]]]" = Queue(maxsize=read_ahead)
+  stopped = Event()
+
+  def put(item: Optional[ReadAheadItem[T]]) -> bool:
+    while not stopped.is_set():
+      try:
+        queue.put(item, timeout=0.1)
+      except Full:
+        continue
+      return True
+    return False
+
+  def read_files() -> None:
+    for index, path in enumerate(paths):
+      try:
+        for block in read_blocks(path):
+          if not put((index, block)):
+            return
+      except Exception as ex:
+        if not put((index, ex)):
+          return
+        continue
+      if not put((index, None)):
+        return
+    put(None)
+
+  thread = Thread(target=read_files, name="merge-read-ahead", daemon=True)
+  thread.start()
+  try:
+    while True:
+      item = queue.get()
+      if item is None:
+        break
+      yield item
+  finally:
+    stopped.set()
+    thread.join()
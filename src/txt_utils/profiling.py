@@ -0,0 +1,69 @@
+import cProfile
+import os
+import pstats
+import signal
+from functools import partial
+from multiprocessing.util import Finalize
+from pathlib import Path
+from time import time_ns
+from typing import Any, Callable, Optional
+
+WORKER_PROFILE_PATTERN = "worker-*.pstats"
+
+worker_profile_dir: Optional[Path] = None
+process_profile_dumped = False
+
+
+def enable_worker_profiling(directory: Path) -> None:
+  global worker_profile_dir
+  worker_profile_dir = directory
+
+
+def disable_worker_profiling() -> None:
+  global worker_profile_dir
+  worker_profile_dir = None
+
+
+def get_worker_initializer(initializer: Callable[..., None]) -> Callable[..., None]:
+  if worker_profile_dir is None:
+    return initializer
+  return partial(init_profiled_worker, str(worker_profile_dir), initializer)
+
+
+def init_profiled_worker(directory: str, initializer: Callable[..., None], *initargs: Any) -> None:
+  profiler = cProfile.Profile()
+  path = Path(directory) / f"worker-{os.getpid()}-{time_ns()}.pstats"
+  dump = partial(dump_worker_profile, profiler, path)
+  # workers exit normally if `maxtasksperchild` is reached or the pool is closed
+  Finalize(None, dump, exitpriority=100)
+  # workers are terminated if the pool is left before it is closed
+  signal.signal(signal.SIGTERM, partial(handle_termination, dump))
+  profiler.enable()
+  initializer(*initargs)
+
+
+def dump_worker_profile(profiler: cProfile.Profile, path: Path) -> None:
+  global process_profile_dumped
+  profiler.disable()
+  if not process_profile_dumped:
+    process_profile_dumped = True
+    profiler.dump_stats(path)
+
+
+def handle_termination(dump: Callable[[], None], signum: int, frame: Any) -> None:
+  dump()
+  # terminate like without this handler
+  signal.signal(signum, signal.SIG_DFL)
+  os.kill(os.getpid(), signum)
+
+
+def merge_worker_profiles(directory: Path, path: Path) -> int:
+  worker_paths = sorted(directory.glob(WORKER_PROFILE_PATTERN))
+  if len(worker_paths) == 0:
+    return 0
+  stats = pstats.Stats(str(worker_paths[0]))
+  for worker_path in worker_paths[1:]:
+    stats.add(str(worker_path))
+  path.parent.mkdir(parents=True, exist_ok=True)
+  stats.dump_stats(path)
+  return len(worker_paths)
@@ -1,5 +1,33 @@
 import re
+from functools import partial
 from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Match, Pattern, Set, Tuple, Union
+
+try:
+  from re import _parser as sre_parse  # Python >= 3.11
+except ImportError:
+  import sre_parse
+
+# (pattern, replacement, is regex)
+ReplacementRule = Tuple[str, str, bool]
+# (pattern, replacement template or method)
+RuleBatch = Tuple[Pattern[str], Union[str, Callable[[Match[str]], str]]]
+
+# (regex pattern, replacement template) or ("", replacement of each literal) for consecutive literal rules
+RuleSegment = Tuple[str, Union[str, Dict[str, str]]]
+CompiledRuleSegment = Tuple[Pattern[str], Union[str, Dict[str, str]]]
+REGEX_SPECIAL_CHARACTERS = set(".^$*+?{}[]\\|()")
+CATEGORY_PATTERNS = {
+  "CATEGORY_DIGIT": r"\d",
+  "CATEGORY_NOT_DIGIT": r"\D",
+  "CATEGORY_SPACE": r"\s",
+  "CATEGORY_NOT_SPACE": r"\S",
+  "CATEGORY_WORD": r"\w",
+  "CATEGORY_NOT_WORD": r"\W",
+}
+# numbered backreferences and conditions would refer to other groups in a combined pattern; global flags are only allowed at the start of a pattern
+NON_COMBINABLE_PATTERN = re.compile(r"\\[1-9]|\(\?\(\d|\(\?[aiLmsux]+\)")
 
 
 def replace_text(content: str, replace: str, replace_with: str, *, disable_regex: bool = False) -> str:
@@ -18,3 +46,253 @@ def replace_text(content: str, replace: str, replace_with: str, *, disable_regex
     pattern = re.compile(replace)
     new_content = re.sub(pattern, replace_with, content)
   return new_content
+
+
+def replace_text_using_rules(content: str, rules: Iterable[ReplacementRule]) -> str:
+  batches = compile_replacement_rules(rules)
+  return apply_replacement_rules(content, batches)
+
+
+def read_replacement_rules(path: Path, encoding: str, *, disable_regex: bool = False) -> List[ReplacementRule]:
+  """Reads one `PATTERN<TAB>REPLACEMENT` rule per line; empty lines are ignored."""
+  rules: List[ReplacementRule] = []
+  content = path.read_text(encoding)
+  for line_nr, line in enumerate(content.split("\n"), start=1):
+    if line == "":
+      continue
+    parts = line.split("\t", 1)
+    if len(parts) != 2:
+      raise ValueError(f"Line {line_nr} of the rules doesn't contain a tab!")
+    pattern, replacement = parts
+    rules.append((pattern, replacement, not disable_regex))
+  return rules
+
+
+def compile_replacement_rules(rules: Iterable[ReplacementRule]) -> List[RuleBatch]:
+  """Combines the rules into as few regex patterns as possible."""
+  batches: List[RuleBatch] = []
+  segments: List[RuleSegment] = []
+  group_names: Set[str] = set()
+
+  for rule_nr, (pattern, replacement, is_regex) in enumerate(rules, start=1):
+    if pattern == "":
+      raise ValueError(f"Pattern of rule {rule_nr} is empty!")
+    if is_regex and "\\" not in replacement and REGEX_SPECIAL_CHARACTERS.isdisjoint(pattern):
+      # the pattern matches only itself; literal rules are much faster
+      is_regex = False
+    if not is_regex:
+      if len(segments) > 0 and isinstance(segments[-1][1], dict):
+        segments[-1][1].setdefault(pattern, replacement)
+      else:
+        segments.append(("", {pattern: replacement}))
+      continue
+
+    try:
+      rule_pattern = re.compile(pattern)
+    except re.error as error:
+      raise ValueError(f"Pattern of rule {rule_nr} is invalid: {error}") from error
+    if NON_COMBINABLE_PATTERN.search(pattern) is not None:
+      batches.extend(get_rule_batches(segments))
+      segments, group_names = [], set()
+      batches.append((rule_pattern, replacement))
+      continue
+    if not group_names.isdisjoint(rule_pattern.groupindex):
+      batches.extend(get_rule_batches(segments))
+      segments, group_names = [], set()
+    group_names.update(rule_pattern.groupindex)
+    segments.append((pattern, replacement))
+
+  batches.extend(get_rule_batches(segments))
+  return batches
+
+
+def get_trie_pattern(words: Iterable[str]) -> str:
+  trie: Dict[str, Dict] = {}
+  for word in words:
+    node = trie
+    for char in word:
+      node = node.setdefault(char, {})
+    node[""] = {}
+  return get_trie_node_pattern(trie)
+
+
+def get_trie_node_pattern(node: Dict[str, Dict]) -> str:
+  branches = [re.escape(char) + get_trie_node_pattern(child)
+              for char, child in node.items() if char != ""]
+  if len(branches) == 0:
+    return ""
+  pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+  if "" in node:
+    # greedy, i.e., longer words are preferred
+    pattern = f"(?:{pattern})?"
+  return pattern
+
+
+def get_rule_batches(segments: List[RuleSegment]) -> List[RuleBatch]:
+  if len(segments) == 0:
+    return []
+  compiled_segments: List[CompiledRuleSegment] = []
+  for pattern, replacement in segments:
+    if isinstance(replacement, dict):
+      pattern = get_trie_pattern(replacement)
+    compiled_segments.append((re.compile(pattern), replacement))
+  if len(compiled_segments) == 1:
+    segment_pattern, segment_replacement = compiled_segments[0]
+    if isinstance(segment_replacement, str):
+      return [(segment_pattern, segment_replacement)]
+    return [(segment_pattern, partial(get_literal_replacement, replacements=segment_replacement))]
+  # capturing groups for each rule would slow down the matching considerably, therefore non-capturing groups are used and the matching rule is determined afterwards
+  combined_pattern = get_alternation(compiled_segments)
+  left_patterns: Dict[Tuple[int, int], Pattern[str]] = {}
+  add_left_patterns(compiled_segments, 0, len(compiled_segments), left_patterns)
+  method = partial(
+    get_rule_replacement,
+    segments=compiled_segments,
+    left_patterns=left_patterns,
+  )
+  return [(combined_pattern, method)]
+
+
+def get_alternation(segments: List[CompiledRuleSegment]) -> Pattern[str]:
+  return re.compile("|".join(f"(?:{pattern.pattern})" for pattern, _ in segments))
+
+
+def add_left_patterns(segments: List[CompiledRuleSegment], start: int, end: int, left_patterns: Dict[Tuple[int, int], Pattern[str]]) -> None:
+  if end - start <= 1:
+    return
+  mid = (start + end) // 2
+  left_patterns[(start, end)] = get_alternation(segments[start:mid])
+  add_left_patterns(segments, start, mid, left_patterns)
+  add_left_patterns(segments, mid, end, left_patterns)
+
+
+def get_literal_replacement(match: Match[str], replacements: Dict[str, str]) -> str:
+  return replacements[match.group()]
+
+
+def get_rule_replacement(match: Match[str], segments: List[CompiledRuleSegment], left_patterns: Dict[Tuple[int, int], Pattern[str]]) -> str:
+  # the alternation chooses the first segment which matches at the position of the match; it is determined via binary search
+  string, pos = match.string, match.start()
+  start, end = 0, len(segments)
+  while end - start > 1:
+    mid = (start + end) // 2
+    if left_patterns[(start, end)].match(string, pos) is None:
+      start = mid
+    else:
+      end = mid
+  pattern, replacement = segments[start]
+  segment_match = pattern.match(string, pos)
+  assert segment_match is not None
+  if isinstance(replacement, dict):
+    return replacement[segment_match.group()]
+  if "\\" not in replacement:
+    return replacement
+  return segment_match.expand(replacement)
+
+
+def apply_replacement_rules(text: str, batches: List[RuleBatch]) -> str:
+  for pattern, replacement in batches:
+    text = pattern.sub(replacement, text)
+  return text
+
+
+def is_line_bounded(pattern: str, line_sep: str, *, is_regex: bool = True) -> bool:
+  """Returns True if replacing line by line is proven to equal replacing the whole text."""
+  if line_sep == "":
+    raise ValueError("Separator must not be empty!")
+  if not is_regex:
+    return not any(char in pattern for char in line_sep)
+  try:
+    parsed = sre_parse.parse(pattern)
+  except re.error:
+    return False
+  if len(line_sep) > 1 and parsed.getwidth()[0] == 0:
+    # empty matches would occur between the characters of the separator
+    return False
+  flags = re.compile(pattern).flags
+  return all(
+    not can_match_char(parsed, char, flags, line_sep)
+    for char in line_sep
+  )
+
+
+def can_match_char(subpattern: Any, char: str, flags: int, line_sep: str) -> bool:
+  for op, av in subpattern:
+    op_name = op.name
+    if op_name in ("LITERAL", "NOT_LITERAL"):
+      is_same = is_same_char(chr(av), char, flags)
+      if is_same == (op_name == "LITERAL"):
+        return True
+    elif op_name == "ANY":
+      if char != "\n" or flags & re.DOTALL:
+        return True
+    elif op_name == "IN":
+      if is_in_char_set(av, char, flags):
+        return True
+    elif op_name == "BRANCH":
+      if any(can_match_char(branch, char, flags, line_sep) for branch in av[1]):
+        return True
+    elif op_name == "SUBPATTERN":
+      _, add_flags, del_flags, group_subpattern = av
+      if can_match_char(group_subpattern, char, (flags | add_flags) & ~del_flags, line_sep):
+        return True
+    elif op_name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+      if can_match_char(av[2], char, flags, line_sep):
+        return True
+    elif op_name == "ATOMIC_GROUP":
+      if can_match_char(av, char, flags, line_sep):
+        return True
+    elif op_name == "GROUPREF_EXISTS":
+      _, yes_subpattern, no_subpattern = av
+      if can_match_char(yes_subpattern, char, flags, line_sep):
+        return True
+      if no_subpattern is not None and can_match_char(no_subpattern, char, flags, line_sep):
+        return True
+    elif op_name == "GROUPREF":
+      # matches the same as the referenced group
+      continue
+    elif op_name == "AT":
+      if not is_anchor_line_bounded(av.name, flags, line_sep):
+        return True
+    else:
+      # e.g., lookarounds could look across the line separator
+      return True
+  return False
+
+
+def is_same_char(a: str, b: str, flags: int) -> bool:
+  if flags & re.IGNORECASE:
+    return a.lower() == b.lower() or a.upper() == b.upper()
+  return a == b
+
+
+def is_in_char_set(items: List[Tuple[Any, Any]], char: str, flags: int) -> bool:
+  negate = False
+  is_in = False
+  candidates = {char, char.lower(), char.upper()} if flags & re.IGNORECASE else {char}
+  for op, av in items:
+    op_name = op.name
+    if op_name == "NEGATE":
+      negate = True
+    elif op_name == "LITERAL":
+      is_in |= any(is_same_char(chr(av), candidate, flags) for candidate in candidates)
+    elif op_name == "RANGE":
+      is_in |= any(av[0] <= ord(candidate) <= av[1] for candidate in candidates)
+    elif op_name == "CATEGORY":
+      category_pattern = CATEGORY_PATTERNS.get(av.name)
+      if category_pattern is None:
+        return True
+      is_in |= re.match(category_pattern, char, flags & (re.ASCII | re.IGNORECASE)) is not None
+    else:
+      return True
+  return is_in != negate
+
+
+def is_anchor_line_bounded(anchor: str, flags: int, line_sep: str) -> bool:
+  if anchor in ("AT_BEGINNING", "AT_END"):
+    # in multiline mode, ^ and $ match at the start and end of each line
+    return bool(flags & re.MULTILINE) and line_sep == "\n"
+  if anchor in ("AT_BOUNDARY", "AT_NON_BOUNDARY"):
+    # the start and end of a line are word boundaries in the whole text, too, if the separator doesn't contain word characters
+    return all(re.match(r"\w", char, flags & re.ASCII) is None for char in line_sep)
+  return False
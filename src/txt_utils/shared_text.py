@@ -0,0 +1,140 @@
+import codecs
+import mmap
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Generator, Iterator, Optional, Tuple, Union
+
+from txt_utils.compression import is_compressed, read_text
+
+TextRange = Tuple[int, int]
+# (name of the shared memory or path of the file, length in bytes, encoding, translate newlines)
+SharedTextSource = Tuple[str, int, str, bool]
+
+SHARED_MEMORY_ENCODING = "utf-8"
+
+# Encodings in which the encoded line separator can't occur inside of the encoding of another character
+MAPPABLE_ENCODINGS = {"utf-8", "ascii", "iso8859-1"}
+
+
+def can_map_file(encoding: str, line_sep: str) -> bool:
+  # "\r" is never part of a line read in text mode because of the newline translation
+  return codecs.lookup(encoding).name in MAPPABLE_ENCODINGS and "\r" not in line_sep
+
+
+def iter_text_ranges(buffer: Union[bytes, mmap.mmap], length: int, line_sep: bytes, chunksize: int, *, start: int = 0) -> Generator[TextRange, None, None]:
+  if line_sep == b"":
+    raise ValueError("Separator must not be empty!")
+  if chunksize <= 0:
+    raise ValueError("Chunk size needs to be greater than zero!")
+  sep_len = len(line_sep)
+  pos = start
+  line_count = 0
+  while True:
+    pos = buffer.find(line_sep, pos, length)
+    if pos == -1:
+      break
+    line_count += 1
+    if line_count == chunksize:
+      yield start, pos - start
+      start = pos + sep_len
+      line_count = 0
+    pos += sep_len
+  yield start, length - start
+
+
+@contextmanager
+def share_text(content: str, line_sep: str, chunksize: int) -> Generator[Tuple[SharedTextSource, Iterator[TextRange]], None, None]:
+  data = content.encode(SHARED_MEMORY_ENCODING)
+  length = len(data)
+  ranges = list(iter_text_ranges(data, length, line_sep.encode(SHARED_MEMORY_ENCODING), chunksize))
+  shm = SharedMemory(create=True, size=max(1, length))
+  try:
+    shm.buf[:length] = data
+    del data
+    yield (shm.name, length, SHARED_MEMORY_ENCODING, False), iter(ranges)
+  finally:
+    shm.close()
+    shm.unlink()
+
+
+@contextmanager
+def map_file(path: Path, encoding: str, line_sep: str, chunksize: int, *, start: int = 0, end: Optional[int] = None) -> Generator[Tuple[SharedTextSource, Iterator[TextRange]], None, None]:
+  assert can_map_file(encoding, line_sep)
+  with path.open(mode="rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    length = len(mm)
+    ranges = iter_text_ranges(mm, length if end is None else end, line_sep.encode(encoding), chunksize, start=start)
+    if line_sep.startswith("\n"):
+      ranges = exclude_carriage_returns(mm, ranges)
+    # same newline translation as in Path.read_text()
+    yield (str(path.absolute()), length, encoding, True), ranges
+
+
+@contextmanager
+def share_file(path: Path, encoding: str, line_sep: str, chunksize: int) -> Generator[Tuple[SharedTextSource, Iterator[TextRange]], None, None]:
+  if can_map_file(encoding, line_sep) and path.stat().st_size > 0 and not is_compressed(path):
+    with map_file(path, encoding, line_sep, chunksize) as result:
+      yield result
+  else:
+    content = read_text(path, encoding)
+    with share_text(content, line_sep, chunksize) as result:
+      del content
+      yield result
+
+
+def exclude_carriage_returns(buffer: mmap.mmap, ranges: Iterator[TextRange]) -> Generator[TextRange, None, None]:
+  for offset, length in ranges:
+    if length > 0 and buffer[offset + length - 1] == ord("\r") and offset + length < len(buffer):
+      length -= 1
+    yield offset, length
+
+
+process_buffer: Optional[memoryview] = None
+process_encoding: Optional[str] = None
+process_translate_newlines: bool = False
+process_handles: Tuple = ()
+
+
+def attach_shared_text(source: SharedTextSource) -> None:
+  global process_buffer
+  global process_encoding
+  global process_translate_newlines
+  global process_handles
+  name, length, encoding, translate_newlines = source
+  if translate_newlines:
+    with open(name, mode="rb") as file:
+      mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    process_handles = (mm,)
+    process_buffer = memoryview(mm)[:length]
+  else:
+    shm = SharedMemory(name=name)
+    process_handles = (shm,)
+    process_buffer = shm.buf[:length]
+  process_encoding = encoding
+  process_translate_newlines = translate_newlines
+
+
+def read_text_range(text_range: TextRange) -> str:
+  assert process_buffer is not None
+  assert process_encoding is not None
+  offset, length = text_range
+  text = str(process_buffer[offset:offset + length], process_encoding)
+  if process_translate_newlines and "\r" in text:
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+  return text
+
+
+def read_bytes_range(text_range: TextRange) -> Optional[memoryview]:
+  """Returns None if the range contains newlines that would need to be translated."""
+  assert process_buffer is not None
+  offset, length = text_range
+  if process_translate_newlines:
+    mm = process_handles[0]
+    if mm.find(b"\r", offset, offset + length) != -1:
+      return None
+  return process_buffer[offset:offset + length]
+
+
+def get_process_encoding() -> str:
+  assert process_encoding is not None
+  return process_encoding
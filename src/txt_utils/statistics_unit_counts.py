@@ -1,27 +1,246 @@
+import csv
+import heapq
+import os
 import typing
 from collections import Counter
+from functools import partial
+from itertools import chain, islice
 from logging import getLogger
+from multiprocessing import Pool
+from operator import itemgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, Generator, Iterable, Iterator, List, Optional, TextIO, Tuple
 
-from pandas import DataFrame
 from tqdm import tqdm
 
-from txt_utils.helper import split_adv
+from txt_utils.byte_counting import can_count_bytes, count_byte_units, count_byte_units_in_file
+from txt_utils.compression import is_compressed, open_file
+from txt_utils.file_pool import init_nothing
+from txt_utils.helper import imap_ordered, iter_chunks, split_adv
+from txt_utils.profiling import get_worker_initializer
+from txt_utils.shared_text import (SHARED_MEMORY_ENCODING, SharedTextSource, TextRange,
+                                   attach_shared_text, get_process_encoding, read_bytes_range,
+                                   read_text_range, share_file, share_text)
+from txt_utils.streaming import iter_split, read_lines
+from txt_utils.unit_count_sketch import DEFAULT_DELTA, DEFAULT_EPSILON, ApproximateUnitCounts
 
+if TYPE_CHECKING:
+  from pandas import DataFrame
 
-def get_unit_count_statistics(content: str, *, line_sep: str = "\n", word_sep: str = " ", silent: bool = False) -> DataFrame:
+CSV_COLUMNS = ("# Occurrences", "Unit")
+
+
+def get_unit_count_statistics(content: str, *, line_sep: str = "\n", word_sep: str = " ", n_jobs: int = 1, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000, silent: bool = False) -> "DataFrame":
+  if n_jobs == 1 and can_count_bytes(SHARED_MEMORY_ENCODING, line_sep, word_sep):
+    total_counter = count_byte_units(content.encode(SHARED_MEMORY_ENCODING),
+                                     SHARED_MEMORY_ENCODING, line_sep, word_sep)
+  elif n_jobs == 1:
+    lines = iter_split(content, line_sep)
+    total_counter = get_unit_counts(lines, word_sep=word_sep, silent=silent)
+  else:
+    with share_text(content, line_sep, chunksize) as (source, ranges):
+      del content
+      total_counter = get_unit_counts_from_shared_text(
+        source, ranges, line_sep=line_sep, word_sep=word_sep,
+        n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, silent=silent,
+      )
+  df = get_unit_count_statistics_from_counts(total_counter)
+  return df
+
+
+def get_unit_counts(lines: Iterable[str], *, word_sep: str = " ", n_jobs: int = 1, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000, silent: bool = False) -> typing.Counter[str]:
+  total_counter: typing.Counter[str] = Counter()
+  if n_jobs == 1:
+    for line in tqdm(lines, desc="Calculating counts", unit=" line(s)", disable=silent):
+      total_counter.update(split_adv(line, word_sep))
+    return total_counter
+
+  chunk_counters = iter_unit_counts_of_lines(lines, word_sep=word_sep, n_jobs=n_jobs,
+                                             maxtasksperchild=maxtasksperchild, chunksize=chunksize, silent=silent)
+  for chunk_counter in chunk_counters:
+    total_counter = merge_counters(total_counter, chunk_counter)
+  return total_counter
+
+
+def get_unit_counts_from_file(path: Path, encoding: str, *, line_sep: str = "\n", word_sep: str = " ", n_jobs: int = 1, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000, silent: bool = False) -> typing.Counter[str]:
+  if n_jobs == 1:
+    if can_count_bytes(encoding, line_sep, word_sep):
+      result = count_byte_units_in_file(path, encoding, line_sep, word_sep)
+      if result is not None:
+        return result
+    lines = read_lines(path, line_sep, encoding)
+    return get_unit_counts(lines, word_sep=word_sep, silent=silent)
+
+  if is_compressed(path):
+    lines = read_lines(path, line_sep, encoding)
+    return get_unit_counts(lines, word_sep=word_sep, n_jobs=n_jobs, maxtasksperchild=maxtasksperchild,
+                           chunksize=chunksize, silent=silent)
+
+  with share_file(path, encoding, line_sep, chunksize) as (source, ranges):
+    result = get_unit_counts_from_shared_text(
+      source, ranges, line_sep=line_sep, word_sep=word_sep,
+      n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, silent=silent,
+    )
+  return result
+
+
+def get_unit_counts_from_shared_text(source: SharedTextSource, ranges: Iterator[TextRange], *, line_sep: str, word_sep: str, n_jobs: int, maxtasksperchild: Optional[int], silent: bool) -> typing.Counter[str]:
   logger = getLogger(__name__)
-  logger.info("Splitting lines...")
-  lines = content.split(line_sep)
-  # del content
+
+  logger.debug(f"Maxtask: {maxtasksperchild}")
+  logger.debug(f"Jobs: {n_jobs}")
+
+  first_ranges = list(islice(ranges, n_jobs))
+  n_jobs = min(n_jobs, len(first_ranges))
+  logger.debug(f"Jobs (final): {n_jobs}")
+
+  _, _, encoding, _ = source
+  count_bytes = can_count_bytes(encoding, line_sep, word_sep)
+  logger.debug(f"Count bytes: {count_bytes}")
+
+  method_proxy = partial(
+    get_unit_counts_process,
+    lsep=line_sep,
+    wsep=word_sep,
+    count_bytes=count_bytes,
+  )
 
   total_counter: typing.Counter[str] = Counter()
-  for line in tqdm(lines, desc="Calculating counts", unit=" line(s)", disable=silent):
-    total_counter.update(split_adv(line, word_sep))
+  with Pool(
+    processes=n_jobs,
+    initializer=get_worker_initializer(attach_shared_text),
+    initargs=(source,),
+    maxtasksperchild=maxtasksperchild,
+  ) as pool:
+    iterator = tqdm(pool.imap_unordered(method_proxy, chain(first_ranges, ranges), chunksize=1), desc="Calculating counts",
+                    unit=" chunk(s)", disable=silent)
+    for chunk_counter in iterator:
+      total_counter = merge_counters(total_counter, chunk_counter)
+  return total_counter
 
-  logger.debug("Creating csv...")
-  columns = ["# Occurrences", "Unit"]
-  df = DataFrame([(v, k) for k, v in total_counter.items()], columns=columns)
 
-  logger.debug("Sorting csv...")
-  df.sort_values(["# Occurrences", "Unit"], ascending=[False, True], inplace=True, ignore_index=True)
+def merge_counters(counter1: typing.Counter[str], counter2: typing.Counter[str]) -> typing.Counter[str]:
+  """Adds the smaller counter to the larger one and returns the larger one."""
+  if len(counter1) < len(counter2):
+    counter1, counter2 = counter2, counter1
+  counter1.update(counter2)
+  return counter1
+
+
+def get_unit_counts_process(text_range: TextRange, lsep: str, wsep: str, count_bytes: bool = False) -> typing.Counter[str]:
+  if count_bytes:
+    buffer = read_bytes_range(text_range)
+    if buffer is not None:
+      return count_byte_units(buffer, get_process_encoding(), lsep, wsep)
+  lines = read_text_range(text_range).split(lsep)
+  return get_unit_counts(lines, word_sep=wsep, silent=True)
+
+
+def get_sorted_unit_counts(total_counter: typing.Counter[str], *, top_k: Optional[int] = None, min_count: Optional[int] = None) -> List[Tuple[int, str]]:
+  """Returns (count, unit) pairs sorted descending by count and ascending by unit."""
+  logger = getLogger(__name__)
+  logger.debug("Sorting counts...")
+  items: Iterable[Tuple[str, int]] = total_counter.items()
+  if min_count is not None:
+    items = ((k, v) for k, v in items if v >= min_count)
+  if top_k is not None:
+    # only the top pairs are sorted
+    return [(v, k) for k, v in heapq.nsmallest(top_k, items, key=get_sort_key)]
+  result = [(v, k) for k, v in items]
+  # the second sort is stable, i.e., units with the same count stay sorted
+  result.sort(key=itemgetter(1))
+  result.sort(key=itemgetter(0), reverse=True)
+  return result
+
+
+def get_sort_key(item: Tuple[str, int]) -> Tuple[int, str]:
+  unit, count = item
+  return -count, unit
+
+
+def get_approximate_unit_counts_from_file(path: Path, encoding: str, *, line_sep: str = "\n", word_sep: str = " ", epsilon: float = DEFAULT_EPSILON, delta: float = DEFAULT_DELTA, capacity: Optional[int] = None, approximate_counts: Optional[ApproximateUnitCounts] = None, n_jobs: int = 1, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000, silent: bool = False) -> ApproximateUnitCounts:
+  if approximate_counts is None:
+    approximate_counts = ApproximateUnitCounts(epsilon, delta, capacity)
+  if n_jobs == 1 or is_compressed(path):
+    chunk_counters = iter_unit_counts_of_lines(
+      read_lines(path, line_sep, encoding), word_sep=word_sep, n_jobs=n_jobs,
+      maxtasksperchild=maxtasksperchild, chunksize=chunksize, silent=silent,
+    )
+    for chunk_counter in chunk_counters:
+      approximate_counts.update(chunk_counter)
+    return approximate_counts
+
+  with share_file(path, encoding, line_sep, chunksize) as (source, ranges):
+    chunk_counters = iter_unit_counts_from_shared_text(
+      source, ranges, line_sep=line_sep, word_sep=word_sep,
+      n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, silent=silent,
+    )
+    for chunk_counter in chunk_counters:
+      approximate_counts.update(chunk_counter)
+  return approximate_counts
+
+
+def iter_unit_counts_of_lines(lines: Iterable[str], *, word_sep: str, n_jobs: int, maxtasksperchild: Optional[int], chunksize: int, silent: bool) -> Generator[typing.Counter[str], None, None]:
+  remaining_chunks = iter_chunks(lines, chunksize)
+  first_chunks = list(islice(remaining_chunks, n_jobs))
+  n_jobs = len(first_chunks)
+  chunks = chain(first_chunks, remaining_chunks)
+  if n_jobs <= 1:
+    for chunk in tqdm(chunks, desc="Calculating counts", unit=" chunk(s)", disable=silent):
+      yield get_unit_counts(chunk, word_sep=word_sep, silent=True)
+    return
+
+  method_proxy = partial(get_unit_counts, word_sep=word_sep, silent=True)
+  with Pool(
+    processes=n_jobs,
+    initializer=get_worker_initializer(init_nothing),
+    maxtasksperchild=maxtasksperchild,
+  ) as pool:
+    iterator = tqdm(imap_ordered(pool, method_proxy, chunks, 2 * n_jobs),
+                    desc="Calculating counts", unit=" chunk(s)", disable=silent)
+    for _, chunk_counter in iterator:
+      yield chunk_counter
+
+
+def iter_unit_counts_from_shared_text(source: SharedTextSource, ranges: Iterator[TextRange], *, line_sep: str, word_sep: str, n_jobs: int, maxtasksperchild: Optional[int], silent: bool) -> Generator[typing.Counter[str], None, None]:
+  _, _, encoding, _ = source
+  method_proxy = partial(
+    get_unit_counts_process,
+    lsep=line_sep,
+    wsep=word_sep,
+    count_bytes=can_count_bytes(encoding, line_sep, word_sep),
+  )
+  first_ranges = list(islice(ranges, n_jobs))
+  n_jobs = max(1, len(first_ranges))
+  with Pool(
+    processes=n_jobs,
+    initializer=get_worker_initializer(attach_shared_text),
+    initargs=(source,),
+    maxtasksperchild=maxtasksperchild,
+  ) as pool:
+    iterator = tqdm(imap_ordered(pool, method_proxy, chain(first_ranges, ranges), 2 * n_jobs), desc="Calculating counts",
+                    unit=" chunk(s)", disable=silent)
+    for _, chunk_counter in iterator:
+      yield chunk_counter
+
+
+def write_unit_counts_csv(path: Path, counts: Iterable[Tuple[int, str]], encoding: str) -> None:
+  path.parent.mkdir(parents=True, exist_ok=True)
+  with open_file(path, "w", encoding, newline="") as stream:
+    write_unit_counts_csv_to_stream(stream, counts)
+
+
+def write_unit_counts_csv_to_stream(stream: TextIO, counts: Iterable[Tuple[int, str]]) -> None:
+  """The stream needs to be opened with `newline=""`."""
+  writer = csv.writer(stream, delimiter=";", lineterminator=os.linesep)
+  writer.writerow(CSV_COLUMNS)
+  writer.writerows(counts)
+
+
+def get_unit_count_statistics_from_counts(total_counter: typing.Counter[str]) -> "DataFrame":
+  from pandas import DataFrame
+
+  logger = getLogger(__name__)
+  logger.debug("Creating csv...")
+  df = DataFrame(get_sorted_unit_counts(total_counter), columns=list(CSV_COLUMNS))
   return df
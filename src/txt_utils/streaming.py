@@ -0,0 +1,289 @@
+import io
+import os
+import sys
+from contextlib import contextmanager
+from functools import partial
+from itertools import chain, islice
+from multiprocessing import Pool
+from pathlib import Path
+from shutil import copymode
+from tempfile import mkstemp
+from typing import Callable, Generator, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from tqdm import tqdm
+
+from txt_utils.compression import DETECT, get_compression, open_file
+from txt_utils.helper import imap_ordered, iter_chunks
+from txt_utils.instrumentation import add_stage_items
+from txt_utils.profiling import get_worker_initializer
+from txt_utils.shared_text import (SharedTextSource, TextRange, attach_shared_text, read_text_range,
+                                   share_file)
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+def iter_split(s: str, sep: str) -> Generator[str, None, None]:
+  if sep == "":
+    raise ValueError("Separator must not be empty!")
+  start = 0
+  sep_len = len(sep)
+  while True:
+    end = s.find(sep, start)
+    if end == -1:
+      break
+    yield s[start:end]
+    start = end + sep_len
+  yield s[start:]
+
+
+def iter_split_stream(stream: TextIO, sep: str, *, buffer_size: int = DEFAULT_BUFFER_SIZE) -> Generator[str, None, None]:
+  if sep == "":
+    raise ValueError("Separator must not be empty!")
+  if buffer_size <= 0:
+    raise ValueError("Buffer size needs to be greater than zero!")
+
+  # a separator can start at most len(sep) - 1 characters before the end of the unfinished part
+  tail_len = len(sep) - 1
+  unfinished: List[str] = []
+  tail = ""
+  while True:
+    block = stream.read(buffer_size)
+    if block == "":
+      break
+    parts = (tail + block).split(sep)
+    if len(parts) == 1:
+      unfinished.append(block)
+      if tail_len > 0:
+        tail = (tail + block)[-tail_len:]
+      continue
+    # parts[0] starts with the tail which is already contained in unfinished
+    head = "".join(unfinished)
+    yield head[:len(head) - len(tail)] + parts[0]
+    del head
+    yield from parts[1:-1]
+    last_part = parts[-1]
+    del parts
+    unfinished = [last_part]
+    tail = last_part[-tail_len:] if tail_len > 0 else ""
+  yield "".join(unfinished)
+
+
+def read_lines(path: Path, line_sep: str, encoding: str, *, buffer_size: int = DEFAULT_BUFFER_SIZE) -> Generator[str, None, None]:
+  with open_file(path, encoding=encoding) as stream:
+    yield from iter_split_stream(stream, line_sep, buffer_size=buffer_size)
+
+
+def write_lines(stream: TextIO, lines: Iterable[str], line_sep: str) -> int:
+  count = 0
+  for line in lines:
+    if count > 0:
+      stream.write(line_sep)
+    stream.write(line)
+    count += 1
+  return count
+
+
+def get_temp_path(path: Path) -> Path:
+  path.parent.mkdir(parents=True, exist_ok=True)
+  fd, tmp_path = mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+  os.close(fd)
+  return Path(tmp_path)
+
+
+def replace_file(tmp_path: Path, path: Path) -> None:
+  if path.is_file():
+    copymode(path, tmp_path)
+  os.replace(tmp_path, path)
+
+
+def write_lines_atomically(path: Path, lines: Iterable[str], line_sep: str, encoding: str, *, compression: Optional[str] = DETECT) -> int:
+  if compression == DETECT:
+    compression = get_compression(path)
+  tmp_path = get_temp_path(path)
+  try:
+    with open_file(tmp_path, "w", encoding, compression=compression) as stream:
+      count = write_lines(stream, lines, line_sep)
+    replace_file(tmp_path, path)
+  finally:
+    if tmp_path.exists():
+      tmp_path.unlink()
+  return count
+
+
+def map_lines_in_file(path: Path, method: Callable[[str], str], *, line_sep: str, encoding: str, desc: str = "Processing", silent: bool = False, buffer_size: int = DEFAULT_BUFFER_SIZE, n_jobs: int = 1, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000) -> int:
+  """Applies `method` to each line and returns the amount of changed lines."""
+  compression = get_compression(path)
+  tmp_path = get_temp_path(path)
+  changed_count = 0
+  line_count = 0
+  try:
+    with open_file(path, encoding=encoding, compression=compression) as in_stream, \
+        open_file(tmp_path, "w", encoding, compression=compression) as out_stream:
+      lines = iter_split_stream(in_stream, line_sep, buffer_size=buffer_size)
+      if n_jobs == 1:
+        new_lines = map_lines(lines, method, desc=desc, silent=silent)
+      elif compression is not None:
+        new_lines = map_lines_chunked(lines, method, desc=desc, silent=silent, n_jobs=n_jobs,
+                                      maxtasksperchild=maxtasksperchild, chunksize=chunksize)
+      else:
+        new_lines = map_lines_parallel(path, lines, method, line_sep=line_sep, encoding=encoding, desc=desc,
+                                       silent=silent, n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, chunksize=chunksize)
+      line_count, changed_count = write_mapped_lines(out_stream, new_lines, line_sep)
+    add_stage_items(line_count)
+    if changed_count > 0:
+      replace_file(tmp_path, path)
+  finally:
+    if tmp_path.exists():
+      tmp_path.unlink()
+  return changed_count
+
+
+def map_lines_in_stream(in_stream: TextIO, out_stream: TextIO, method: Callable[[str], str], *, line_sep: str, desc: str = "Processing", silent: bool = False, buffer_size: int = DEFAULT_BUFFER_SIZE, n_jobs: int = 1, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000) -> int:
+  lines = iter_split_stream(in_stream, line_sep, buffer_size=buffer_size)
+  if n_jobs == 1:
+    new_lines = map_lines(lines, method, desc=desc, silent=silent)
+  else:
+    new_lines = map_lines_chunked(lines, method, desc=desc, silent=silent, n_jobs=n_jobs,
+                                  maxtasksperchild=maxtasksperchild, chunksize=chunksize)
+  line_count, changed_count = write_mapped_lines(out_stream, new_lines, line_sep)
+  add_stage_items(line_count)
+  return changed_count
+
+
+def write_mapped_lines(stream: TextIO, new_lines: Iterable[Tuple[str, bool]], line_sep: str) -> Tuple[int, int]:
+  line_count = 0
+  changed_count = 0
+  for line_count, (new_line, changed) in enumerate(new_lines, start=1):
+    if changed:
+      changed_count += 1
+    if line_count > 1:
+      stream.write(line_sep)
+    stream.write(new_line)
+  return line_count, changed_count
+
+
+@contextmanager
+def open_stdin(encoding: str) -> Generator[TextIO, None, None]:
+  stream = io.TextIOWrapper(sys.stdin.buffer, encoding=encoding)
+  try:
+    yield stream
+  finally:
+    # the standard input stays open
+    stream.detach()
+
+
+@contextmanager
+def open_stdout(encoding: str, newline: Optional[str] = None) -> Generator[TextIO, None, None]:
+  sys.stdout.flush()
+  stream = io.TextIOWrapper(sys.stdout.buffer, encoding=encoding, newline=newline)
+  try:
+    yield stream
+    stream.flush()
+  except BrokenPipeError:
+    # the reader was closed, e.g., `head`; the remaining output is discarded so that it isn't flushed again at exit
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    os.close(devnull)
+    raise
+  finally:
+    stream.detach()
+
+
+def map_lines(lines: Iterable[str], method: Callable[[str], str], *, desc: str, silent: bool) -> Generator[Tuple[str, bool], None, None]:
+  for line in tqdm(lines, desc=desc, unit=" line(s)", disable=silent):
+    new_line = method(line)
+    yield new_line, new_line != line
+
+
+def map_lines_parallel(path: Path, lines: Iterator[str], method: Callable[[str], str], *, line_sep: str, encoding: str, desc: str, silent: bool, n_jobs: int, maxtasksperchild: Optional[int], chunksize: int) -> Generator[Tuple[str, bool], None, None]:
+  with share_file(path, encoding, line_sep, chunksize) as (source, ranges):
+    first_ranges = list(islice(ranges, n_jobs))
+    if len(first_ranges) <= 1:
+      yield from map_lines(lines, method, desc=desc, silent=silent)
+      return
+    n_jobs = len(first_ranges)
+    with Pool(
+      processes=n_jobs,
+      initializer=get_worker_initializer(__init_pool),
+      initargs=(source, method),
+      maxtasksperchild=maxtasksperchild,
+    ) as pool:
+      method_proxy = partial(
+        get_changed_lines_process,
+        line_sep=line_sep,
+      )
+      iterator = tqdm(imap_ordered(pool, method_proxy, chain(first_ranges, ranges), 2 * n_jobs),
+                      desc=desc, unit=" chunk(s)", disable=silent)
+      for _, (line_count, changes) in iterator:
+        # a chunk can contain more than `chunksize` lines because of the newline translation
+        chunk_changes = dict(changes)
+        for line_nr, line in enumerate(islice(lines, line_count)):
+          new_line = chunk_changes.get(line_nr)
+          if new_line is None:
+            yield line, False
+          else:
+            yield new_line, True
+        del chunk_changes, changes
+
+
+def map_lines_chunked(lines: Iterable[str], method: Callable[[str], str], *, desc: str, silent: bool, n_jobs: int, maxtasksperchild: Optional[int], chunksize: int) -> Generator[Tuple[str, bool], None, None]:
+  chunks = iter_chunks(lines, chunksize)
+  first_chunks = list(islice(chunks, n_jobs))
+  if len(first_chunks) <= 1:
+    yield from map_lines(chain.from_iterable(first_chunks), method, desc=desc, silent=silent)
+    return
+  n_jobs = len(first_chunks)
+  with Pool(
+    processes=n_jobs,
+    initializer=get_worker_initializer(__init_method_pool),
+    initargs=(method,),
+    maxtasksperchild=maxtasksperchild,
+  ) as pool:
+    all_chunks = chain(first_chunks, chunks)
+    del first_chunks
+    iterator = tqdm(imap_ordered(pool, get_changed_lines_of_chunk_process, all_chunks, 2 * n_jobs),
+                    desc=desc, unit=" chunk(s)", disable=silent)
+    for chunk, changes in iterator:
+      chunk_changes = dict(changes)
+      for line_nr, line in enumerate(chunk):
+        new_line = chunk_changes.get(line_nr)
+        if new_line is None:
+          yield line, False
+        else:
+          yield new_line, True
+      del chunk, chunk_changes, changes
+
+
+process_method: Optional[Callable[[str], str]] = None
+
+
+def get_changed_lines_process(text_range: TextRange, line_sep: str) -> Tuple[int, List[Tuple[int, str]]]:
+  assert process_method is not None
+  lines = read_text_range(text_range).split(line_sep)
+  changes = []
+  for line_nr, line in enumerate(lines):
+    new_line = process_method(line)
+    if new_line != line:
+      changes.append((line_nr, new_line))
+  return len(lines), changes
+
+
+def get_changed_lines_of_chunk_process(lines: List[str]) -> List[Tuple[int, str]]:
+  assert process_method is not None
+  changes = []
+  for line_nr, line in enumerate(lines):
+    new_line = process_method(line)
+    if new_line != line:
+      changes.append((line_nr, new_line))
+  return changes
+
+
+def __init_pool(source: SharedTextSource, method: Callable[[str], str]) -> None:
+  global process_method
+  attach_shared_text(source)
+  process_method = method
+
+
+def __init_method_pool(method: Callable[[str], str]) -> None:
+  global process_method
+  process_method = method
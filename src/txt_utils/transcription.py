@@ -1,35 +1,63 @@
 from functools import partial
+from itertools import chain, islice
 from logging import getLogger
 from multiprocessing import Pool
-from typing import List, Optional, Tuple
+from pathlib import Path
+from typing import Dict, Generator, Iterable, List, Mapping, Optional, Sequence, Tuple, cast
 
-from pronunciation_dictionary import PronunciationDict, get_weighted_pronunciation
+from ordered_set import OrderedSet
+from pronunciation_dictionary import PronunciationDict, Pronunciations, get_weighted_pronunciation
 from tqdm import tqdm
 
+from txt_utils.compact_dictionary import CompactDictSource, attach_compact_dict, share_compact_dict
+from txt_utils.file_pool import FileResult, process_files
+from txt_utils.helper import imap_ordered, iter_chunks
+from txt_utils.profiling import get_worker_initializer
+from txt_utils.streaming import iter_split, read_lines, write_lines_atomically
+from txt_utils.vocabulary_exporting import extract_vocabulary_from_text
+
+DEFAULT_CACHE_SIZE = 100_000
+NOT_CACHED = object()
+
+
+def transcribe_text_using_dict(content: str, pronunciation_dictionary: PronunciationDict, *, line_sep: str = "\n", word_sep: str = " ", phoneme_sep: str = "|", seed: Optional[int] = None, ignore_missing: bool = False, n_jobs: int = 4, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000, vocabulary_first: bool = False, silent: bool = False) -> str:
+  vocabulary: Optional[OrderedSet[str]] = None
+  if vocabulary_first:
+    vocabulary = extract_vocabulary_from_text(
+      content, line_sep=line_sep, word_sep=word_sep, include_empty=True,
+      n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, chunksize=chunksize, silent=silent,
+    )
+
+  lines = iter_split(content, line_sep)
+  new_lines = transcribe_lines_using_dict(
+    lines, pronunciation_dictionary,
+    word_sep=word_sep, phoneme_sep=phoneme_sep, seed=seed, ignore_missing=ignore_missing,
+    n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, chunksize=chunksize, vocabulary=vocabulary, silent=silent,
+  )
+  new_content = line_sep.join(new_lines)
+  return new_content
 
-def transcribe_text_using_dict(content: str, pronunciation_dictionary: PronunciationDict, *, line_sep: str = "\n", word_sep: str = " ", phoneme_sep: str = "|", seed: Optional[int] = None, ignore_missing: bool = False, n_jobs: int = 4, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000, silent: bool = False) -> str:
-  logger = getLogger(__name__)
 
-  logger.info("Splitting lines...")
-  lines = content.split(line_sep)
-  # TODO maybe move it out and use lines as arg to be able to delete it
-  del content
+def transcribe_lines_using_dict(lines: Iterable[str], pronunciation_dictionary: Mapping[str, Pronunciations], *, word_sep: str = " ", phoneme_sep: str = "|", seed: Optional[int] = None, ignore_missing: bool = False, n_jobs: int = 4, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000, reorder_window: Optional[int] = None, cache_size: int = DEFAULT_CACHE_SIZE, vocabulary: Optional[Iterable[str]] = None, silent: bool = False) -> Generator[str, None, None]:
+  """Yields the transcribed lines in their original order."""
+  logger = getLogger(__name__)
 
-  logger.debug(f"Lines: {len(lines)}")
   logger.debug(f"Chunksize: {chunksize}")
   logger.debug(f"Maxtask: {maxtasksperchild}")
   logger.debug(f"Jobs: {n_jobs}")
 
-  chunks = get_chunks(lines, chunksize)
-  # chunks = chunks[:1]
-  del lines
+  chunks = iter_chunks(lines, chunksize)
+  first_chunks = list(islice(chunks, n_jobs))
+  if len(first_chunks) == 0:
+    return
 
-  logger.debug(f"Chunks: {len(chunks)}")
-
-  amount_of_jobs_required = len(chunks)
-  n_jobs = min(n_jobs, amount_of_jobs_required)
+  n_jobs = min(n_jobs, len(first_chunks))
   logger.debug(f"Jobs (final): {n_jobs}")
 
+  if reorder_window is None:
+    reorder_window = 2 * n_jobs
+  logger.debug(f"Reorder window: {reorder_window}")
+
   method_proxy = partial(
     get_vocab_process,
     wsep=word_sep,
@@ -38,63 +66,128 @@ def transcribe_text_using_dict(content: str, pronunciation_dictionary: Pronuncia
     psep=phoneme_sep,
   )
 
-  with Pool(
+  all_chunks = chain(first_chunks, chunks)
+  del first_chunks
+
+  lookup_table: Dict[str, Optional[str]] = {}
+  if vocabulary is not None:
+    logger.info("Resolving vocabulary...")
+    pronunciation_dictionary, lookup_table = resolve_vocabulary(
+      vocabulary, pronunciation_dictionary, seed, phoneme_sep)
+    logger.debug(f"Resolved words: {len(lookup_table)}")
+    logger.debug(f"Words with multiple pronunciations: {len(pronunciation_dictionary)}")
+
+  logger.debug("Sharing dictionary...")
+  with share_compact_dict(pronunciation_dictionary) as dict_source, Pool(
     processes=n_jobs,
-    initializer=__init_pool,
-    initargs=(chunks, pronunciation_dictionary),
+    initializer=get_worker_initializer(__init_pool),
+    initargs=(dict_source, cache_size, lookup_table),
     maxtasksperchild=maxtasksperchild,
   ) as pool:
-    iterator = tqdm(pool.imap_unordered(method_proxy, range(len(chunks)), chunksize=1), total=len(chunks), desc="Processing",
+    iterator = tqdm(imap_ordered(pool, method_proxy, all_chunks, reorder_window), desc="Processing",
                     unit=" chunk(s)", disable=silent)
-    result = dict(iterator)
+    cache_hits = 0
+    cache_misses = 0
+    for chunk, (new_chunk, chunk_cache_hits, chunk_cache_misses) in iterator:
+      for line, new_line in zip(chunk, new_chunk):
+        yield line if new_line is None else new_line
+      del chunk, new_chunk
+      cache_hits += chunk_cache_hits
+      cache_misses += chunk_cache_misses
 
-  logger.info("Rejoining lines...")
-  new_lines = (
-    line if line is not None else chunks[chunk_nr][line_i]
-    for chunk_nr in range(len(chunks))
-    for line_i, line in enumerate(result[chunk_nr])
+  logger.debug(f"Pronunciation cache: {cache_hits} hit(s), {cache_misses} miss(es)")
+
+
+def transcribe_files_using_dict(paths: Sequence[Path], pronunciation_dictionary: Mapping[str, Pronunciations], encoding: str, *, line_sep: str = "\n", word_sep: str = " ", phoneme_sep: str = "|", seed: Optional[int] = None, ignore_missing: bool = False, n_jobs: int = 4, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000, cache_size: int = DEFAULT_CACHE_SIZE, vocabulary: Optional[Iterable[str]] = None, silent: bool = False) -> Generator[FileResult[int], None, None]:
+  """Transcribes each file in place and yields the amount of lines of each file."""
+  logger = getLogger(__name__)
+  lookup_table: Dict[str, Optional[str]] = {}
+  if vocabulary is not None:
+    logger.info("Resolving vocabulary...")
+    pronunciation_dictionary, lookup_table = resolve_vocabulary(
+      vocabulary, pronunciation_dictionary, seed, phoneme_sep)
+    logger.debug(f"Resolved words: {len(lookup_table)}")
+    logger.debug(f"Words with multiple pronunciations: {len(pronunciation_dictionary)}")
+
+  method_proxy = partial(
+    transcribe_file_process,
+    encoding=encoding,
+    lsep=line_sep,
+    wsep=word_sep,
+    seed=seed,
+    ignore_missing=ignore_missing,
+    psep=phoneme_sep,
+    chunksize=chunksize,
   )
-  new_content = line_sep.join(new_lines)
-  del chunks
-  del result
-  return new_content
+
+  logger.debug("Sharing dictionary...")
+  with share_compact_dict(pronunciation_dictionary) as dict_source:
+    yield from process_files(
+      paths, method_proxy, n_jobs=n_jobs, maxtasksperchild=maxtasksperchild,
+      initializer=__init_pool, initargs=(dict_source, cache_size, lookup_table), desc="Transcribing", silent=silent,
+    )
+
+
+class PronunciationCache():
+  """Caches joined pronunciations of words with one pronunciation and of missing words."""
+
+  def __init__(self, max_size: int) -> None:
+    self.max_size = max_size
+    self.entries: Dict[str, Optional[str]] = {}
+    self.hits = 0
+    self.misses = 0
 
 
-def get_chunks(keys: List[str], chunk_size: Optional[int]) -> List[List[str]]:
-  if chunk_size is None:
-    chunk_size = len(keys)
-  chunked_list = list(keys[i: i + chunk_size] for i in range(0, len(keys), chunk_size))
-  return chunked_list
+process_dict: Optional[Mapping[str, Pronunciations]] = None
+process_cache: Optional[PronunciationCache] = None
 
 
-process_chunks: Optional[List[List[str]]] = None
-process_dict: Optional[PronunciationDict] = None
+def get_vocab_process(chunk: List[str], wsep: str, seed: Optional[int], ignore_missing: bool, psep: str) -> Tuple[List[Optional[str]], int, int]:
+  global process_dict
+  global process_cache
+  assert process_dict is not None
+  assert process_cache is not None
+  hits, misses = process_cache.hits, process_cache.misses
+  result = get_vocab(chunk, wsep, process_dict, seed, ignore_missing, psep, process_cache)
+  return result, process_cache.hits - hits, process_cache.misses - misses
 
 
-def get_vocab_process(chunk_nr: int, wsep: str, seed: Optional[int], ignore_missing: bool, psep: str) -> Tuple[int, List[Optional[str]]]:
-  global process_chunks
+def transcribe_file_process(path: Path, encoding: str, lsep: str, wsep: str, seed: Optional[int], ignore_missing: bool, psep: str, chunksize: int) -> int:
   global process_dict
-  assert process_chunks is not None
+  global process_cache
   assert process_dict is not None
-  chunk = process_chunks[chunk_nr]
-  return chunk_nr, get_vocab(chunk, wsep, process_dict, seed, ignore_missing, psep)
+  assert process_cache is not None
+  dictionary, cache = process_dict, process_cache
+  new_lines = (
+    line if new_line is None else new_line
+    for chunk in iter_chunks(read_lines(path, lsep, encoding), chunksize)
+    for line, new_line in zip(chunk, get_vocab(chunk, wsep, dictionary, seed, ignore_missing, psep, cache))
+  )
+  return write_lines_atomically(path, new_lines, lsep, encoding)
 
 
-def get_vocab(lines: List[str], wsep: str, dictionary: PronunciationDict, seed: Optional[int], ignore_missing: bool, psep: str) -> List[Optional[str]]:
+def get_vocab(lines: List[str], wsep: str, dictionary: Mapping[str, Pronunciations], seed: Optional[int], ignore_missing: bool, psep: str, cache: Optional[PronunciationCache] = None) -> List[Optional[str]]:
+  if cache is None:
+    cache = PronunciationCache(0)
+  cache_entries = cache.entries
   new_wsep = f"{psep}{wsep}{psep}"
   new_lines: List[Optional[str]] = []
   for line in lines:
     words = line.split(wsep)
     words_transcribed = []
     for word in words:
-      pronunciation = word
-      if word not in dictionary:
+      cache_entry = cache_entries.get(word, NOT_CACHED)
+      if cache_entry is NOT_CACHED:
+        cache.misses += 1
+        pronunciation_str = get_pronunciation_str(word, dictionary, seed, psep, cache)
+      else:
+        cache.hits += 1
+        pronunciation_str = cast(Optional[str], cache_entry)
+
+      if pronunciation_str is None:
         if not ignore_missing:
           continue
-
-      pronunciations = dictionary[word]
-      pronunciation = get_weighted_pronunciation(pronunciations, seed)
-      pronunciation_str = psep.join(pronunciation)
+        pronunciation_str = word
       words_transcribed.append(pronunciation_str)
     new_line = new_wsep.join(words_transcribed)
     if new_line != line:
@@ -105,8 +198,40 @@ def get_vocab(lines: List[str], wsep: str, dictionary: PronunciationDict, seed:
   return new_lines
 
 
-def __init_pool(chunks: List[List[str]], dictionary: PronunciationDict) -> None:
-  global process_chunks
+def get_pronunciation_str(word: str, dictionary: Mapping[str, Pronunciations], seed: Optional[int], psep: str, cache: PronunciationCache) -> Optional[str]:
+  if word not in dictionary:
+    pronunciation_str = None
+  else:
+    pronunciations = dictionary[word]
+    pronunciation = get_weighted_pronunciation(pronunciations, seed)
+    pronunciation_str = psep.join(pronunciation)
+    if len(pronunciations) > 1:
+      # the pronunciation is chosen for each occurrence
+      return pronunciation_str
+
+  if len(cache.entries) < cache.max_size:
+    cache.entries[word] = pronunciation_str
+  return pronunciation_str
+
+
+def resolve_vocabulary(vocabulary: Iterable[str], dictionary: Mapping[str, Pronunciations], seed: Optional[int], psep: str) -> Tuple[PronunciationDict, Dict[str, Optional[str]]]:
+  """Looks up each word of the vocabulary once."""
+  dictionary_trimmed = PronunciationDict()
+  lookup_table: Dict[str, Optional[str]] = {}
+  for word in vocabulary:
+    pronunciations = dictionary.get(word)
+    if pronunciations is None:
+      lookup_table[word] = None
+    elif len(pronunciations) > 1:
+      dictionary_trimmed[word] = pronunciations
+    else:
+      lookup_table[word] = psep.join(get_weighted_pronunciation(pronunciations, seed))
+  return dictionary_trimmed, lookup_table
+
+
+def __init_pool(dict_source: CompactDictSource, cache_size: int, lookup_table: Dict[str, Optional[str]]) -> None:
   global process_dict
-  process_chunks = chunks
-  process_dict = dictionary
+  global process_cache
+  process_dict = attach_compact_dict(dict_source)
+  process_cache = PronunciationCache(cache_size + len(lookup_table))
+  process_cache.entries.update(lookup_table)
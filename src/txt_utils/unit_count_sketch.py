@@ -0,0 +1,118 @@
+import math
+from array import array
+from hashlib import blake2b
+from heapq import heappop, heappush
+from operator import itemgetter
+from typing import Dict, List, Mapping, Optional, Tuple
+
+DEFAULT_EPSILON = 1e-5
+DEFAULT_DELTA = 1e-3
+
+
+class CountMinSketch():
+  """Count-min sketch with conservative updates; estimates are never too low."""
+
+  def __init__(self, width: int, depth: int) -> None:
+    if width <= 0 or depth <= 0:
+      raise ValueError("Width and depth need to be greater than zero!")
+    self.width = width
+    self.depth = depth
+    self.rows = [array("q", bytes(8 * width)) for _ in range(depth)]
+
+  def get_indices(self, unit: str) -> List[int]:
+    # the hash of str is randomized per process, i.e., it differs between pool workers which are spawned
+    digest = blake2b(unit.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    hash1 = int.from_bytes(digest[:8], "little")
+    hash2 = int.from_bytes(digest[8:], "little") | 1
+    return [(hash1 + row * hash2) % self.width for row in range(self.depth)]
+
+  def add(self, unit: str, count: int = 1) -> int:
+    indices = self.get_indices(unit)
+    estimate = min(row[index] for row, index in zip(self.rows, indices)) + count
+    for row, index in zip(self.rows, indices):
+      if row[index] < estimate:
+        row[index] = estimate
+    return estimate
+
+  def estimate(self, unit: str) -> int:
+    return min(row[index] for row, index in zip(self.rows, self.get_indices(unit)))
+
+
+class SpaceSaving():
+  """Keeps the counts of at most `capacity` units (space-saving algorithm)."""
+
+  def __init__(self, capacity: int) -> None:
+    if capacity <= 0:
+      raise ValueError("Capacity needs to be greater than zero!")
+    self.capacity = capacity
+    self.counts: Dict[str, int] = {}
+    self.errors: Dict[str, int] = {}
+    # one (count, unit) entry per unit; the count of an entry is raised only when it reaches the top
+    self.heap: List[Tuple[int, str]] = []
+
+  def add(self, unit: str, count: int = 1) -> None:
+    current = self.counts.get(unit)
+    if current is not None:
+      self.counts[unit] = current + count
+      return
+    error = 0
+    if len(self.counts) == self.capacity:
+      error, replaced_unit = self.pop_lowest()
+      del self.counts[replaced_unit]
+      del self.errors[replaced_unit]
+    self.counts[unit] = error + count
+    self.errors[unit] = error
+    heappush(self.heap, (error + count, unit))
+
+  def pop_lowest(self) -> Tuple[int, str]:
+    while True:
+      count, unit = heappop(self.heap)
+      current = self.counts[unit]
+      if current == count:
+        return count, unit
+      heappush(self.heap, (current, unit))
+
+  def __len__(self) -> int:
+    return len(self.counts)
+
+
+class ApproximateUnitCounts():
+  """Estimates the counts of the most frequent units with a fixed amount of memory."""
+
+  def __init__(self, epsilon: float = DEFAULT_EPSILON, delta: float = DEFAULT_DELTA, capacity: Optional[int] = None) -> None:
+    if not 0 < epsilon < 1 or not 0 < delta < 1:
+      raise ValueError("Epsilon and delta need to be between zero and one!")
+    self.epsilon = epsilon
+    self.delta = delta
+    self.sketch = CountMinSketch(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)))
+    self.heavy_hitters = SpaceSaving(math.ceil(1 / epsilon) if capacity is None else capacity)
+    self.total = 0
+
+  def update(self, counts: Mapping[str, int]) -> None:
+    for unit, count in counts.items():
+      self.sketch.add(unit, count)
+      self.heavy_hitters.add(unit, count)
+      self.total += count
+
+  @property
+  def max_error(self) -> int:
+    """Upper bound of the difference between each estimate and the true count."""
+    return self.total // self.heavy_hitters.capacity
+
+  def get_estimates(self) -> Dict[str, int]:
+    return {
+      unit: min(count, self.sketch.estimate(unit))
+      for unit, count in self.heavy_hitters.counts.items()
+    }
+
+  def get_sorted_counts(self, *, top_k: Optional[int] = None, min_count: Optional[int] = None) -> List[Tuple[int, str]]:
+    result = [
+      (count, unit)
+      for unit, count in self.get_estimates().items()
+      if min_count is None or count >= min_count
+    ]
+    result.sort(key=itemgetter(1))
+    result.sort(key=itemgetter(0), reverse=True)
+    if top_k is not None:
+      del result[top_k:]
+    return result
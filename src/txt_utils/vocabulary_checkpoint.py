@@ -0,0 +1,91 @@
+import codecs
+import hashlib
+import json
+import mmap
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set, Tuple, Union
+
+from txt_utils.shared_text import can_map_file
+from txt_utils.streaming import get_temp_path, replace_file
+
+VERSION = 1
+FINGERPRINT_BLOCK_SIZE = 16 * 1024 ** 2
+
+# {"version", "encoding", "line_sep", "word_sep", "offset", "fingerprint", "vocabulary"}
+VocabularyCheckpoint = Dict[str, Any]
+
+
+def can_use_checkpoint(encoding: str, line_sep: str) -> bool:
+  return can_map_file(encoding, line_sep) and len(line_sep) == 1
+
+
+def get_checkpoint_settings(encoding: str, line_sep: str, word_sep: str) -> Dict[str, Any]:
+  return {
+    "version": VERSION,
+    "encoding": codecs.lookup(encoding).name,
+    "line_sep": line_sep,
+    "word_sep": word_sep,
+  }
+
+
+def load_vocabulary_checkpoint(path: Path) -> Optional[VocabularyCheckpoint]:
+  logger = getLogger(__name__)
+  if not path.is_file():
+    return None
+  try:
+    checkpoint = json.loads(path.read_text("UTF-8"))
+  except (OSError, ValueError) as ex:
+    logger.warning(f"Checkpoint couldn't be read: {ex}")
+    return None
+  if not isinstance(checkpoint, dict) or checkpoint.get("version") != VERSION:
+    logger.warning("Checkpoint has an unsupported format.")
+    return None
+  return checkpoint
+
+
+def save_vocabulary_checkpoint(path: Path, settings: Dict[str, Any], offset: int, fingerprint: str, vocabulary: Iterable[str]) -> None:
+  checkpoint = dict(settings)
+  checkpoint["offset"] = offset
+  checkpoint["fingerprint"] = fingerprint
+  checkpoint["vocabulary"] = sorted(vocabulary)
+  tmp_path = get_temp_path(path)
+  try:
+    tmp_path.write_text(json.dumps(checkpoint, ensure_ascii=False), "UTF-8")
+    replace_file(tmp_path, path)
+  finally:
+    if tmp_path.exists():
+      tmp_path.unlink()
+
+
+def update_fingerprint(fingerprint: "hashlib._Hash", buffer: Union[bytes, mmap.mmap], start: int, end: int) -> None:
+  view = memoryview(buffer)
+  try:
+    for block_start in range(start, end, FINGERPRINT_BLOCK_SIZE):
+      fingerprint.update(view[block_start:min(block_start + FINGERPRINT_BLOCK_SIZE, end)])
+  finally:
+    view.release()
+
+
+def get_new_fingerprint() -> "hashlib._Hash":
+  return hashlib.sha256()
+
+
+def restore_vocabulary_checkpoint(checkpoint: Optional[VocabularyCheckpoint], settings: Dict[str, Any], buffer: Union[bytes, mmap.mmap]) -> Optional[Tuple[int, "hashlib._Hash", Set[str]]]:
+  """Returns None unless the settings match and `buffer` still starts with the processed part."""
+  logger = getLogger(__name__)
+  if checkpoint is None:
+    return None
+  if any(checkpoint.get(key) != value for key, value in settings.items()):
+    logger.info("Checkpoint was created with different settings, therefore the whole file is processed.")
+    return None
+  offset = checkpoint.get("offset")
+  if not isinstance(offset, int) or not 0 <= offset <= len(buffer):
+    logger.info("File is shorter than the processed part of the checkpoint, therefore the whole file is processed.")
+    return None
+  fingerprint = get_new_fingerprint()
+  update_fingerprint(fingerprint, buffer, 0, offset)
+  if fingerprint.hexdigest() != checkpoint.get("fingerprint"):
+    logger.info("Processed part of the file was changed, therefore the whole file is processed.")
+    return None
+  return offset, fingerprint, set(checkpoint.get("vocabulary", []))
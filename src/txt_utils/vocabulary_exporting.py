@@ -1,80 +1,179 @@
+import mmap
 from functools import partial
+from itertools import chain, islice
 from logging import getLogger
 from multiprocessing import Pool
-from typing import List, Optional, Set, cast
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set, cast
 
 from ordered_set import OrderedSet
 from tqdm import tqdm
 
-from txt_utils.helper import split_adv
+from txt_utils.byte_counting import can_count_bytes, count_byte_units, count_byte_units_in_file
+from txt_utils.compression import is_compressed
+from txt_utils.file_pool import init_nothing
+from txt_utils.helper import imap_ordered, iter_chunks, split_adv
+from txt_utils.profiling import get_worker_initializer
+from txt_utils.shared_text import (SharedTextSource, TextRange, attach_shared_text, map_file,
+                                   read_text_range, share_file, share_text)
+from txt_utils.streaming import read_lines
+from txt_utils.vocabulary_checkpoint import (can_use_checkpoint, get_checkpoint_settings,
+                                             get_new_fingerprint, load_vocabulary_checkpoint,
+                                             restore_vocabulary_checkpoint,
+                                             save_vocabulary_checkpoint, update_fingerprint)
 
 
 def extract_vocabulary_from_text(content: str, *, line_sep: str = "\n", word_sep: str = " ", include_empty: bool = False, n_jobs: int = 4, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000, silent: bool = False) -> OrderedSet[str]:
   logger = getLogger(__name__)
-  logger.info("Splitting lines...")
-  lines = content.split(line_sep)
-  del content
+  logger.info("Sharing text...")
+  with share_text(content, line_sep, chunksize) as (source, ranges):
+    del content
+    result = extract_vocabulary_from_shared_text(
+      source, ranges, line_sep=line_sep, word_sep=word_sep, include_empty=include_empty,
+      n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, silent=silent,
+    )
+  return result
+
+
+def extract_vocabulary_from_lines(lines: Iterable[str], *, word_sep: str = " ", include_empty: bool = False, n_jobs: int = 1, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000, silent: bool = False) -> OrderedSet[str]:
+  voc: Set[str] = set()
+  chunks = iter_chunks(lines, chunksize)
+  first_chunks = list(islice(chunks, n_jobs))
+  n_jobs = len(first_chunks)
+  if n_jobs <= 1:
+    for line in tqdm(chain.from_iterable(chain(first_chunks, chunks)), desc="Processing", unit=" line(s)", disable=silent):
+      voc.update(split_adv(line, word_sep))
+  else:
+    method_proxy = partial(get_vocab, wsep=word_sep)
+    with Pool(
+      processes=n_jobs,
+      initializer=get_worker_initializer(init_nothing),
+      maxtasksperchild=maxtasksperchild,
+    ) as pool:
+      iterator = tqdm(imap_ordered(pool, method_proxy, chain(first_chunks, chunks), 2 * n_jobs),
+                      desc="Processing", unit=" chunk(s)", disable=silent)
+      for _, chunk_voc in iterator:
+        voc.update(chunk_voc)
+  return get_sorted_vocabulary(voc, include_empty)
+
+
+def extract_vocabulary_from_file(path: Path, encoding: str, *, line_sep: str = "\n", word_sep: str = " ", include_empty: bool = False, n_jobs: int = 4, maxtasksperchild: Optional[int] = None, chunksize: int = 10_000, silent: bool = False, checkpoint_path: Optional[Path] = None) -> OrderedSet[str]:
+  if checkpoint_path is not None:
+    if can_use_checkpoint(encoding, line_sep) and path.stat().st_size > 0 and not is_compressed(path):
+      return extract_vocabulary_with_checkpoint(
+        path, encoding, checkpoint_path, line_sep=line_sep, word_sep=word_sep, include_empty=include_empty,
+        n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, chunksize=chunksize, silent=silent,
+      )
+    logger = getLogger(__name__)
+    logger.warning("Checkpoints are only supported for non-empty uncompressed files in UTF-8, ASCII or Latin-1 with a line separator consisting of one character, therefore no checkpoint is used.")
+
+  if n_jobs == 1 and can_count_bytes(encoding, line_sep, word_sep):
+    counts = count_byte_units_in_file(path, encoding, line_sep, word_sep)
+    if counts is not None:
+      return get_sorted_vocabulary(counts.keys(), include_empty)
+
+  if is_compressed(path):
+    return extract_vocabulary_from_lines(
+      read_lines(path, line_sep, encoding), word_sep=word_sep, include_empty=include_empty,
+      n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, chunksize=chunksize, silent=silent,
+    )
+
+  with share_file(path, encoding, line_sep, chunksize) as (source, ranges):
+    result = extract_vocabulary_from_shared_text(
+      source, ranges, line_sep=line_sep, word_sep=word_sep, include_empty=include_empty,
+      n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, silent=silent,
+    )
+  return result
+
+
+def extract_vocabulary_with_checkpoint(path: Path, encoding: str, checkpoint_path: Path, *, line_sep: str, word_sep: str, include_empty: bool, n_jobs: int, maxtasksperchild: Optional[int], chunksize: int, silent: bool) -> OrderedSet[str]:
+  """Processes only the lines after the offset of the checkpoint and updates it."""
+  logger = getLogger(__name__)
+  settings = get_checkpoint_settings(encoding, line_sep, word_sep)
+  checkpoint = load_vocabulary_checkpoint(checkpoint_path)
+  with path.open(mode="rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    restored = restore_vocabulary_checkpoint(checkpoint, settings, mm)
+    if restored is None:
+      offset, fingerprint, voc = 0, get_new_fingerprint(), set()
+    else:
+      offset, fingerprint, voc = restored
+      logger.info(f"Continuing from checkpoint at byte {offset} with {len(voc)} unit(s).")
+    length = len(mm)
+    line_sep_bytes = line_sep.encode(encoding)
+    last_sep = mm.rfind(line_sep_bytes, offset)
+    if last_sep != -1:
+      if n_jobs == 1 and can_count_bytes(encoding, line_sep, word_sep) and mm.find(b"\r", offset, last_sep) == -1:
+        with memoryview(mm) as view, view[offset:last_sep] as complete_lines:
+          voc.update(count_byte_units(complete_lines, encoding, line_sep, word_sep).keys())
+      else:
+        with map_file(path, encoding, line_sep, chunksize, start=offset, end=last_sep) as (source, ranges):
+          voc.update(collect_vocabulary_from_shared_text(
+            source, ranges, line_sep=line_sep, word_sep=word_sep,
+            n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, silent=silent,
+          ))
+      new_offset = last_sep + len(line_sep_bytes)
+      update_fingerprint(fingerprint, mm, offset, new_offset)
+      offset = new_offset
+    # same newline translation as in Path.read_text()
+    last_line = str(mm[offset:length], encoding).replace("\r\n", "\n").replace("\r", "\n")
+
+  save_vocabulary_checkpoint(checkpoint_path, settings, offset, fingerprint.hexdigest(), voc)
+  logger.debug(f"Saved checkpoint at byte {offset}.")
+  voc.update(get_vocab(last_line.split(line_sep), word_sep))
+  return get_sorted_vocabulary(voc, include_empty)
+
+
+def extract_vocabulary_from_shared_text(source: SharedTextSource, ranges: Iterator[TextRange], *, line_sep: str, word_sep: str, include_empty: bool, n_jobs: int, maxtasksperchild: Optional[int], silent: bool) -> OrderedSet[str]:
+  voc = collect_vocabulary_from_shared_text(
+    source, ranges, line_sep=line_sep, word_sep=word_sep,
+    n_jobs=n_jobs, maxtasksperchild=maxtasksperchild, silent=silent,
+  )
+  return get_sorted_vocabulary(voc, include_empty)
+
+
+def collect_vocabulary_from_shared_text(source: SharedTextSource, ranges: Iterator[TextRange], *, line_sep: str, word_sep: str, n_jobs: int, maxtasksperchild: Optional[int], silent: bool) -> Set[str]:
+  logger = getLogger(__name__)
 
   n_jobs = cast(int, n_jobs)
-  chunksize = cast(int, chunksize)
   maxtasksperchild = cast(int, maxtasksperchild)
 
-  logger.debug(f"Lines: {len(lines)}")
-  logger.debug(f"Chunksize: {chunksize}")
   logger.debug(f"Maxtask: {maxtasksperchild}")
   logger.debug(f"Jobs: {n_jobs}")
 
-  chunks = get_chunks(lines, chunksize)
-  del lines
-
-  logger.debug(f"Chunks: {len(chunks)}")
-
-  amount_of_jobs_required = len(chunks)
-  n_jobs = min(n_jobs, amount_of_jobs_required)
+  first_ranges = list(islice(ranges, n_jobs))
+  n_jobs = min(n_jobs, len(first_ranges))
   logger.debug(f"Jobs (final): {n_jobs}")
 
   method_proxy = partial(
     get_vocab_process,
+    lsep=line_sep,
     wsep=word_sep,
   )
 
   voc: Set[str] = set()
   with Pool(
     processes=n_jobs,
-    initializer=__init_pool,
-    initargs=(chunks,),
+    initializer=get_worker_initializer(attach_shared_text),
+    initargs=(source,),
     maxtasksperchild=maxtasksperchild,
   ) as pool:
-    iterator = tqdm(pool.imap_unordered(method_proxy, range(len(chunks)), chunksize=1), total=len(chunks), desc="Processing",
+    iterator = tqdm(pool.imap_unordered(method_proxy, chain(first_ranges, ranges), chunksize=1), desc="Processing",
                     unit=" chunk(s)", disable=silent)
-    voc.update(*iterator)
-  del chunks
-
-  if not include_empty and "" in voc:
-    voc.remove("")
+    for chunk_voc in iterator:
+      voc.update(chunk_voc)
+  return voc
 
-  logger.info(f"Extracted vocabulary size: {len(voc)}")
-  result = OrderedSet(sorted(voc))
 
+def get_sorted_vocabulary(voc: Iterable[str], include_empty: bool) -> OrderedSet[str]:
+  logger = getLogger(__name__)
+  result = OrderedSet(sorted(unit for unit in voc if include_empty or unit != ""))
+  logger.info(f"Extracted vocabulary size: {len(result)}")
   return result
 
 
-def get_chunks(keys: List[str], chunk_size: Optional[int]) -> List[List[str]]:
-  if chunk_size is None:
-    chunk_size = len(keys)
-  chunked_list = list(keys[i: i + chunk_size] for i in range(0, len(keys), chunk_size))
-  return chunked_list
-
-
-process_chunks: Optional[List[List[str]]] = None
-
-
-def get_vocab_process(chunk_nr: int, wsep: str) -> Set[str]:
-  global process_chunks
-  assert process_chunks is not None
-  chunk = process_chunks[chunk_nr]
-  assert chunk is not None
-  return get_vocab(chunk, wsep)
+def get_vocab_process(text_range: TextRange, lsep: str, wsep: str) -> Set[str]:
+  lines = read_text_range(text_range).split(lsep)
+  return get_vocab(lines, wsep)
 
 
 def get_vocab(lines: List[str], wsep: str) -> Set[str]:
@@ -83,8 +182,3 @@ def get_vocab(lines: List[str], wsep: str) -> Set[str]:
     tokens = split_adv(line, wsep)
     voc.update(tokens)
   return voc
-
-
-def __init_pool(chunks: List[List[str]]) -> None:
-  global process_chunks
-  process_chunks = chunks
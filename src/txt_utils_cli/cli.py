@@ -1,21 +1,20 @@
 import argparse
-import platform
 import sys
 from argparse import ArgumentParser
-from importlib.metadata import version
+from functools import partial
 from logging import getLogger
 from pathlib import Path
-from pkgutil import iter_modules
 from tempfile import gettempdir
 from time import perf_counter
 from typing import Callable, Generator, List, Tuple
 
 from txt_utils_cli.globals import ExecutionResult
-from txt_utils_cli.helper import get_optional, parse_path
+from txt_utils_cli.helper import get_optional, parse_path, parse_thread_count
 from txt_utils_cli.line_replacement import get_line_replacement_parser
 from txt_utils_cli.logging_configuration import (configure_root_logger, get_file_logger,
                                                  try_init_file_logger)
 from txt_utils_cli.merging import get_merging_parser
+from txt_utils_cli.pipeline import get_pipeline_parser
 from txt_utils_cli.replacement import get_replacement_parser
 from txt_utils_cli.statistics_unit_counts import get_unit_count_export_parser
 from txt_utils_cli.transcription import get_transcription_parser
@@ -23,8 +22,6 @@ from txt_utils_cli.trimming import get_trimming_parser
 from txt_utils_cli.unit_removal import get_unit_removal_parser
 from txt_utils_cli.vocabulary_exporting import get_vocabulary_exporting_parser
 
-__version__ = version("txt-utils")
-
 INVOKE_HANDLER_VAR = "invoke_handler"
 
 CONSOLE_PNT_GREEN = "\x1b[1;49;32m"
@@ -36,6 +33,28 @@ Parsers = Generator[Tuple[str, str, Callable[[ArgumentParser],
                                              Callable[..., ExecutionResult]]], None, None]
 
 
+def get_version() -> str:
+  # importlib.metadata is slow to import, therefore the version is only determined if it is needed
+  from importlib.metadata import version
+  return version("txt-utils")
+
+
+def __getattr__(name: str):
+  if name == "__version__":
+    return get_version()
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class VersionAction(argparse.Action):
+  def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help="show program's version number and exit"):
+    super().__init__(option_strings=option_strings, dest=dest,
+                     default=default, nargs=0, help=help)
+
+  def __call__(self, parser, namespace, values, option_string=None):
+    parser._print_message(f"{parser.prog} {get_version()}\n", sys.stdout)
+    parser.exit()
+
+
 def formatter(prog):
   return argparse.ArgumentDefaultsHelpFormatter(prog, max_help_position=40)
 
@@ -49,6 +68,7 @@ def get_parsers() -> Parsers:
   yield "trim-units", "trim units", get_trimming_parser
   yield "remove-units", "remove units", get_unit_removal_parser
   yield "create-unit-occurrence-stats", "create unit occurrence statistics", get_unit_count_export_parser
+  yield "pipeline", "apply multiple operations to each line in one pass", get_pipeline_parser
 
 
 def print_features():
@@ -62,7 +82,7 @@ def _init_parser():
     formatter_class=formatter,
     description="This program provides methods to modify a text file.",
   )
-  main_parser.add_argument('-v', '--version', action='version', version='%(prog)s ' + __version__)
+  main_parser.add_argument('-v', '--version', action=VersionAction)
   subparsers = main_parser.add_subparsers(help="description")
   default_log_path = Path(gettempdir()) / "txt-utils.log"
 
@@ -73,11 +93,18 @@ def _init_parser():
     method_parser.set_defaults(**{
       INVOKE_HANDLER_VAR: method(method_parser),
     })
+    compression_group = method_parser.add_argument_group("compression arguments")
+    compression_group.add_argument("--compression-threads", type=parse_thread_count, metavar="N",
+                                   help="amount of threads which compress zstd output files (0 = compress in the writing process, -1 = one thread per CPU); files ending with .gz, .bz2, .xz, .zst or .zstd are (de)compressed while they are streamed", default=0)
     logging_group = method_parser.add_argument_group("logging arguments")
     logging_group.add_argument("--log", type=get_optional(parse_path), metavar="FILE",
                                nargs="?", const=None, help="path to write the log", default=default_log_path)
     logging_group.add_argument("--debug", action="store_true",
                                help="include debugging information in log")
+    logging_group.add_argument("--profile", type=get_optional(parse_path), metavar="FILE",
+                               help="profile the command with cProfile and write the stats to this file (.pstats); the merged stats of the pool workers are written to FILE-workers", default=None)
+    logging_group.add_argument("--profile-report", type=get_optional(parse_path), metavar="FILE",
+                               help="write the wall time, CPU time, peak RSS and amount of items of each stage as JSON to this file", default=None)
 
   return main_parser
 
@@ -115,9 +142,13 @@ def parse_args(args: List[str]) -> None:
       logger.warning("Logging to file is not possible.")
 
   flogger = get_file_logger()
-  if not local_debugging:
+  # collecting the environment information is expensive, therefore it is only done if it is written to the log
+  if not local_debugging and log_to_file and ns.debug:
+    import platform
+    from pkgutil import iter_modules
+
     sys_version = sys.version.replace('\n', '')
-    flogger.debug(f"CLI version: {__version__}")
+    flogger.debug(f"CLI version: {get_version()}")
     flogger.debug(f"Python version: {sys_version}")
     flogger.debug("Modules: %s", ', '.join(sorted(p.name for p in iter_modules())))
 
@@ -132,8 +163,21 @@ def parse_args(args: List[str]) -> None:
   flogger.debug(f"Received arguments: {str(args)}")
   flogger.debug(f"Parsed arguments: {str(ns)}")
 
+  if ns.compression_threads != 0:
+    from txt_utils.compression import set_compression_threads
+    set_compression_threads(ns.compression_threads)
+
+  profile_report = ns.profile_report
+  if profile_report is not None:
+    from txt_utils.instrumentation import enable_instrumentation
+    enable_instrumentation()
+    invoke_handler = partial(invoke_in_stage, invoke_handler)
+
   start = perf_counter()
-  success, changed_anything = invoke_handler(ns)
+  if ns.profile is None:
+    success, changed_anything = invoke_handler(ns)
+  else:
+    success, changed_anything = invoke_profiled(invoke_handler, ns, ns.profile)
 
   exit_code = 0
   if success:
@@ -156,11 +200,65 @@ def parse_args(args: List[str]) -> None:
   duration = perf_counter() - start
   flogger.debug(f"Total duration (s): {duration}")
 
+  if profile_report is not None:
+    from txt_utils.instrumentation import write_stage_report
+    try:
+      write_stage_report(profile_report)
+    except Exception as ex:
+      logger.warning("Profile report couldn't be written!")
+      flogger.exception(ex)
+    else:
+      logger.info(f"Written profile report to: {profile_report.absolute()}")
+
   if log_to_file:
     logger.info(f"Written log to: {ns.log.absolute()}")
   sys.exit(exit_code)
 
 
+def invoke_in_stage(invoke_handler: Callable[..., ExecutionResult], ns: argparse.Namespace) -> ExecutionResult:
+  from txt_utils.instrumentation import stage
+  with stage("Total"):
+    return invoke_handler(ns)
+
+
+def get_workers_profile_path(path: Path) -> Path:
+  return path.with_name(f"{path.stem}-workers{path.suffix}")
+
+
+def invoke_profiled(invoke_handler: Callable[..., ExecutionResult], ns: argparse.Namespace, path: Path) -> ExecutionResult:
+  import cProfile
+  from tempfile import TemporaryDirectory
+
+  from txt_utils.profiling import (disable_worker_profiling, enable_worker_profiling,
+                                   merge_worker_profiles)
+
+  logger = getLogger()
+  flogger = get_file_logger()
+
+  with TemporaryDirectory(prefix="txt-utils-profile-") as worker_profile_dir:
+    enable_worker_profiling(Path(worker_profile_dir))
+    profiler = cProfile.Profile()
+    try:
+      result = profiler.runcall(invoke_handler, ns)
+    finally:
+      disable_worker_profiling()
+
+    workers_path = get_workers_profile_path(path)
+    try:
+      path.parent.mkdir(parents=True, exist_ok=True)
+      profiler.dump_stats(path)
+      worker_count = merge_worker_profiles(Path(worker_profile_dir), workers_path)
+    except Exception as ex:
+      logger.warning("Profile couldn't be written!")
+      flogger.exception(ex)
+      return result
+
+  logger.info(f"Written profile to: {path.absolute()}")
+  if worker_count > 0:
+    logger.info(f"Written merged profile of {worker_count} worker(s) to: {workers_path.absolute()}")
+  return result
+
+
 def run():
   arguments = sys.argv[1:]
   parse_args(arguments)
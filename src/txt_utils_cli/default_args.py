@@ -1,7 +1,8 @@
 
 from argparse import ArgumentParser
 
-from txt_utils_cli.helper import add_encoding_argument, parse_existing_file, parse_non_empty
+from txt_utils_cli.helper import (ConvertToOrderedSetAction, add_encoding_argument, parse_non_empty,
+                                  parse_path)
 
 
 def add_file_arguments(parser: ArgumentParser, include_sep: bool = False) -> None:
@@ -13,8 +14,10 @@ def add_file_arguments(parser: ArgumentParser, include_sep: bool = False) -> Non
 
 
 def add_file_and_enc_argument(parser: ArgumentParser) -> None:
-  parser.add_argument("file", type=parse_existing_file, metavar="FILE-PATH",
-                      help="name of the text file")
+  parser.add_argument("file", type=parse_path, metavar="FILE-PATH",
+                      help="name of the text file; a directory (searched recursively) or a quoted glob pattern (`**` matches any subdirectories) selects multiple files which are processed in parallel, one file per job; \"-\" reads the standard input and writes the result to the standard output")
+  parser.add_argument("--include", type=str, nargs="+", metavar="SUFFIX", action=ConvertToOrderedSetAction,
+                      help="process only files with these suffixes (e.g., .txt) from a directory or glob pattern", default=None)
   add_encoding_argument(parser, "encoding of the text file")
 
 
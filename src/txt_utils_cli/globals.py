@@ -1,5 +1,6 @@
 from os import cpu_count
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 from ordered_set import OrderedSet
 
@@ -7,6 +8,7 @@ DEFAULT_ENCODING = "UTF-8"
 DEFAULT_N_JOBS = cpu_count()
 DEFAULT_CHUNKSIZE = 2000000
 DEFAULT_MAXTASKSPERCHILD = None
+DEFAULT_DICT_CACHE_SIZE_MB = 2048
 DEFAULT_PUNCTUATION = list(OrderedSet(sorted((
   "!", "\"", "#", "$", "%", "&", "'", "(", ")", "*", "+", ",", "-", ".", "/", ":", ";", "<", "=", ">", "?", "@", "[", "\\", "]", "{", "}", "~", "`",
   "、", "。", "？", "！", "：", "；", "।", "¿", "¡", "【", "】", "，", "…", "‥", "「", "」", "『", "』", "〝", "〟", "″", "⟨", "⟩", "♪", "・", "‹", "›", "«", "»", "～", "′", "“", "”"
@@ -15,4 +17,7 @@ DEFAULT_PUNCTUATION = list(OrderedSet(sorted((
 Success = bool
 ChangedAnything = bool
 
+# success of each file if multiple files were processed
+FileResults = Dict[Path, Success]
+
 ExecutionResult = Tuple[Success, Optional[ChangedAnything]]
@@ -14,6 +14,8 @@ from txt_utils_cli.globals import (DEFAULT_CHUNKSIZE, DEFAULT_ENCODING, DEFAULT_
 
 T = TypeVar("T")
 
+STANDARD_STREAM = "-"
+
 
 # def get_split_method(sep: str) -> Callable[[str, str], List[str]]:
 #   if sep == "":
@@ -129,6 +131,10 @@ def get_optional(method: Callable[[str], T]) -> Callable[[str], Optional[T]]:
   return result
 
 
+def is_standard_stream(path: Path) -> bool:
+  return str(path) == STANDARD_STREAM
+
+
 def parse_existing_file(value: str) -> Path:
   path = parse_path(value)
   if not path.is_file():
@@ -179,6 +185,13 @@ def parse_positive_float(value: str) -> float:
   return pvalue
 
 
+def parse_probability(value: str) -> float:
+  pvalue = parse_positive_float(value)
+  if not pvalue < 1:
+    raise ArgumentTypeError("Value needs to be less than one!")
+  return pvalue
+
+
 def parse_non_negative_float(value: str) -> float:
   pvalue = parse_float(value)
   if not pvalue >= 0:
@@ -208,6 +221,12 @@ def parse_non_negative_integer(value: str) -> int:
   return pvalue
 
 
+def parse_thread_count(value: str) -> int:
+  if value == "-1":
+    return -1
+  return parse_non_negative_integer(value)
+
+
 def add_chunksize_argument(parser: _ActionsContainer, target: str = "lines", default: int = DEFAULT_CHUNKSIZE) -> None:
   parser.add_argument("-s", "--chunksize", type=parse_positive_integer, metavar="NUMBER",
                       help=f"amount of {target} to chunk into one job", default=default)
@@ -1,70 +1,80 @@
-import re
 from argparse import ArgumentParser, Namespace
-from pathlib import Path
-from typing import cast
-
-from tqdm import tqdm
+from functools import partial
 
 from txt_utils_cli.default_args import add_file_arguments
 from txt_utils_cli.globals import ExecutionResult
-from txt_utils_cli.helper import parse_non_empty
+from txt_utils_cli.helper import add_mp_group, is_standard_stream, parse_non_empty
 from txt_utils_cli.logging_configuration import get_file_logger, init_and_get_console_logger
+from txt_utils_cli.multiple_files import get_input_files, map_lines_in_files_ns
+from txt_utils_cli.replacement import add_rules_argument, get_rules
+from txt_utils_cli.standard_streams import map_lines_in_standard_streams_ns
 
 
 def get_line_replacement_parser(parser: ArgumentParser):
   parser.description = "This command replaces a regex pattern for each line."
   add_file_arguments(parser)
-  parser.add_argument("pattern", type=parse_non_empty, metavar="PATTERN",
-                      help="replace regex pattern")
-  parser.add_argument("replace_with", type=str, metavar="REPLACE-WITH",
-                      help="replace pattern with this text")
+  parser.add_argument("pattern", type=parse_non_empty, metavar="PATTERN", nargs="?",
+                      help="replace regex pattern (required if no rules are given)", default=None)
+  parser.add_argument("replace_with", type=str, metavar="REPLACE-WITH", nargs="?",
+                      help="replace pattern with this text (required if no rules are given)", default=None)
+  add_rules_argument(parser)
+  add_mp_group(parser)
   return line_replace_ns
 
 
 def line_replace_ns(ns: Namespace) -> ExecutionResult:
+  from txt_utils.instrumentation import stage
+  from txt_utils.replacement import apply_replacement_rules, compile_replacement_rules
+  from txt_utils.streaming import map_lines_in_file
+
   logger = init_and_get_console_logger(__name__)
   flogger = get_file_logger()
 
-  path = cast(Path, ns.file)
+  paths = get_input_files(ns)
+  if paths is None:
+    return False, False
 
-  logger.info("Loading...")
   try:
-    content = path.read_text(ns.encoding)
+    rules = get_rules(ns.rules, ns.pattern, ns.replace_with, ns.encoding, False)
+  except ValueError as ex:
+    logger.error(ex)
+    return False, False
   except Exception as ex:
-    logger.error("File couldn't be loaded!")
+    logger.error("Rules couldn't be loaded!")
     flogger.exception(ex)
     return False, False
 
-  logger.info("Splitting lines...")
-  lines = content.split(ns.lsep)
-  del content
+  with stage("Compiling rules") as current_stage:
+    try:
+      batches = compile_replacement_rules(rules)
+    except ValueError as ex:
+      logger.error(f"Rules are invalid: {ex}")
+      return False, False
+    current_stage.add_items(len(rules))
+  flogger.debug(f"Combined {len(rules)} rule(s) into {len(batches)} pattern(s).")
+
+  method = partial(
+    apply_replacement_rules,
+    batches=batches,
+  )
 
-  pattern = re.compile(ns.pattern)
-  changed_counter = 0
-  for line_nr, line in enumerate(tqdm(lines, desc="Replacing", unit=" line(s)")):
-    line_new = pattern.sub(ns.replace_with, line)
-    if line_new != line:
-      # Logging of this takes too much time
-      # logger.debug(f"Replaced \"{line}\" with \"{line_new}\".")
-      lines[line_nr] = line_new
-      changed_counter += 1
+  logger.info("Replacing...")
+  with stage("Replacing"):
+    if len(paths) > 1:
+      return map_lines_in_files_ns(paths, method, ns, "Replacing")
+    if is_standard_stream(paths[0]):
+      return map_lines_in_standard_streams_ns(method, ns, "Replacing")
+    try:
+      changed_count = map_lines_in_file(paths[0], method, line_sep=ns.lsep, encoding=ns.encoding, desc="Replacing",
+                                        n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize)
+    except Exception as ex:
+      logger.error("File couldn't be processed!")
+      flogger.exception(ex)
+      return False, False
 
-  if changed_counter == 0:
+  if changed_count == 0:
     logger.info("Didn't changed anything.")
     return True, False
 
-  logger.info(f"Changed {changed_counter} line(s).")
-
-  logger.info("Rejoining lines...")
-  content = ns.lsep.join(lines)
-
-  logger.info("Saving...")
-  try:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, ns.encoding)
-  except Exception as ex:
-    logger.error("File couldn't be saved!")
-    flogger.exception(ex)
-    return False, False
-  del content
+  logger.info(f"Changed {changed_count} line(s).")
   return True, True
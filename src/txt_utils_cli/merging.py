@@ -1,72 +1,71 @@
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
-from typing import cast
-
-from tqdm import tqdm
+from typing import List, cast
 
 from txt_utils_cli.globals import ExecutionResult
-from txt_utils_cli.helper import add_encoding_argument, parse_existing_file, parse_path
+from txt_utils_cli.helper import (ConvertToOrderedSetAction, add_encoding_argument,
+                                  is_standard_stream, parse_path)
 from txt_utils_cli.logging_configuration import get_file_logger, init_and_get_console_logger
 
 
 def get_merging_parser(parser: ArgumentParser):
-  parser.description = "This command merges multiple text files into a single file."
-  parser.add_argument("files", type=parse_existing_file,
-                      metavar="INPUT-FILE-PATH", nargs="+", help="text files that should be merged together")
+  parser.description = "This command merges multiple text files into a single file. The files are copied one after another in blocks, i.e., they are never loaded completely."
+  parser.add_argument("files", type=parse_path,
+                      metavar="INPUT-PATH", nargs="+", help="text files that should be merged together; directories are searched recursively and glob patterns (quoted, `**` matches any subdirectories) are expanded, both in sorted order")
   parser.add_argument("output", type=parse_path,
-                      metavar="OUTPUT-FILE-PATH", help="output text file")
+                      metavar="OUTPUT-FILE-PATH", help="output text file; it is compressed if it ends with .gz, .bz2, .xz, .zst or .zstd; \"-\" for the standard output")
   parser.add_argument("--sep", type=str, default="\n", metavar="STRING",
                       help="separate file contents with this text while merging")
+  parser.add_argument("--include", type=str, nargs="+", metavar="SUFFIX", action=ConvertToOrderedSetAction,
+                      help="merge only files with these suffixes (e.g., .txt) from directories and glob patterns", default=None)
   add_encoding_argument(parser, "encoding of the input files and the output file")
   return merge_ns
 
 
 def merge_ns(ns: Namespace) -> ExecutionResult:
+  from txt_utils.helper import get_files
+  from txt_utils.instrumentation import stage
+  from txt_utils.merging import merge_files, merge_files_into_stream
+  from txt_utils.streaming import open_stdout
+
   logger = init_and_get_console_logger(__name__)
   flogger = get_file_logger()
+  output = cast(Path, ns.output)
 
-  # logger.info("Searching for files...")
-  # file_types = set(suffix.lower() for suffix in ns.include)
-  # text_files: List[Path] = list(
-  #   file
-  #   for folder in ns.directories
-  #   for file in get_all_files_in_all_subfolders(folder)
-  #   if file.suffix.lower() in file_types
-  # )
+  logger.info("Searching for files...")
+  suffixes = None if ns.include is None else set(suffix.lower() for suffix in ns.include)
+  paths: List[Path] = []
+  with stage("Searching for files") as current_stage:
+    for path in ns.files:
+      try:
+        paths.extend(get_files(path, suffixes))
+      except FileNotFoundError as ex:
+        logger.error(f"{ex}")
+        return False, None
+    # the output could be in one of the directories
+    paths = [path for path in paths if path.absolute() != output.absolute()]
+    current_stage.add_items(len(paths))
+  logger.info(f"Found {len(paths)} file(s).")
 
-  texts = []
-  all_successful = True
-  for path in tqdm(ns.files, desc="Reading text files", unit=" file(s)"):
+  logger.info("Merging files...")
+  with stage("Merging files") as current_stage:
     try:
-      text = path.read_text(ns.encoding)
+      if is_standard_stream(output):
+        with open_stdout(ns.encoding) as stream:
+          merged_count, failed = merge_files_into_stream(paths, stream.buffer, ns.encoding, sep=ns.sep)
+      else:
+        merged_count, failed = merge_files(paths, output, ns.encoding, sep=ns.sep)
     except Exception as ex:
-      flogger.debug(f"File: {cast(Path, path).absolute()}")
-      flogger.error("File couldn't be loaded!")
+      logger.error("Output couldn't be saved!")
       flogger.exception(ex)
-      all_successful = False
-      continue
-    texts.append(text)
-
-  logger.info("Merging files...")
-  text = ns.sep.join(texts)
-
-  logger.info("Saving merged output...")
-  output = cast(Path, ns.output)
-
-  try:
-    output.parent.mkdir(parents=True, exist_ok=True)
-    output.write_text(text, "UTF-8")
-  except Exception as ex:
-    logger.error("Output couldn't be saved!")
-    flogger.exception(ex)
-    return False, None
-
-  logger.info(f"Written output to: {output.absolute()}")
-  return all_successful, None
+      return False, None
+    current_stage.add_items(merged_count)
 
+  for path in failed:
+    flogger.error(f"File couldn't be loaded: {path.absolute()}")
+  if len(failed) > 0:
+    logger.warning(f"{len(failed)} file(s) couldn't be loaded and were left out (see log file).")
 
-# def get_all_files_in_all_subfolders(directory: Path) -> Generator[Path, None, None]:
-#   for root, _, files in os.walk(directory):
-#     for name in files:
-#       file_path = Path(root) / name
-#       yield file_path
+  if not is_standard_stream(output):
+    logger.info(f"Written output to: {output.absolute()}")
+  return len(failed) == 0, None
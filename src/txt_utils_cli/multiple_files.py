@@ -0,0 +1,81 @@
+from argparse import Namespace
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from txt_utils_cli.globals import ExecutionResult, FileResults
+from txt_utils_cli.helper import is_standard_stream
+from txt_utils_cli.logging_configuration import get_file_logger, init_and_get_console_logger
+
+if TYPE_CHECKING:
+  from txt_utils.file_pool import FileResult
+
+R = TypeVar("R")
+
+
+def get_input_files(ns: Namespace) -> Optional[List[Path]]:
+  from txt_utils.helper import get_files
+
+  logger = init_and_get_console_logger(__name__)
+  if is_standard_stream(ns.file):
+    return [ns.file]
+  suffixes = None if ns.include is None else set(suffix.lower() for suffix in ns.include)
+  try:
+    paths = get_files(ns.file, suffixes)
+  except FileNotFoundError as ex:
+    logger.error(f"{ex}")
+    return None
+  if len(paths) == 0:
+    logger.error(f"No files were found: {ns.file}")
+    return None
+  if len(paths) > 1:
+    logger.info(f"Found {len(paths)} file(s).")
+  return paths
+
+
+def collect_file_results(results: "Iterable[FileResult[R]]") -> Tuple[FileResults, Dict[Path, R]]:
+  flogger = get_file_logger()
+  file_results: FileResults = {}
+  successful_results: Dict[Path, R] = {}
+  for path, result, error in results:
+    if error is None:
+      file_results[path] = True
+      successful_results[path] = result  # type: ignore
+    else:
+      file_results[path] = False
+      flogger.error(f"File couldn't be processed: {path.absolute()}")
+      flogger.error(error)
+  return file_results, successful_results
+
+
+def log_file_results(file_results: FileResults) -> None:
+  logger = init_and_get_console_logger(__name__)
+  flogger = get_file_logger()
+  failed = [path for path, success in file_results.items() if not success]
+  logger.info(f"Processed {len(file_results)} file(s): {len(file_results) - len(failed)} successful, {len(failed)} failed.")
+  for path in failed:
+    flogger.error(f"Failed: {path.absolute()}")
+
+
+def map_lines_in_files_ns(paths: List[Path], method: Callable[[str], str], ns: Namespace, desc: str) -> ExecutionResult:
+  from txt_utils.file_pool import process_files
+  from txt_utils.streaming import map_lines_in_file
+
+  logger = init_and_get_console_logger(__name__)
+  file_method = partial(
+    map_lines_in_file,
+    method=method,
+    line_sep=ns.lsep,
+    encoding=ns.encoding,
+    desc=desc,
+    silent=True,
+  )
+  file_results, changed_counts = collect_file_results(process_files(
+    paths, file_method, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, desc=desc,
+  ))
+  changed_count = sum(changed_counts.values())
+  if changed_count > 0:
+    changed_files = sum(1 for count in changed_counts.values() if count > 0)
+    logger.info(f"Changed {changed_count} line(s) in {changed_files} file(s).")
+  log_file_results(file_results)
+  return all(file_results.values()), changed_count > 0
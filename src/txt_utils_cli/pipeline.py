@@ -0,0 +1,193 @@
+import argparse
+import json
+import re
+from argparse import ArgumentParser, Namespace
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Pattern, Sequence, Tuple, Union
+
+from ordered_set import OrderedSet
+
+from txt_utils_cli.default_args import add_file_arguments
+from txt_utils_cli.globals import ExecutionResult
+from txt_utils_cli.helper import (add_mp_group, get_optional, is_standard_stream,
+                                  parse_existing_file, split_adv)
+from txt_utils_cli.logging_configuration import get_file_logger, init_and_get_console_logger
+from txt_utils_cli.multiple_files import get_input_files, map_lines_in_files_ns
+from txt_utils_cli.standard_streams import map_lines_in_standard_streams_ns
+from txt_utils_cli.trimming import trim_units
+from txt_utils_cli.unit_removal import remove_units
+
+TRIM_MODES = ("start", "end", "both")
+
+# definition of a step, e.g., {"op": "trim-units", "mode": "both", "characters": ".,"}
+StepDefinition = Dict[str, Any]
+# (operates on units, method); line methods get and return the line, unit methods get and return the units of the line
+Step = Tuple[bool, Callable]
+
+
+def get_pipeline_parser(parser: ArgumentParser):
+  parser.description = "This command applies multiple operations to each line in a single pass over the file. The steps are applied in the order in which they are defined; steps from the specification file are applied first. Consecutive unit operations share the splitting of the line into units. In contrast to the `replace` command, patterns can't match across lines."
+  add_file_arguments(parser, True)
+  parser.add_argument("--spec", type=get_optional(parse_existing_file), metavar="SPEC-PATH",
+                      help="UTF-8 encoded JSON (or YAML if PyYAML is installed) file containing a list of steps, e.g., [{\"op\": \"replace-line\", \"pattern\": \"a+\", \"replace_with\": \"a\"}, {\"op\": \"replace\", \"text\": \"b\", \"replace_with\": \"c\", \"disable_regex\": true}, {\"op\": \"trim-units\", \"mode\": \"both\", \"characters\": \".,\"}, {\"op\": \"remove-units\", \"units\": [\"x\", \"y\"]}]", default=None)
+  group = parser.add_argument_group("step arguments")
+  group.add_argument("--replace-line", type=str, nargs=2, metavar=("PATTERN", "REPLACE-WITH"), dest="steps",
+                     action=AppendStepAction, const="replace-line", help="replace regex pattern in each line")
+  group.add_argument("--replace-text", type=str, nargs=2, metavar=("TEXT", "REPLACE-WITH"), dest="steps",
+                     action=AppendStepAction, const="replace", help="replace text in each line (no regex)")
+  group.add_argument("--trim-units", type=str, nargs=2, metavar=("MODE", "CHARACTERS"), dest="steps",
+                     action=AppendStepAction, const="trim-units", help=f"trim all CHARACTERS from each unit; MODE is one of: {', '.join(TRIM_MODES)}")
+  group.add_argument("--remove-units", type=str, nargs="+", metavar="UNIT-TEXT", dest="steps",
+                     action=AppendStepAction, const="remove-units", help="remove these units")
+  add_mp_group(parser)
+  return pipeline_ns
+
+
+class AppendStepAction(argparse.Action):
+  def __call__(self, parser: argparse.ArgumentParser, namespace: argparse.Namespace, values: Optional[Union[str, Sequence[Any]]], option_string: Optional[str] = None):
+    assert isinstance(values, list)
+    # Note: the default must not be modified because it is shared between the parsings
+    steps = list(getattr(namespace, self.dest) or [])
+    steps.append(get_step_definition(self.const, values))
+    setattr(namespace, self.dest, steps)
+
+
+def get_step_definition(op: str, values: List[str]) -> StepDefinition:
+  if op == "replace-line":
+    return {"op": op, "pattern": values[0], "replace_with": values[1]}
+  if op == "replace":
+    return {"op": op, "text": values[0], "replace_with": values[1], "disable_regex": True}
+  if op == "trim-units":
+    return {"op": op, "mode": values[0], "characters": values[1]}
+  if op == "remove-units":
+    return {"op": op, "units": values}
+  assert False
+
+
+def load_step_definitions(path: Path) -> List[StepDefinition]:
+  content = path.read_text("UTF-8")
+  if path.suffix.lower() in (".yml", ".yaml"):
+    try:
+      import yaml
+    except ImportError as error:
+      raise ValueError("PyYAML needs to be installed to read YAML specifications!") from error
+    result = yaml.safe_load(content)
+  else:
+    result = json.loads(content)
+  if not isinstance(result, list) or not all(isinstance(step, dict) for step in result):
+    raise ValueError("Specification needs to contain a list of steps!")
+  return result
+
+
+def get_step(definition: StepDefinition) -> Step:
+  op = definition.get("op")
+  try:
+    if op == "replace-line":
+      pattern = re.compile(definition["pattern"])
+      return False, partial(replace_in_line, pattern=pattern, replace_with=definition["replace_with"])
+    if op == "replace":
+      if definition.get("disable_regex", False):
+        return False, partial(replace_text_in_line, text=definition["text"], replace_with=definition["replace_with"])
+      pattern = re.compile(definition["text"])
+      return False, partial(replace_in_line, pattern=pattern, replace_with=definition["replace_with"])
+    if op == "trim-units":
+      mode = definition["mode"]
+      if mode not in TRIM_MODES:
+        raise ValueError(f"Trim mode \"{mode}\" is not supported!")
+      trim_characters = "".join(definition["characters"])
+      return True, partial(trim_units, mode=mode, trim_characters=trim_characters)
+    if op == "remove-units":
+      return True, partial(remove_units, remove=OrderedSet(definition["units"]))
+  except KeyError as error:
+    raise ValueError(f"Step \"{op}\" requires the argument {error}!") from error
+  except re.error as error:
+    raise ValueError(f"Pattern of step \"{op}\" is invalid: {error}") from error
+  raise ValueError(f"Step \"{op}\" is not supported!")
+
+
+def replace_in_line(line: str, pattern: Pattern[str], replace_with: str) -> str:
+  return pattern.sub(replace_with, line)
+
+
+def replace_text_in_line(line: str, text: str, replace_with: str) -> str:
+  return line.replace(text, replace_with)
+
+
+def process_line(line: str, sep: str, steps: List[Step]) -> str:
+  units: Optional[List[str]] = None
+  for operates_on_units, method in steps:
+    if operates_on_units:
+      if units is None:
+        units = split_adv(line, sep)
+      units = method(units)
+    else:
+      if units is not None:
+        line = sep.join(units)
+        units = None
+      line = method(line)
+  if units is not None:
+    line = sep.join(units)
+  return line
+
+
+def pipeline_ns(ns: Namespace) -> ExecutionResult:
+  from txt_utils.instrumentation import stage
+  from txt_utils.streaming import map_lines_in_file
+
+  logger = init_and_get_console_logger(__name__)
+  flogger = get_file_logger()
+
+  paths = get_input_files(ns)
+  if paths is None:
+    return False, False
+
+  definitions: List[StepDefinition] = []
+  if ns.spec is not None:
+    try:
+      definitions.extend(load_step_definitions(ns.spec))
+    except Exception as ex:
+      logger.error("Specification couldn't be loaded!")
+      flogger.exception(ex)
+      return False, False
+  if ns.steps is not None:
+    definitions.extend(ns.steps)
+
+  if len(definitions) == 0:
+    logger.error("At least one step needs to be defined!")
+    return False, False
+
+  try:
+    steps = [get_step(definition) for definition in definitions]
+  except ValueError as ex:
+    logger.error(f"Specification is invalid: {ex}")
+    return False, False
+
+  for step_nr, definition in enumerate(definitions, start=1):
+    flogger.debug(f"Step {step_nr}: {definition}")
+
+  method = partial(
+    process_line,
+    sep=ns.sep,
+    steps=steps,
+  )
+
+  logger.info(f"Applying {len(steps)} step(s)...")
+  with stage("Applying steps"):
+    if len(paths) > 1:
+      return map_lines_in_files_ns(paths, method, ns, "Processing")
+    if is_standard_stream(paths[0]):
+      return map_lines_in_standard_streams_ns(method, ns, "Processing")
+    try:
+      changed_count = map_lines_in_file(paths[0], method, line_sep=ns.lsep, encoding=ns.encoding, desc="Processing",
+                                        n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize)
+    except Exception as ex:
+      logger.error("File couldn't be processed!")
+      flogger.exception(ex)
+      return False, False
+
+  if changed_count == 0:
+    return True, False
+
+  logger.info(f"Changed {changed_count} line(s).")
+  return True, True
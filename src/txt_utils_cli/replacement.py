@@ -1,58 +1,222 @@
 from argparse import ArgumentParser, Namespace
+from functools import partial
 from pathlib import Path
-from typing import cast
+from typing import TYPE_CHECKING, Callable, List, Optional
 
-from txt_utils.replacement import replace_text
-from txt_utils_cli.default_args import add_file_and_enc_argument
+from txt_utils_cli.default_args import add_file_arguments
 from txt_utils_cli.globals import ExecutionResult
-from txt_utils_cli.helper import parse_non_empty
+from txt_utils_cli.helper import (add_mp_group, get_optional, is_standard_stream,
+                                  parse_existing_file, parse_non_empty)
 from txt_utils_cli.logging_configuration import get_file_logger, init_and_get_console_logger
+from txt_utils_cli.multiple_files import (collect_file_results, get_input_files,
+                                          map_lines_in_files_ns)
+from txt_utils_cli.standard_streams import map_lines_in_standard_streams_ns
+
+if TYPE_CHECKING:
+  from txt_utils.replacement import ReplacementRule
 
 
 def get_replacement_parser(parser: ArgumentParser):
-  parser.description = "This command replaces all matching regex patterns in the text with a custom text."
-  add_file_and_enc_argument(parser)
-  parser.add_argument("text", type=parse_non_empty, metavar="TEXT",
-                      help="replace text")
-  parser.add_argument("replace_with", type=str, metavar="REPLACE-WITH",
-                      help="replace text with this text")
+  parser.description = "This command replaces all matching regex patterns in the text with a custom text. If no match can contain the line separator (this is checked conservatively, see --line-bounded), the file is processed chunk-wise and in parallel; otherwise the whole file is loaded."
+  add_file_arguments(parser)
+  parser.add_argument("text", type=parse_non_empty, metavar="TEXT", nargs="?",
+                      help="replace text (required if no rules are given)", default=None)
+  parser.add_argument("replace_with", type=str, metavar="REPLACE-WITH", nargs="?",
+                      help="replace text with this text (required if no rules are given)", default=None)
   parser.add_argument("-d", "--disable-regex", action="store_true",
-                      help="disable parsing TEXT as regex pattern")
+                      help="disable parsing TEXT and the patterns of the rules as regex pattern")
+  add_rules_argument(parser)
+  parser.add_argument("--line-bounded", action="store_true",
+                      help="declare that no match contains the line separator and that the patterns behave the same in each line as in the whole text, i.e., the file can be processed chunk-wise even if this couldn't be proven")
+  add_mp_group(parser)
   return replace_ns
 
 
+def add_rules_argument(parser: ArgumentParser) -> None:
+  parser.add_argument("--rules", type=get_optional(parse_existing_file), metavar="RULES-PATH",
+                      help="file containing one rule per line in the format PATTERN<TAB>REPLACEMENT (same encoding as the text file); all rules are applied in a single scan: at each position the first matching rule is applied (of consecutive literal rules the longest one) and replaced text isn't scanned again; can't be combined with TEXT and REPLACE-WITH", default=None)
+
+
+def get_rules(rules_path: Optional[Path], pattern: Optional[str], replace_with: Optional[str], encoding: str, disable_regex: bool) -> "List[ReplacementRule]":
+  from txt_utils.replacement import read_replacement_rules
+
+  if rules_path is None:
+    if pattern is None or replace_with is None:
+      raise ValueError("Either the pattern and its replacement or --rules need to be given!")
+    return [(pattern, replace_with, not disable_regex)]
+  if pattern is not None:
+    raise ValueError("The pattern and its replacement can't be combined with --rules!")
+  return read_replacement_rules(rules_path, encoding, disable_regex=disable_regex)
+
+
 def replace_ns(ns: Namespace) -> ExecutionResult:
+  from txt_utils.compression import get_compression, read_text, write_text
+  from txt_utils.file_pool import process_files
+  from txt_utils.instrumentation import stage
+  from txt_utils.replacement import (apply_replacement_rules, compile_replacement_rules,
+                                     is_line_bounded, replace_text)
+  from txt_utils.streaming import map_lines_in_file
+
   logger = init_and_get_console_logger(__name__)
   flogger = get_file_logger()
 
+  paths = get_input_files(ns)
+  if paths is None:
+    return False, False
+
+  try:
+    rules = get_rules(ns.rules, ns.text, ns.replace_with, ns.encoding, ns.disable_regex)
+  except ValueError as ex:
+    logger.error(ex)
+    return False, False
+  except Exception as ex:
+    logger.error("Rules couldn't be loaded!")
+    flogger.exception(ex)
+    return False, False
+
+  with stage("Compiling rules") as current_stage:
+    try:
+      batches = compile_replacement_rules(rules)
+    except ValueError as ex:
+      logger.error(f"Rules are invalid: {ex}")
+      return False, False
+    current_stage.add_items(len(rules))
+  flogger.debug(f"Combined {len(rules)} rule(s) into {len(batches)} pattern(s).")
+
   # if ns.disable_regex and ns.text == ns.replace_with:
   #   logger.error("Parameter 'text' and 'replace_with' need to be different!")
   #   return False, False
 
-  path = cast(Path, ns.file)
+  line_bounded = ns.line_bounded or all(
+    is_line_bounded(pattern, ns.lsep, is_regex=is_regex)
+    for pattern, _, is_regex in rules
+  )
+
+  if line_bounded:
+    flogger.debug("Matches can't span multiple lines, therefore the file is processed chunk-wise.")
+    method = partial(
+      apply_replacement_rules,
+      batches=batches,
+    )
+    logger.info("Replacing...")
+    with stage("Replacing"):
+      if len(paths) > 1:
+        return map_lines_in_files_ns(paths, method, ns, "Replacing")
+      if is_standard_stream(paths[0]):
+        return map_lines_in_standard_streams_ns(method, ns, "Replacing")
+      try:
+        changed_count = map_lines_in_file(paths[0], method, line_sep=ns.lsep, encoding=ns.encoding, desc="Replacing",
+                                          n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize)
+      except Exception as ex:
+        logger.error("File couldn't be processed!")
+        flogger.exception(ex)
+        return False, False
+    if changed_count > 0:
+      logger.info(f"Changed {changed_count} line(s).")
+    return True, changed_count > 0
+
+  flogger.debug("Matches could span multiple lines, therefore the whole file is loaded.")
+
+  if ns.rules is None:
+    replace_method = partial(replace_text, replace=ns.text, replace_with=ns.replace_with, disable_regex=ns.disable_regex)
+  else:
+    replace_method = partial(apply_replacement_rules, batches=batches)
+
+  if len(paths) > 1:
+    logger.info("Replacing...")
+    with stage("Replacing"):
+      file_method = partial(replace_in_file, encoding=ns.encoding, method=replace_method)
+      file_results, changed = collect_file_results(process_files(
+        paths, file_method, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, desc="Replacing",
+      ))
+    changed_files = sum(1 for file_changed in changed.values() if file_changed)
+    if changed_files > 0:
+      logger.info(f"Changed {changed_files} file(s).")
+    log_file_results(file_results)
+    return all(file_results.values()), changed_files > 0
+
+  if is_standard_stream(paths[0]):
+    return replace_in_standard_streams_ns(ns, replace_method)
+
+  path = paths[0]
 
   logger.info("Loading...")
-  try:
-    content = path.read_text(ns.encoding)
-  except Exception as ex:
-    logger.error("File couldn't be loaded!")
-    flogger.exception(ex)
-    return False, False
+  with stage("Loading"):
+    try:
+      compression = get_compression(path)
+      content = read_text(path, ns.encoding)
+    except Exception as ex:
+      logger.error("File couldn't be loaded!")
+      flogger.exception(ex)
+      return False, False
 
-  new_content = replace_text(content, ns.text, ns.replace_with, disable_regex=ns.disable_regex)
+  with stage("Replacing") as current_stage:
+    if ns.rules is not None:
+      logger.info(f"Replacing using {len(rules)} rule(s)...")
+    new_content = replace_method(content)
+    current_stage.add_items(len(content))
 
   changed_anything = new_content != content
   del content
 
   if changed_anything:
     logger.info("Saving...")
+    with stage("Saving"):
+      try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_text(path, new_content, ns.encoding, compression=compression)
+      except Exception as ex:
+        logger.error("File couldn't be saved!")
+        flogger.exception(ex)
+        return False, False
+  del new_content
+
+  return True, changed_anything
+
+
+def replace_in_file(path: Path, encoding: str, method: Callable[[str], str]) -> bool:
+  from txt_utils.compression import get_compression, read_text, write_text
+
+  compression = get_compression(path)
+  content = read_text(path, encoding)
+  new_content = method(content)
+  if new_content == content:
+    return False
+  del content
+  write_text(path, new_content, encoding, compression=compression)
+  return True
+
+
+def replace_in_standard_streams_ns(ns: Namespace, method: Callable[[str], str]) -> ExecutionResult:
+  """Replaces the whole input at once because matches can span multiple lines."""
+  from txt_utils.instrumentation import stage
+  from txt_utils.streaming import open_stdin, open_stdout
+
+  logger = init_and_get_console_logger(__name__)
+  flogger = get_file_logger()
+
+  logger.info("Loading...")
+  with stage("Loading"):
     try:
-      path.parent.mkdir(parents=True, exist_ok=True)
-      path.write_text(new_content, ns.encoding)
+      with open_stdin(ns.encoding) as stream:
+        content = stream.read()
     except Exception as ex:
-      logger.error("File couldn't be saved!")
+      logger.error("Standard input couldn't be loaded!")
       flogger.exception(ex)
       return False, False
-  del new_content
 
+  with stage("Replacing") as current_stage:
+    new_content = method(content)
+    current_stage.add_items(len(content))
+  changed_anything = new_content != content
+  del content
+
+  with stage("Saving"):
+    try:
+      with open_stdout(ns.encoding) as stream:
+        stream.write(new_content)
+    except Exception as ex:
+      logger.error("Standard output couldn't be written!")
+      flogger.exception(ex)
+      return False, False
   return True, changed_anything
@@ -0,0 +1,24 @@
+from argparse import Namespace
+from typing import Callable
+
+from txt_utils_cli.globals import ExecutionResult
+from txt_utils_cli.logging_configuration import get_file_logger, init_and_get_console_logger
+
+
+def map_lines_in_standard_streams_ns(method: Callable[[str], str], ns: Namespace, desc: str) -> ExecutionResult:
+  from txt_utils.streaming import map_lines_in_stream, open_stdin, open_stdout
+
+  logger = init_and_get_console_logger(__name__)
+  flogger = get_file_logger()
+  try:
+    with open_stdin(ns.encoding) as in_stream, open_stdout(ns.encoding) as out_stream:
+      changed_count = map_lines_in_stream(in_stream, out_stream, method, line_sep=ns.lsep, desc=desc,
+                                          n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize)
+  except Exception as ex:
+    logger.error("Standard input couldn't be processed!")
+    flogger.exception(ex)
+    return False, False
+
+  if changed_count > 0:
+    logger.info(f"Changed {changed_count} line(s).")
+  return True, changed_count > 0
@@ -1,43 +1,183 @@
 from argparse import ArgumentParser, Namespace
+from collections import Counter
+from functools import partial
 from pathlib import Path
-from typing import cast
+from typing import List, Optional, Tuple
 
-from txt_utils.statistics_unit_counts import get_unit_count_statistics
 from txt_utils_cli.default_args import add_file_arguments
-from txt_utils_cli.globals import ExecutionResult
-from txt_utils_cli.helper import parse_path
+from txt_utils_cli.globals import ExecutionResult, FileResults
+from txt_utils_cli.helper import (add_mp_group, get_optional, is_standard_stream, parse_path,
+                                  parse_positive_integer, parse_probability)
 from txt_utils_cli.logging_configuration import get_file_logger, init_and_get_console_logger
+from txt_utils_cli.multiple_files import collect_file_results, get_input_files, log_file_results
 
 
 def get_unit_count_export_parser(parser: ArgumentParser):
   parser.description = "This command creates a CSV containing statistical information about the unit occurrences."
   add_file_arguments(parser, True)
-  parser.add_argument("output", type=parse_path, help="output .csv")
+  parser.add_argument("output", type=parse_path, help="output .csv; it is compressed if it ends with .gz, .bz2, .xz, .zst or .zstd; \"-\" for the standard output")
+  parser.add_argument("--top-k", type=get_optional(parse_positive_integer), metavar="N",
+                      help="export only the N most frequent units", default=None)
+  parser.add_argument("--min-count", type=get_optional(parse_positive_integer), metavar="C",
+                      help="export only units which occur at least C times", default=None)
+  approximate_group = parser.add_argument_group("approximate counting arguments")
+  approximate_group.add_argument("--approximate", action="store_true",
+                                 help="estimate the counts of the most frequent units with a fixed amount of memory (Count-Min Sketch and Space-Saving) instead of counting all units; the estimates are never lower than the true counts and at most EPSILON * total count higher, and each unit occurring more often than that is exported")
+  approximate_group.add_argument("--epsilon", type=parse_probability, metavar="EPSILON",
+                                 help="relative error of the estimates; the sketch uses about 8 * e / EPSILON * ln(1 / DELTA) bytes and at most 1 / EPSILON units are kept; if not given, the default of txt_utils.unit_count_sketch is used", default=None)
+  approximate_group.add_argument("--delta", type=parse_probability, metavar="DELTA",
+                                 help="probability that the estimate of the sketch exceeds the relative error; the error of the exported units is bounded by EPSILON nevertheless; if not given, the default of txt_utils.unit_count_sketch is used", default=None)
+  add_mp_group(parser)
   return get_word_count_ns
 
 
 def get_word_count_ns(ns: Namespace) -> ExecutionResult:
+  from txt_utils.file_pool import process_files
+  from txt_utils.instrumentation import stage
+  from txt_utils.statistics_unit_counts import (get_sorted_unit_counts, get_unit_counts,
+                                                get_unit_counts_from_file)
+  from txt_utils.streaming import iter_split_stream, open_stdin
+
   logger = init_and_get_console_logger(__name__)
   flogger = get_file_logger()
-  path = cast(Path, ns.file)
-  logger.info("Loading...")
-  try:
-    content = path.read_text(ns.encoding)
-  except Exception as ex:
-    logger.error("File couldn't be loaded!")
-    flogger.exception(ex)
+  paths = get_input_files(ns)
+  if paths is None:
     return False, False
 
-  df = get_unit_count_statistics(content, line_sep=ns.lsep, word_sep=ns.sep, silent=False)
+  if ns.approximate:
+    return get_approximate_word_count_ns(ns, paths)
 
-  logger.info("Saving...")
+  file_results = None
+  logger.info("Counting...")
+  with stage("Counting") as current_stage:
+    if len(paths) > 1:
+      file_method = partial(
+        get_unit_counts_from_file, encoding=ns.encoding, line_sep=ns.lsep, word_sep=ns.sep, n_jobs=1, silent=True,
+      )
+      file_results, file_counters = collect_file_results(process_files(
+        paths, file_method, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, desc="Counting",
+      ))
+      total_counter: "Counter[str]" = Counter()
+      for file_counter in file_counters.values():
+        total_counter.update(file_counter)
+      del file_counters
+    elif is_standard_stream(paths[0]):
+      try:
+        with open_stdin(ns.encoding) as stream:
+          total_counter = get_unit_counts(iter_split_stream(stream, ns.lsep), word_sep=ns.sep, n_jobs=ns.n_jobs,
+                                          maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, silent=False)
+      except Exception as ex:
+        logger.error("Standard input couldn't be loaded!")
+        flogger.exception(ex)
+        return False, False
+    else:
+      try:
+        total_counter = get_unit_counts_from_file(
+          paths[0], ns.encoding, line_sep=ns.lsep, word_sep=ns.sep, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, silent=False,
+        )
+      except Exception as ex:
+        logger.error("File couldn't be loaded!")
+        flogger.exception(ex)
+        return False, False
+    current_stage.add_items(sum(total_counter.values()))
+
+  with stage("Sorting") as current_stage:
+    counts = get_sorted_unit_counts(total_counter, top_k=ns.top_k, min_count=ns.min_count)
+    del total_counter
+    current_stage.add_items(len(counts))
 
-  try:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(ns.output, sep=";", header=True, index=False, encoding=ns.encoding)
-  except Exception as ex:
-    logger.error("Output couldn't be saved!")
-    flogger.exception(ex)
+  if not save_unit_counts_ns(ns, counts):
     return False, False
-  logger.info(f"Saved output to: \"{ns.output.absolute()}\".")
+  if file_results is not None:
+    log_file_results(file_results)
+    return all(file_results.values()), True
   return True, True
+
+
+def get_approximate_word_count_ns(ns: Namespace, paths: List[Path]) -> ExecutionResult:
+  from txt_utils.instrumentation import stage
+  from txt_utils.statistics_unit_counts import (get_approximate_unit_counts_from_file,
+                                                iter_unit_counts_of_lines)
+  from txt_utils.streaming import iter_split_stream, open_stdin
+  from txt_utils.unit_count_sketch import DEFAULT_DELTA, DEFAULT_EPSILON, ApproximateUnitCounts
+
+  logger = init_and_get_console_logger(__name__)
+  flogger = get_file_logger()
+  approximate_counts = ApproximateUnitCounts(
+    DEFAULT_EPSILON if ns.epsilon is None else ns.epsilon,
+    DEFAULT_DELTA if ns.delta is None else ns.delta,
+  )
+  file_results: Optional[FileResults] = None
+  logger.info("Counting approximately...")
+  with stage("Counting") as current_stage:
+    if is_standard_stream(paths[0]):
+      try:
+        with open_stdin(ns.encoding) as stream:
+          chunk_counters = iter_unit_counts_of_lines(
+            iter_split_stream(stream, ns.lsep), word_sep=ns.sep, n_jobs=ns.n_jobs,
+            maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, silent=False,
+          )
+          for chunk_counter in chunk_counters:
+            approximate_counts.update(chunk_counter)
+      except Exception as ex:
+        logger.error("Standard input couldn't be loaded!")
+        flogger.exception(ex)
+        return False, False
+    else:
+      file_results = {}
+      for path in paths:
+        try:
+          get_approximate_unit_counts_from_file(
+            path, ns.encoding, line_sep=ns.lsep, word_sep=ns.sep, approximate_counts=approximate_counts,
+            n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, silent=False,
+          )
+        except Exception as ex:
+          # the counts of the lines before the error can't be removed from the estimates
+          logger.error(f"File couldn't be loaded: {path.absolute()}")
+          flogger.exception(ex)
+          file_results[path] = False
+          continue
+        file_results[path] = True
+      if len(paths) == 1 and not file_results[paths[0]]:
+        return False, False
+    current_stage.add_items(approximate_counts.total)
+
+  logger.info(f"Counted {approximate_counts.total} occurrence(s); each estimated count is at most {approximate_counts.max_error} higher than the true count.")
+  with stage("Sorting") as current_stage:
+    counts = approximate_counts.get_sorted_counts(top_k=ns.top_k, min_count=ns.min_count)
+    del approximate_counts
+    current_stage.add_items(len(counts))
+
+  if not save_unit_counts_ns(ns, counts):
+    return False, False
+  if file_results is not None and len(paths) > 1:
+    log_file_results(file_results)
+    return all(file_results.values()), True
+  return True, True
+
+
+def save_unit_counts_ns(ns: Namespace, counts: List[Tuple[int, str]]) -> bool:
+  from txt_utils.instrumentation import stage
+  from txt_utils.statistics_unit_counts import (write_unit_counts_csv,
+                                                write_unit_counts_csv_to_stream)
+  from txt_utils.streaming import open_stdout
+
+  logger = init_and_get_console_logger(__name__)
+  flogger = get_file_logger()
+  logger.info("Saving...")
+
+  with stage("Saving") as current_stage:
+    try:
+      if is_standard_stream(ns.output):
+        with open_stdout(ns.encoding, newline="") as stream:
+          write_unit_counts_csv_to_stream(stream, counts)
+      else:
+        write_unit_counts_csv(ns.output, counts, ns.encoding)
+    except Exception as ex:
+      logger.error("Output couldn't be saved!")
+      flogger.exception(ex)
+      return False
+    current_stage.add_items(len(counts))
+  if not is_standard_stream(ns.output):
+    logger.info(f"Saved output to: \"{ns.output.absolute()}\".")
+  return True
@@ -1,16 +1,18 @@
 from argparse import ArgumentParser, Namespace
+from functools import partial
 from pathlib import Path
-from typing import cast
+from typing import TYPE_CHECKING, List, Mapping, Optional, Set
 
-from pronunciation_dictionary import DeserializationOptions, MultiprocessingOptions, load_dict
-
-from txt_utils.transcription import transcribe_text_using_dict
 from txt_utils_cli.default_args import add_file_arguments
-from txt_utils_cli.globals import ExecutionResult
+from txt_utils_cli.globals import DEFAULT_DICT_CACHE_SIZE_MB, ExecutionResult, FileResults
 from txt_utils_cli.helper import (add_encoding_argument, add_mp_group, get_optional,
-                                  parse_existing_file, parse_non_negative_integer,
-                                  parse_positive_integer)
+                                  is_standard_stream, parse_existing_file,
+                                  parse_non_negative_integer, parse_path, parse_positive_integer)
 from txt_utils_cli.logging_configuration import get_file_logger, init_and_get_console_logger
+from txt_utils_cli.multiple_files import collect_file_results, get_input_files, log_file_results
+
+if TYPE_CHECKING:
+  from pronunciation_dictionary import Pronunciations
 
 
 def get_transcription_parser(parser: ArgumentParser):
@@ -24,6 +26,8 @@ def get_transcription_parser(parser: ArgumentParser):
                       help="seed for choosing the pronunciation from the dictionary regarding their weights (only useful if there exist words with multiple pronunciations)", default=None)
   parser.add_argument("--ignore-missing", action="store_true",
                       help="keep marks missing in dictionary unchanged")
+  parser.add_argument("--vocabulary-first", action="store_true",
+                      help="extract the vocabulary of the text first and look up each unit only once; recommended if the vocabulary is much smaller than the amount of units")
   mp_group = add_mp_group(parser)
   mp_group.add_argument("-sd", "--chunksize-dictionary", type=parse_positive_integer,
                         metavar="NUMBER", help="amount of lines to chunk into one job while parsing the dictionary", default=100000)
@@ -42,18 +46,32 @@ def add_deserialization_group(parser: ArgumentParser) -> None:
                      help="consider comments in pronunciations")
   group.add_argument("-cw", "--consider-weights", action="store_true",
                      help="consider weights")
+  add_dictionary_cache_group(parser)
+
+
+def add_dictionary_cache_group(parser: ArgumentParser) -> None:
+  group = parser.add_argument_group('dictionary cache arguments')
+  group.add_argument("--no-dict-cache", action="store_true",
+                     help="don't use the cache for parsed dictionaries and parse the dictionary each time")
+  group.add_argument("--dict-cache-dir", type=parse_path, metavar="PATH",
+                     help="directory in which the parsed dictionaries are cached; if not given, txt-utils in the cache directory of the user is used", default=None)
+  group.add_argument("--dict-cache-size", type=parse_non_negative_integer, metavar="MB",
+                     help="maximum size of the dictionary cache in megabytes; the least recently used dictionaries are removed first", default=DEFAULT_DICT_CACHE_SIZE_MB)
 
 
 def transcribe_ns(ns: Namespace) -> ExecutionResult:
+  from pronunciation_dictionary import DeserializationOptions, MultiprocessingOptions, load_dict
+
+  from txt_utils.dictionary_cache import load_dict_cached
+  from txt_utils.instrumentation import stage
+  from txt_utils.streaming import read_lines, write_lines_atomically
+  from txt_utils.transcription import transcribe_lines_using_dict
+  from txt_utils.vocabulary_exporting import extract_vocabulary_from_file
+
   logger = init_and_get_console_logger(__name__)
   flogger = get_file_logger()
-  path = cast(Path, ns.file)
-  logger.info("Loading...")
-  try:
-    content = path.read_text(ns.encoding)
-  except Exception as ex:
-    logger.error("File couldn't be loaded!")
-    flogger.exception(ex)
+  paths = get_input_files(ns)
+  if paths is None:
     return False, False
 
   mp_options = MultiprocessingOptions(ns.n_jobs, ns.maxtasksperchild, ns.chunksize_dictionary)
@@ -61,28 +79,122 @@ def transcribe_ns(ns: Namespace) -> ExecutionResult:
                                    ns.consider_pronunciation_comments, ns.consider_weights)
 
   logger.info("Loading dictionary...")
-  try:
-    pronunciation_dictionary = load_dict(ns.dictionary, ns.encoding, options, mp_options)
-  except Exception as ex:
-    logger = init_and_get_console_logger(__name__)
-    logger.error("Pronunciation dictionary couldn't be read!")
-    flogger = get_file_logger()
-    flogger.exception(ex)
-    return False, False
+  with stage("Loading dictionary") as current_stage:
+    try:
+      if ns.no_dict_cache:
+        pronunciation_dictionary = load_dict(ns.dictionary, ns.dict_encoding, options, mp_options)
+      else:
+        pronunciation_dictionary = load_dict_cached(
+          ns.dictionary, ns.dict_encoding, options, mp_options,
+          cache_dir=ns.dict_cache_dir, max_cache_size=ns.dict_cache_size * 1024 ** 2,
+        )
+    except Exception as ex:
+      logger = init_and_get_console_logger(__name__)
+      logger.error("Pronunciation dictionary couldn't be read!")
+      flogger = get_file_logger()
+      flogger.exception(ex)
+      return False, False
+    current_stage.add_items(len(pronunciation_dictionary))
 
-  new_content = transcribe_text_using_dict(
-    content, pronunciation_dictionary,
-    line_sep=ns.lsep, phoneme_sep=ns.psep, word_sep=ns.sep, seed=ns.seed, ignore_missing=ns.ignore_missing, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, silent=False,
-  )
+  if len(paths) > 1:
+    return transcribe_files_ns(ns, paths, pronunciation_dictionary)
+  if is_standard_stream(paths[0]):
+    return transcribe_standard_streams_ns(ns, pronunciation_dictionary)
 
-  logger.info("Saving...")
+  path = paths[0]
+  vocabulary = None
+  if ns.vocabulary_first:
+    logger.info("Extracting vocabulary...")
+    with stage("Extracting vocabulary") as current_stage:
+      try:
+        vocabulary = extract_vocabulary_from_file(
+          path, ns.encoding, line_sep=ns.lsep, word_sep=ns.sep, include_empty=True, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, silent=False,
+        )
+      except Exception as ex:
+        logger.error("File couldn't be loaded!")
+        flogger.exception(ex)
+        return False, False
+      current_stage.add_items(len(vocabulary))
 
-  try:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(new_content, ns.encoding)
-  except Exception as ex:
-    logger.error("File couldn't be saved!")
-    flogger.exception(ex)
-    return False, False
-  del new_content
+  logger.info("Transcribing...")
+  with stage("Transcribing") as current_stage:
+    try:
+      lines = read_lines(path, ns.lsep, ns.encoding)
+      new_lines = transcribe_lines_using_dict(
+        lines, pronunciation_dictionary,
+        phoneme_sep=ns.psep, word_sep=ns.sep, seed=ns.seed, ignore_missing=ns.ignore_missing, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, vocabulary=vocabulary, silent=False,
+      )
+      line_count = write_lines_atomically(path, new_lines, ns.lsep, ns.encoding)
+    except Exception as ex:
+      logger.error("File couldn't be transcribed!")
+      flogger.exception(ex)
+      return False, False
+    current_stage.add_items(line_count)
+  return True, True
+
+
+def transcribe_files_ns(ns: Namespace, paths: List[Path], pronunciation_dictionary: "Mapping[str, Pronunciations]") -> ExecutionResult:
+  from txt_utils.file_pool import process_files
+  from txt_utils.instrumentation import stage
+  from txt_utils.transcription import transcribe_files_using_dict
+  from txt_utils.vocabulary_exporting import extract_vocabulary_from_file
+
+  logger = init_and_get_console_logger(__name__)
+
+  vocabulary: Optional[Set[str]] = None
+  vocabulary_results: FileResults = {}
+  if ns.vocabulary_first:
+    logger.info("Extracting vocabulary...")
+    with stage("Extracting vocabulary") as current_stage:
+      file_method = partial(
+        extract_vocabulary_from_file, encoding=ns.encoding, line_sep=ns.lsep, word_sep=ns.sep, include_empty=True, n_jobs=1, silent=True,
+      )
+      vocabulary_results, file_vocabularies = collect_file_results(process_files(
+        paths, file_method, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, desc="Extracting vocabulary",
+      ))
+      vocabulary = set()
+      for file_vocabulary in file_vocabularies.values():
+        vocabulary.update(file_vocabulary)
+      del file_vocabularies
+      current_stage.add_items(len(vocabulary))
+    # files which couldn't be read aren't transcribed
+    paths = [path for path in paths if vocabulary_results[path]]
+
+  logger.info("Transcribing...")
+  with stage("Transcribing") as current_stage:
+    file_results, line_counts = collect_file_results(transcribe_files_using_dict(
+      paths, pronunciation_dictionary, ns.encoding,
+      line_sep=ns.lsep, word_sep=ns.sep, phoneme_sep=ns.psep, seed=ns.seed, ignore_missing=ns.ignore_missing, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, vocabulary=vocabulary,
+    ))
+    current_stage.add_items(sum(line_counts.values()))
+  file_results.update((path, False) for path, success in vocabulary_results.items() if not success)
+  log_file_results(file_results)
+  return all(file_results.values()), len(line_counts) > 0
+
+
+def transcribe_standard_streams_ns(ns: Namespace, pronunciation_dictionary: "Mapping[str, Pronunciations]") -> ExecutionResult:
+  from txt_utils.instrumentation import stage
+  from txt_utils.streaming import iter_split_stream, open_stdin, open_stdout, write_lines
+  from txt_utils.transcription import transcribe_lines_using_dict
+
+  logger = init_and_get_console_logger(__name__)
+  flogger = get_file_logger()
+  if ns.vocabulary_first:
+    logger.warning("The vocabulary can't be extracted first from the standard input, therefore each unit is looked up separately.")
+
+  logger.info("Transcribing...")
+  with stage("Transcribing") as current_stage:
+    try:
+      with open_stdin(ns.encoding) as in_stream, open_stdout(ns.encoding) as out_stream:
+        lines = iter_split_stream(in_stream, ns.lsep)
+        new_lines = transcribe_lines_using_dict(
+          lines, pronunciation_dictionary,
+          phoneme_sep=ns.psep, word_sep=ns.sep, seed=ns.seed, ignore_missing=ns.ignore_missing, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, silent=False,
+        )
+        line_count = write_lines(out_stream, new_lines, ns.lsep)
+    except Exception as ex:
+      logger.error("Standard input couldn't be transcribed!")
+      flogger.exception(ex)
+      return False, False
+    current_stage.add_items(line_count)
   return True, True
@@ -1,13 +1,14 @@
 from argparse import ArgumentParser, Namespace
-from pathlib import Path
-from typing import cast
-
-from tqdm import tqdm
+from functools import partial
+from typing import List
 
 from txt_utils_cli.default_args import add_file_arguments
 from txt_utils_cli.globals import ExecutionResult
-from txt_utils_cli.helper import ConvertToOrderedSetAction, parse_non_empty
+from txt_utils_cli.helper import (ConvertToOrderedSetAction, add_mp_group, is_standard_stream,
+                                  parse_non_empty, split_adv)
 from txt_utils_cli.logging_configuration import get_file_logger, init_and_get_console_logger
+from txt_utils_cli.multiple_files import get_input_files, map_lines_in_files_ns
+from txt_utils_cli.standard_streams import map_lines_in_standard_streams_ns
 
 
 def get_trimming_parser(parser: ArgumentParser):
@@ -17,56 +18,62 @@ def get_trimming_parser(parser: ArgumentParser):
                       "start", "end", "both"], help="trim mode: start = only from start; end = only from end; both = start + end")
   parser.add_argument("characters", type=parse_non_empty, nargs="+",
                       help="trim these characters from each unit", action=ConvertToOrderedSetAction)
+  add_mp_group(parser)
   return trim_ns
 
 
 def trim_ns(ns: Namespace) -> ExecutionResult:
+  from txt_utils.instrumentation import stage
+  from txt_utils.streaming import map_lines_in_file
+
   logger = init_and_get_console_logger(__name__)
   flogger = get_file_logger()
 
-  path = cast(Path, ns.file)
-
-  logger.info("Loading...")
-  try:
-    content = path.read_text(ns.encoding)
-  except Exception as ex:
-    logger.error("File couldn't be loaded!")
-    flogger.exception(ex)
+  paths = get_input_files(ns)
+  if paths is None:
     return False, False
 
-  logger.info("Splitting lines...")
-  lines = content.split(ns.lsep)
-
-  changed_anything = False
-  trim_characters = ''.join(ns.characters)
-  for i, line in enumerate(tqdm(lines, desc="Trimming", unit=" line(s)")):
-    units_l = line.split(ns.sep)
-    units = (strip_str(unit, ns.mode, trim_characters) for unit in units_l)
-    # why not?
-    # symbols = (symbol for symbol in symbols if symbol != "")
-    new_line = ns.sep.join(units)
-    if line != new_line:
-      changed_anything = True
-      lines[i] = new_line
-
-  if not changed_anything:
+  method = partial(
+    trim_line,
+    sep=ns.sep,
+    mode=ns.mode,
+    trim_characters=''.join(ns.characters),
+  )
+
+  logger.info("Trimming...")
+  with stage("Trimming"):
+    if len(paths) > 1:
+      return map_lines_in_files_ns(paths, method, ns, "Trimming")
+    if is_standard_stream(paths[0]):
+      return map_lines_in_standard_streams_ns(method, ns, "Trimming")
+    try:
+      changed_count = map_lines_in_file(paths[0], method, line_sep=ns.lsep, encoding=ns.encoding, desc="Trimming",
+                                        n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize)
+    except Exception as ex:
+      logger.error("File couldn't be processed!")
+      flogger.exception(ex)
+      return False, False
+
+  if changed_count == 0:
     return True, False
 
-  logger.info("Rejoining lines...")
-  new_content = ns.lsep.join(lines)
-  del lines
-  logger.info("Saving...")
-  try:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(new_content, ns.encoding)
-  except Exception as ex:
-    logger.error("File couldn't be saved!")
-    flogger.exception(ex)
-    return False, False
-  del content
+  logger.info(f"Changed {changed_count} line(s).")
   return True, True
 
 
+def trim_line(line: str, sep: str, mode: str, trim_characters: str) -> str:
+  units_l = split_adv(line, sep)
+  units = trim_units(units_l, mode, trim_characters)
+  # why not?
+  # symbols = (symbol for symbol in symbols if symbol != "")
+  new_line = sep.join(units)
+  return new_line
+
+
+def trim_units(units: List[str], mode: str, trim_characters: str) -> List[str]:
+  return [strip_str(unit, mode, trim_characters) for unit in units]
+
+
 def strip_str(s: str, mode: str, trim_characters: str) -> str:
   if mode == "start":
     return s.lstrip(trim_characters)
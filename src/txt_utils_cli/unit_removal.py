@@ -1,13 +1,16 @@
 from argparse import ArgumentParser, Namespace
-from pathlib import Path
-from typing import cast
+from functools import partial
+from typing import List
 
-from tqdm import tqdm
+from ordered_set import OrderedSet
 
 from txt_utils_cli.default_args import add_file_arguments
 from txt_utils_cli.globals import ExecutionResult
-from txt_utils_cli.helper import ConvertToOrderedSetAction, split_adv
+from txt_utils_cli.helper import (ConvertToOrderedSetAction, add_mp_group, is_standard_stream,
+                                  split_adv)
 from txt_utils_cli.logging_configuration import get_file_logger, init_and_get_console_logger
+from txt_utils_cli.multiple_files import get_input_files, map_lines_in_files_ns
+from txt_utils_cli.standard_streams import map_lines_in_standard_streams_ns
 
 
 def get_unit_removal_parser(parser: ArgumentParser):
@@ -15,51 +18,54 @@ def get_unit_removal_parser(parser: ArgumentParser):
   add_file_arguments(parser, True)
   parser.add_argument("units", type=str, nargs="+", metavar="UNIT-TEXT",
                       help="remove these units", action=ConvertToOrderedSetAction)
+  add_mp_group(parser)
   return remove_units_ns
 
 
 def remove_units_ns(ns: Namespace) -> ExecutionResult:
+  from txt_utils.instrumentation import stage
+  from txt_utils.streaming import map_lines_in_file
+
   logger = init_and_get_console_logger(__name__)
   flogger = get_file_logger()
 
-  path = cast(Path, ns.file)
-
-  logger.info("Loading...")
-  try:
-    content = path.read_text(ns.encoding)
-  except Exception as ex:
-    logger.error("File couldn't be loaded!")
-    flogger.exception(ex)
+  paths = get_input_files(ns)
+  if paths is None:
     return False, False
 
-  logger.info("Splitting lines...")
-  lines = content.split(ns.lsep)
+  method = partial(
+    remove_units_from_line,
+    sep=ns.sep,
+    units=ns.units,
+  )
 
-  changed_count = 0
-  for i, line in enumerate(tqdm(lines, desc="Removing units", unit=" line(s)")):
-    units_l = split_adv(line, ns.sep)
-    units = (unit for unit in units_l if unit not in ns.units)
-    new_line = ns.sep.join(units)
-    if line != new_line:
-      changed_count += 1
-      lines[i] = new_line
+  logger.info("Removing units...")
+  with stage("Removing units"):
+    if len(paths) > 1:
+      return map_lines_in_files_ns(paths, method, ns, "Removing units")
+    if is_standard_stream(paths[0]):
+      return map_lines_in_standard_streams_ns(method, ns, "Removing units")
+    try:
+      changed_count = map_lines_in_file(paths[0], method, line_sep=ns.lsep, encoding=ns.encoding, desc="Removing units",
+                                        n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize)
+    except Exception as ex:
+      logger.error("File couldn't be processed!")
+      flogger.exception(ex)
+      return False, False
 
   if changed_count == 0:
     return True, False
 
   logger.info(f"Changed {changed_count} line(s).")
-
-  logger.info("Rejoining lines...")
-  new_content = ns.lsep.join(lines)
-  del lines
-
-  logger.info("Saving...")
-  try:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(new_content, ns.encoding)
-  except Exception as ex:
-    logger.error("File couldn't be saved!")
-    flogger.exception(ex)
-    return False, False
-  del content
   return True, True
+
+
+def remove_units_from_line(line: str, sep: str, units: OrderedSet[str]) -> str:
+  units_l = split_adv(line, sep)
+  remaining_units = remove_units(units_l, units)
+  new_line = sep.join(remaining_units)
+  return new_line
+
+
+def remove_units(units: List[str], remove: OrderedSet[str]) -> List[str]:
+  return [unit for unit in units if unit not in remove]
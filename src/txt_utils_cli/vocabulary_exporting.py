@@ -1,53 +1,106 @@
 from argparse import ArgumentParser, Namespace
+from functools import partial
 from pathlib import Path
-from typing import cast
+from typing import Set, cast
 
-from txt_utils.vocabulary_exporting import extract_vocabulary_from_text
 from txt_utils_cli.default_args import add_file_arguments
 from txt_utils_cli.globals import ExecutionResult
-from txt_utils_cli.helper import add_mp_group, parse_path
+from txt_utils_cli.helper import add_mp_group, get_optional, is_standard_stream, parse_path
 from txt_utils_cli.logging_configuration import get_file_logger, init_and_get_console_logger
+from txt_utils_cli.multiple_files import collect_file_results, get_input_files, log_file_results
 
 
 def get_vocabulary_exporting_parser(parser: ArgumentParser):
   parser.description = "This command exports the unit vocabulary."
   add_file_arguments(parser, True)
   parser.add_argument("output", type=parse_path,
-                      help="output file to write the vocabulary")
+                      help="output file to write the vocabulary; it is compressed if it ends with .gz, .bz2, .xz, .zst or .zstd; \"-\" for the standard output")
   parser.add_argument("--include-empty", action="store_true",
                       help="include empty text in vocabulary if it occurs")
+  parser.add_argument("--checkpoint", type=get_optional(parse_path), metavar="FILE", default=None,
+                      help="file to store the vocabulary of the processed lines; if the file was only appended to since the last run, only the new lines are processed")
   add_mp_group(parser)
   return extract_vocabulary_ns
 
 
 def extract_vocabulary_ns(ns: Namespace) -> ExecutionResult:
+  from txt_utils.compression import write_text
+  from txt_utils.file_pool import process_files
+  from txt_utils.instrumentation import stage
+  from txt_utils.streaming import iter_split_stream, open_stdin, open_stdout
+  from txt_utils.vocabulary_exporting import (extract_vocabulary_from_file,
+                                              extract_vocabulary_from_lines, get_sorted_vocabulary)
+
   logger = init_and_get_console_logger(__name__)
   flogger = get_file_logger()
-  path = cast(Path, ns.file)
-  logger.info("Loading...")
-  try:
-    content = path.read_text(ns.encoding)
-  except Exception as ex:
-    logger.error("File couldn't be loaded!")
-    flogger.exception(ex)
+  paths = get_input_files(ns)
+  if paths is None:
     return False, False
 
-  voc = extract_vocabulary_from_text(
-    content, line_sep=ns.lsep, word_sep=ns.sep, include_empty=ns.include_empty, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, silent=False
-  )
+  file_results = None
+  logger.info("Extracting vocabulary...")
+  with stage("Extracting vocabulary") as current_stage:
+    if len(paths) > 1:
+      if ns.checkpoint is not None:
+        logger.warning("Checkpoints are only supported for a single file, therefore no checkpoint is used.")
+      file_method = partial(
+        extract_vocabulary_from_file, encoding=ns.encoding, line_sep=ns.lsep, word_sep=ns.sep, include_empty=True, n_jobs=1, silent=True,
+      )
+      file_results, file_vocabularies = collect_file_results(process_files(
+        paths, file_method, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, desc="Extracting vocabulary",
+      ))
+      all_voc: Set[str] = set()
+      for file_voc in file_vocabularies.values():
+        all_voc.update(file_voc)
+      del file_vocabularies
+      voc = get_sorted_vocabulary(all_voc, ns.include_empty)
+      del all_voc
+    elif is_standard_stream(paths[0]):
+      if ns.checkpoint is not None:
+        logger.warning("Checkpoints are only supported for files, therefore no checkpoint is used.")
+      try:
+        with open_stdin(ns.encoding) as stream:
+          voc = extract_vocabulary_from_lines(
+            iter_split_stream(stream, ns.lsep), word_sep=ns.sep, include_empty=ns.include_empty,
+            n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, silent=False,
+          )
+      except Exception as ex:
+        logger.error("Standard input couldn't be loaded!")
+        flogger.exception(ex)
+        return False, False
+    else:
+      try:
+        voc = extract_vocabulary_from_file(
+          paths[0], ns.encoding, line_sep=ns.lsep, word_sep=ns.sep, include_empty=ns.include_empty, n_jobs=ns.n_jobs, maxtasksperchild=ns.maxtasksperchild, chunksize=ns.chunksize, silent=False, checkpoint_path=ns.checkpoint,
+        )
+      except Exception as ex:
+        logger.error("File couldn't be loaded!")
+        flogger.exception(ex)
+        return False, False
+    current_stage.add_items(len(voc))
 
   logger.info("Saving...")
   output = cast(Path, ns.output)
 
-  voc_text = "\n".join(voc)
+  with stage("Saving") as current_stage:
+    voc_text = "\n".join(voc)
 
-  try:
-    output.parent.mkdir(parents=True, exist_ok=True)
-    output.write_text(voc_text, ns.encoding)
-  except Exception as ex:
-    logger.error("Vocabulary file couldn't be saved!")
-    flogger.exception(ex)
-    return False, False
-  logger.info(f"Written vocabulary to: {output.absolute()}")
+    try:
+      if is_standard_stream(output):
+        with open_stdout(ns.encoding) as stream:
+          stream.write(voc_text)
+      else:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        write_text(output, voc_text, ns.encoding)
+    except Exception as ex:
+      logger.error("Vocabulary file couldn't be saved!")
+      flogger.exception(ex)
+      return False, False
+    current_stage.add_items(len(voc))
+  if not is_standard_stream(output):
+    logger.info(f"Written vocabulary to: {output.absolute()}")
   del voc_text
+  if file_results is not None:
+    log_file_results(file_results)
+    return all(file_results.values()), True
   return True, True
@@ -0,0 +1,21 @@
+import subprocess
+import sys
+
+HEAVY_MODULES = ("pandas", "tqdm", "pronunciation_dictionary", "multiprocessing", "txt_utils.transcription")
+
+
+def test_heavy_modules_are_not_imported():
+  # a new interpreter is needed because other tests already imported these modules
+  code = (
+    "import sys\n"
+    "from txt_utils_cli.cli import _init_parser\n"
+    "_init_parser()\n"
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+  )
+  result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+  assert result.stdout.strip() == ""
+
+
+def test_version_is_determined_lazily():
+  from txt_utils_cli import cli
+  assert cli.__version__ == cli.get_version()
@@ -0,0 +1,106 @@
+import json
+import pstats
+import sys
+from io import BytesIO, TextIOWrapper
+from pathlib import Path
+
+import pytest
+
+from txt_utils.instrumentation import disable_instrumentation
+from txt_utils_cli.cli import parse_args
+
+
+def test_profile_report_contains_stages(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_text("a b\nb c", "UTF-8")
+  report_path = tmp_path / "report.json"
+
+  with pytest.raises(SystemExit) as error:
+    parse_args(["remove-units", str(path), "b", "-j", "1", "--log", "--profile-report", str(report_path)])
+  disable_instrumentation()
+
+  assert error.value.code == 0
+  assert path.read_text("UTF-8") == "a\nc"
+  stages = json.loads(report_path.read_text("UTF-8"))["stages"]
+  assert [(s["name"], s["depth"], s["items"]) for s in stages] == [
+    ("Total", 0, None), ("Removing units", 1, 2)]
+
+
+def test_profile_is_written(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_text("a b\nb c", "UTF-8")
+  profile_path = tmp_path / "profile.pstats"
+
+  with pytest.raises(SystemExit) as error:
+    parse_args(["trim-units", str(path), "both", "a", "-j", "1", "--log", "--profile", str(profile_path)])
+
+  assert error.value.code == 0
+  stats = pstats.Stats(str(profile_path))
+  assert "trim_ns" in {name for _, _, name in stats.stats}  # type: ignore
+
+
+def test_directory_is_processed_file_by_file(tmp_path: Path):
+  directory = tmp_path / "texts"
+  directory.mkdir()
+  (directory / "1.txt").write_text("a b\nb c", "UTF-8")
+  (directory / "2.txt").write_text("b", "UTF-8")
+  (directory / "3.csv").write_text("b", "UTF-8")
+
+  with pytest.raises(SystemExit) as error:
+    parse_args(["remove-units", str(directory), "b", "--include", ".txt", "-j", "1", "--log"])
+
+  assert error.value.code == 0
+  assert (directory / "1.txt").read_text("UTF-8") == "a\nc"
+  assert (directory / "2.txt").read_text("UTF-8") == ""
+  assert (directory / "3.csv").read_text("UTF-8") == "b"
+
+
+def test_vocabulary_of_multiple_files_fails_if_one_file_fails(tmp_path: Path):
+  (tmp_path / "1.txt").write_text("a b", "UTF-8")
+  (tmp_path / "2.txt").write_bytes(b"\xff c")
+  output = tmp_path / "vocabulary" / "vocabulary.out"
+
+  with pytest.raises(SystemExit) as error:
+    parse_args(["extract-vocabulary", str(tmp_path / "*.txt"), str(output), "-j", "1", "--log"])
+
+  assert error.value.code == 1
+  assert output.read_text("UTF-8") == "a\nb"
+
+
+def test_standard_input_is_written_to_standard_output(monkeypatch: pytest.MonkeyPatch, capsysbinary: pytest.CaptureFixture[bytes]):
+  monkeypatch.setattr(sys, "stdin", TextIOWrapper(BytesIO("a b\nb c".encode("UTF-8")), encoding="UTF-8"))
+
+  with pytest.raises(SystemExit) as error:
+    parse_args(["remove-units", "-", "b", "-j", "1", "--log"])
+
+  assert error.value.code == 0
+  assert capsysbinary.readouterr().out == "a\nc".encode("UTF-8")
+
+
+def test_approximate_top_k_unit_counts(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_text("a b b\nc c c\na", "UTF-8")
+  output = tmp_path / "counts.csv"
+
+  with pytest.raises(SystemExit) as error:
+    parse_args(["create-unit-occurrence-stats", str(path), str(output), "--approximate", "--top-k", "2", "-j", "1", "--log"])
+
+  assert error.value.code == 0
+  assert output.read_text("UTF-8").splitlines() == ["# Occurrences;Unit", "3;c", "2;a"]
+
+
+def test_compression_threads_per_cpu(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+  pytest.importorskip("zstandard")
+  from txt_utils import compression
+
+  monkeypatch.setattr(compression, "zstd_threads", 0)
+  path = tmp_path / "test.txt"
+  path.write_text("b a\na", "UTF-8")
+  output = tmp_path / "vocabulary.txt.zst"
+
+  with pytest.raises(SystemExit) as error:
+    parse_args(["extract-vocabulary", str(path), str(output), "--compression-threads", "-1", "-j", "1", "--log"])
+
+  assert error.value.code == 0
+  assert compression.zstd_threads == -1
+  assert compression.read_text(output, "UTF-8") == "a\nb"
@@ -0,0 +1,35 @@
+import pytest
+
+from txt_utils_cli.pipeline import get_step
+
+
+def test_replace_uses_regex_by_default():
+  operates_on_units, method = get_step({"op": "replace", "text": "a.", "replace_with": "x"})
+  assert not operates_on_units
+  assert method("ab a.") == "x x"
+
+
+def test_replace_with_disabled_regex():
+  _, method = get_step({"op": "replace", "text": "a.",
+                       "replace_with": "x", "disable_regex": True})
+  assert method("ab a.") == "ab x"
+
+
+def test_unknown_op_raises_error():
+  with pytest.raises(ValueError):
+    get_step({"op": "abc"})
+
+
+def test_missing_argument_raises_error():
+  with pytest.raises(ValueError):
+    get_step({"op": "trim-units", "mode": "both"})
+
+
+def test_invalid_trim_mode_raises_error():
+  with pytest.raises(ValueError):
+    get_step({"op": "trim-units", "mode": "abc", "characters": "."})
+
+
+def test_invalid_pattern_raises_error():
+  with pytest.raises(ValueError):
+    get_step({"op": "replace-line", "pattern": "(", "replace_with": ""})
@@ -0,0 +1,47 @@
+import re
+
+from ordered_set import OrderedSet
+
+from txt_utils_cli.pipeline import get_step, process_line, replace_in_line
+from txt_utils_cli.trimming import trim_line
+from txt_utils_cli.unit_removal import remove_units_from_line
+
+
+def test_component():
+  steps = [
+    get_step({"op": "replace-line", "pattern": "a+", "replace_with": "a"}),
+    get_step({"op": "trim-units", "mode": "both", "characters": ".,"}),
+    get_step({"op": "remove-units", "units": ["x", ""]}),
+    get_step({"op": "replace", "text": " ", "replace_with": "_", "disable_regex": True}),
+  ]
+
+  result = process_line("aaa, b. x ..", " ", steps)
+
+  assert result == "a_b"
+
+
+def test_is_same_as_applying_the_commands_one_after_another():
+  line = "aa, b. x .c. x"
+  steps = [
+    get_step({"op": "trim-units", "mode": "start", "characters": "."}),
+    get_step({"op": "remove-units", "units": ["x"]}),
+    get_step({"op": "replace-line", "pattern": "a+", "replace_with": "a"}),
+    get_step({"op": "trim-units", "mode": "end", "characters": ".,"}),
+  ]
+
+  expected = trim_line(line, " ", "start", ".")
+  expected = remove_units_from_line(expected, " ", OrderedSet(["x"]))
+  expected = replace_in_line(expected, re.compile("a+"), "a")
+  expected = trim_line(expected, " ", "end", ".,")
+
+  assert process_line(line, " ", steps) == expected == "a b c"
+
+
+def test_no_steps_returns_line():
+  assert process_line("a b", " ", []) == "a b"
+
+
+def test_empty_sep_trims_like_trim_units():
+  steps = [get_step({"op": "trim-units", "mode": "both", "characters": "."})]
+
+  assert process_line("a.b", "", steps) == trim_line("a.b", "", "both", ".") == "ab"
@@ -0,0 +1,74 @@
+from collections import Counter
+from typing import Tuple
+
+import pytest
+
+from txt_utils.byte_counting import count_byte_units
+
+pytest.importorskip("numpy")
+
+
+def get_expected(text: str, line_sep: str, word_sep: str) -> Counter:
+  return Counter(unit for line in text.split(line_sep) for unit in line.split(word_sep))
+
+
+def test_empty__returns_empty_unit():
+  result = count_byte_units(b"", "utf-8", "\n", " ")
+  assert result == Counter({"": 1})
+
+
+def test_component():
+  text = "a b\nb  c\n\nä b"
+  result = count_byte_units(text.encode("utf-8"), "utf-8", "\n", " ")
+  assert result == get_expected(text, "\n", " ")
+  assert result == Counter({"b": 3, "": 2, "a": 1, "c": 1, "ä": 1})
+
+
+def test_same_separators():
+  text = "a a b\na"
+  result = count_byte_units(text.encode("utf-8"), "utf-8", "\n", "\n")
+  assert result == Counter({"a a b": 1, "a": 1})
+
+
+def test_null_bytes_are_distinguished():
+  text = "\0 \0\0 \0 "
+  result = count_byte_units(text.encode("utf-8"), "utf-8", "\n", " ")
+  assert result == Counter({"\0": 2, "\0\0": 1, "": 1})
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 3, 5, 8, 1024])
+def test_block_sizes_return_same_counts(block_size: int):
+  text = "the cat sat\non the mat\n\nthe end verylongunit the\n"
+  result = count_byte_units(text.encode("utf-8"), "utf-8", "\n", " ", block_size=block_size)
+  assert result == get_expected(text, "\n", " ")
+
+
+def test_latin_1():
+  text = "é a\né"
+  result = count_byte_units(text.encode("latin-1"), "latin-1", "\n", " ")
+  assert result == Counter({"é": 2, "a": 1})
+
+
+def test_invalid_block_size__raises_value_error():
+  with pytest.raises(ValueError):
+    count_byte_units(b"a", "utf-8", "\n", " ", block_size=0)
+
+
+def get_thue_morse_units() -> Tuple[str, str]:
+  # both units have the same polynomial hash modulo 2^64 for any odd base
+  unit = "".join("ab"[bin(i).count("1") % 2] for i in range(2048))
+  return unit, unit.translate(str.maketrans("ab", "ba"))
+
+
+def test_hash_collision_in_block():
+  unit, complement = get_thue_morse_units()
+  text = f"{unit} {complement} {unit}\nx"
+  result = count_byte_units(text.encode("utf-8"), "utf-8", "\n", " ")
+  assert result == Counter({unit: 2, complement: 1, "x": 1})
+
+
+def test_hash_collision_across_blocks():
+  unit, complement = get_thue_morse_units()
+  text = f"{unit} {complement}\n{unit} {complement} {complement}"
+  result = count_byte_units(text.encode("utf-8"), "utf-8", "\n", " ", block_size=1)
+  assert result == Counter({unit: 2, complement: 3})
@@ -0,0 +1,20 @@
+from collections import Counter
+from io import BytesIO
+
+import pytest
+
+from txt_utils.byte_counting import count_byte_units_in_stream
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 100])
+def test_equals_split_counting(read_size: int):
+  pytest.importorskip("numpy")
+  text = "ä b b\nc ä\n\nb\n"
+  result = count_byte_units_in_stream(BytesIO(text.encode("UTF-8")), "UTF-8", "\n", " ", read_size=read_size)
+  assert result == Counter(unit for line in text.split("\n") for unit in line.split(" "))
+
+
+def test_carriage_return_returns_none():
+  pytest.importorskip("numpy")
+  result = count_byte_units_in_stream(BytesIO(b"a\r\nb"), "UTF-8", "\n", " ")
+  assert result is None
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+from pathlib import Path
+
+from pronunciation_dictionary import PronunciationDict
+
+from txt_utils.compact_dictionary import (CompactPronunciationDict, compile_dict, load_compact_dict,
+                                          save_compact_dict)
+
+
+def get_test_dict() -> PronunciationDict:
+  dictionary = PronunciationDict()
+  dictionary["test"] = OrderedDict(((("T", "EST"), 1.2), (("T", "E", "S", "T"), 0.5)))
+  dictionary["abc"] = OrderedDict(((("A", "BC"), 1.0),))
+  dictionary["äöü"] = OrderedDict(((("Ä", "T"), 2.0),))
+  return dictionary
+
+
+def test_component():
+  dictionary = get_test_dict()
+
+  result = CompactPronunciationDict(memoryview(compile_dict(dictionary)))
+
+  assert len(result) == 3
+  assert list(result) == ["test", "abc", "äöü"]
+  assert dict(result.items()) == dict(dictionary.items())
+  assert "xyz" not in result
+  assert "tes" not in result
+  assert result["test"] == dictionary["test"]
+  assert list(result["test"]) == list(dictionary["test"])
+
+
+def test_empty_dict():
+  result = CompactPronunciationDict(memoryview(compile_dict(PronunciationDict())))
+  assert len(result) == 0
+  assert "a" not in result
+
+
+def test_load_mapped_file(tmp_path: Path):
+  path = tmp_path / "dict.bin"
+  save_compact_dict(compile_dict(get_test_dict()), path)
+
+  result = load_compact_dict(path)
+
+  assert result.path == path
+  assert dict(result.items()) == dict(get_test_dict().items())
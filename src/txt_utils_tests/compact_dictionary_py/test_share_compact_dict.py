@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from txt_utils.compact_dictionary import (attach_compact_dict, compile_dict, load_compact_dict,
+                                          save_compact_dict, share_compact_dict)
+from txt_utils_tests.compact_dictionary_py.test_compile_dict import get_test_dict
+
+
+def test_component():
+  dictionary = get_test_dict()
+
+  with share_compact_dict(dictionary) as source:
+    result = attach_compact_dict(source)
+    assert dict(result.items()) == dict(dictionary.items())
+    del result
+
+
+def test_removed_file_is_not_needed(tmp_path: Path):
+  dictionary = get_test_dict()
+  path = tmp_path / "test.dict"
+  save_compact_dict(compile_dict(dictionary), path)
+  mapped_dictionary = load_compact_dict(path)
+
+  with share_compact_dict(mapped_dictionary) as source:
+    path.unlink()
+    result = attach_compact_dict(source)
+    assert dict(result.items()) == dict(dictionary.items())
+    del result
@@ -0,0 +1,28 @@
+import bz2
+import gzip
+import lzma
+from pathlib import Path
+
+from txt_utils.compression import BZIP2, GZIP, XZ, ZSTD, get_compression
+
+
+def test_magic_numbers(tmp_path: Path):
+  paths = [tmp_path / "a.txt", tmp_path / "b.txt", tmp_path / "c.txt"]
+  paths[0].write_bytes(gzip.compress(b"a"))
+  paths[1].write_bytes(bz2.compress(b"a"))
+  paths[2].write_bytes(lzma.compress(b"a"))
+  assert [get_compression(path) for path in paths] == [GZIP, BZIP2, XZ]
+
+
+def test_magic_number_precedes_suffix(tmp_path: Path):
+  path = tmp_path / "a.txt.gz"
+  path.write_text("BZh9 text", "UTF-8")
+  assert get_compression(path) is None
+
+
+def test_suffix_of_missing_or_empty_file(tmp_path: Path):
+  path = tmp_path / "a.txt.zst"
+  assert get_compression(path) == ZSTD
+  path.write_bytes(b"")
+  assert get_compression(path) == ZSTD
+  assert get_compression(tmp_path / "b.txt") is None
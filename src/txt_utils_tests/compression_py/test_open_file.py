@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pytest
+
+from txt_utils.compression import get_compression, is_zstandard_available, open_file
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".bz2", ".xz", ".zst"])
+def test_round_trip(tmp_path: Path, suffix: str):
+  if suffix == ".zst" and not is_zstandard_available():
+    pytest.skip("zstandard is not installed")
+  path = tmp_path / f"a.txt{suffix}"
+  with open_file(path, "w", "UTF-8") as stream:
+    stream.write("a ä\nb")
+  assert get_compression(path) is not None
+  assert path.read_bytes() != "a ä\nb".encode("UTF-8")
+  with open_file(path, encoding="UTF-8") as stream:
+    assert stream.read() == "a ä\nb"
+
+
+def test_uncompressed(tmp_path: Path):
+  path = tmp_path / "a.txt"
+  with open_file(path, "w", "UTF-8") as stream:
+    stream.write("a\r\nb")
+  with open_file(path, encoding="UTF-8") as stream:
+    assert stream.read() == "a\nb"
@@ -0,0 +1,71 @@
+import os
+from pathlib import Path
+
+from pronunciation_dictionary import DeserializationOptions, MultiprocessingOptions
+
+from txt_utils.dictionary_cache import load_dict_cached
+
+OPTIONS = DeserializationOptions(False, False, False, False)
+MP_OPTIONS = MultiprocessingOptions(1, None, 100)
+
+
+def test_component(tmp_path: Path):
+  dict_path = tmp_path / "test.dict"
+  dict_path.write_text("test  T EST\nabc  A BC\n", "UTF-8")
+  cache_dir = tmp_path / "cache"
+
+  result = load_dict_cached(dict_path, "UTF-8", OPTIONS, MP_OPTIONS, cache_dir=cache_dir)
+  cache_entries = list(cache_dir.iterdir())
+  result_cached = load_dict_cached(dict_path, "UTF-8", OPTIONS, MP_OPTIONS, cache_dir=cache_dir)
+
+  assert len(cache_entries) == 1
+  assert list(cache_dir.iterdir()) == cache_entries
+  assert result_cached.path == cache_entries[0]
+  assert dict(result_cached.items()) == dict(result.items())
+  assert list(result_cached["test"]) == [("T", "EST")]
+
+
+def test_modified_dict_is_reparsed(tmp_path: Path):
+  dict_path = tmp_path / "test.dict"
+  dict_path.write_text("test  T EST\n", "UTF-8")
+  cache_dir = tmp_path / "cache"
+  load_dict_cached(dict_path, "UTF-8", OPTIONS, MP_OPTIONS, cache_dir=cache_dir)
+
+  dict_path.write_text("test  T E S T\n", "UTF-8")
+  stat = dict_path.stat()
+  os.utime(dict_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+  result = load_dict_cached(dict_path, "UTF-8", OPTIONS, MP_OPTIONS, cache_dir=cache_dir)
+
+  assert list(result["test"]) == [("T", "E", "S", "T")]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path):
+  cache_dir = tmp_path / "cache"
+  for name in ("a", "b"):
+    dict_path = tmp_path / f"{name}.dict"
+    dict_path.write_text(f"{name}  A\n", "UTF-8")
+    load_dict_cached(dict_path, "UTF-8", OPTIONS, MP_OPTIONS, cache_dir=cache_dir, max_cache_size=0)
+    assert len(list(cache_dir.iterdir())) == 1
+
+
+def test_corrupt_entry_is_recreated(tmp_path: Path):
+  dict_path = tmp_path / "test.dict"
+  dict_path.write_text("test  T EST\n", "UTF-8")
+  cache_dir = tmp_path / "cache"
+  load_dict_cached(dict_path, "UTF-8", OPTIONS, MP_OPTIONS, cache_dir=cache_dir)
+  cache_path = next(cache_dir.iterdir())
+  cache_path.write_bytes(cache_path.read_bytes()[:100])
+
+  result = load_dict_cached(dict_path, "UTF-8", OPTIONS, MP_OPTIONS, cache_dir=cache_dir)
+
+  assert list(result["test"]) == [("T", "EST")]
+
+
+def test_cache_dir_is_private(tmp_path: Path):
+  dict_path = tmp_path / "test.dict"
+  dict_path.write_text("test  T EST\n", "UTF-8")
+  cache_dir = tmp_path / "cache"
+
+  load_dict_cached(dict_path, "UTF-8", OPTIONS, MP_OPTIONS, cache_dir=cache_dir)
+
+  assert cache_dir.stat().st_mode & 0o777 == 0o700
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from txt_utils.file_pool import process_files
+
+
+def read_file(path: Path) -> str:
+  return path.read_text("UTF-8")
+
+
+def test_component(tmp_path: Path):
+  paths = [tmp_path / "1.txt", tmp_path / "2.txt", tmp_path / "3.txt"]
+  paths[0].write_text("a", "UTF-8")
+  paths[2].write_text("c", "UTF-8")
+
+  results = {path: (result, error) for path, result, error in process_files(paths, read_file, n_jobs=2)}
+
+  assert results[paths[0]] == ("a", None)
+  assert results[paths[2]] == ("c", None)
+  assert results[paths[1]][0] is None
+  assert "FileNotFoundError" in results[paths[1]][1]
+
+
+def test_no_files():
+  assert list(process_files([], read_file)) == []
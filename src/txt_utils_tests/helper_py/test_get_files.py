@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import pytest
+
+from txt_utils.helper import get_files
+
+
+def test_directory_is_searched_recursively(tmp_path: Path):
+  (tmp_path / "b").mkdir()
+  (tmp_path / "b" / "c.txt").write_text("")
+  (tmp_path / "a.txt").write_text("")
+  (tmp_path / "d.csv").write_text("")
+  result = get_files(tmp_path, {".txt"})
+  assert result == [tmp_path / "a.txt", tmp_path / "b" / "c.txt"]
+
+
+def test_compressed_files_match_suffix_before_compression_suffix(tmp_path: Path):
+  (tmp_path / "a.txt.gz").write_text("")
+  (tmp_path / "b.csv.gz").write_text("")
+  assert get_files(tmp_path, {".txt"}) == [tmp_path / "a.txt.gz"]
+  assert get_files(tmp_path, {".gz"}) == [tmp_path / "a.txt.gz", tmp_path / "b.csv.gz"]
+
+
+def test_glob(tmp_path: Path):
+  (tmp_path / "b").mkdir()
+  (tmp_path / "b" / "c.txt").write_text("")
+  (tmp_path / "a.txt").write_text("")
+  (tmp_path / "d.csv").write_text("")
+  assert get_files(tmp_path / "*.txt") == [tmp_path / "a.txt"]
+  assert get_files(tmp_path / "**" / "*.txt") == [tmp_path / "a.txt", tmp_path / "b" / "c.txt"]
+
+
+def test_missing_file_raises_error(tmp_path: Path):
+  with pytest.raises(FileNotFoundError):
+    get_files(tmp_path / "a.txt")
+  with pytest.raises(FileNotFoundError):
+    get_files(tmp_path / "*.txt")
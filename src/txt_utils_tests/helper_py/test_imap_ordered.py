@@ -0,0 +1,9 @@
+from multiprocessing import Pool
+
+from txt_utils.helper import imap_ordered
+
+
+def test_component():
+  with Pool(2) as pool:
+    result = list(imap_ordered(pool, abs, range(0, -10, -1), window=3))
+  assert result == [(i, -i) for i in range(0, -10, -1)]
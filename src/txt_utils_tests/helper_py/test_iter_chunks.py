@@ -0,0 +1,6 @@
+from txt_utils.helper import iter_chunks
+
+
+def test_component():
+  result = list(iter_chunks(range(5), 2))
+  assert result == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,59 @@
+import pytest
+
+from txt_utils.instrumentation import (add_stage_items, disable_instrumentation,
+                                       enable_instrumentation, get_stage_report, stage)
+
+
+@pytest.fixture
+def instrumentation():
+  enable_instrumentation()
+  yield
+  disable_instrumentation()
+
+
+def test_disabled__records_nothing():
+  enable_instrumentation()
+  disable_instrumentation()
+  with stage("a") as current_stage:
+    current_stage.add_items(1)
+    add_stage_items(2)
+  assert get_stage_report() == {"stages": []}
+
+
+def test_nested_stages_are_reported_in_start_order(instrumentation):
+  with stage("a") as current_stage:
+    current_stage.add_items(1)
+    with stage("b"):
+      add_stage_items(2)
+      add_stage_items(3)
+  with stage("c"):
+    pass
+
+  stages = get_stage_report()["stages"]
+
+  assert [(s["name"], s["depth"], s["items"]) for s in stages] == [
+    ("a", 0, 1), ("b", 1, 5), ("c", 0, None)]
+  assert stages[0]["wall_time_s"] >= stages[1]["wall_time_s"] >= 0
+
+
+def test_peak_rss_of_outer_stage_includes_inner_stage(instrumentation):
+  with stage("a"):
+    with stage("b"):
+      data = bytearray(32 * 1024 ** 2)
+      data[::4096] = b"\1" * len(data[::4096])
+      del data
+
+  outer, inner = get_stage_report()["stages"]
+  if inner["peak_rss_mb"] is None:
+    pytest.skip("Peak RSS can't be determined on this platform.")
+  assert outer["peak_rss_mb"] >= inner["peak_rss_mb"] >= 32
+
+
+def test_exception__stage_is_finished(instrumentation):
+  with pytest.raises(ValueError):
+    with stage("a"):
+      raise ValueError()
+  with stage("b"):
+    pass
+
+  assert [s["depth"] for s in get_stage_report()["stages"]] == [0, 0]
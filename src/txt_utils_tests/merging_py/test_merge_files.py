@@ -0,0 +1,71 @@
+import bz2
+import gzip
+from pathlib import Path
+
+from txt_utils.merging import merge_files
+
+
+def test_component(tmp_path: Path):
+  paths = [tmp_path / "a.txt", tmp_path / "b.txt", tmp_path / "c.txt"]
+  paths[0].write_bytes("a\nä".encode("UTF-8"))
+  paths[1].write_bytes(b"")
+  paths[2].write_bytes(b"c\r\nd\r")
+  output = tmp_path / "out.txt"
+  merged_count, failed = merge_files(paths, output, "UTF-8", sep="|", buffer_size=2, silent=True)
+  assert merged_count == 3
+  assert failed == []
+  assert output.read_bytes() == "a\nä||c\nd\n".encode("UTF-8")
+
+
+def test_equals_joined_texts(tmp_path: Path):
+  paths = [tmp_path / "a.txt", tmp_path / "b.txt"]
+  paths[0].write_bytes(b"a\r")
+  paths[1].write_bytes(b"\nb\r\r\n")
+  output = tmp_path / "out.txt"
+  merge_files(paths, output, "UTF-8", buffer_size=1, read_ahead=1, silent=True)
+  assert output.read_bytes() == "\n".join(path.read_text("UTF-8") for path in paths).encode("UTF-8")
+
+
+def test_utf16_has_one_bom(tmp_path: Path):
+  paths = [tmp_path / "a.txt", tmp_path / "b.txt"]
+  paths[0].write_text("a", "UTF-16")
+  paths[1].write_text("b\r\n", "UTF-16")
+  output = tmp_path / "out.txt"
+  merge_files(paths, output, "UTF-16", silent=True)
+  assert output.read_bytes() == "a\nb\n".encode("UTF-16")
+
+
+def test_failed_file_is_left_out(tmp_path: Path):
+  paths = [tmp_path / "a.txt", tmp_path / "b.txt", tmp_path / "c.txt"]
+  paths[0].write_text("a", "UTF-16")
+  paths[1].write_bytes("b".encode("UTF-16") + b"\x00\xd8")
+  paths[2].write_text("c", "UTF-16")
+  output = tmp_path / "out.txt"
+  merged_count, failed = merge_files(paths, output, "UTF-16", buffer_size=1, silent=True)
+  assert merged_count == 2
+  assert failed == [paths[1]]
+  assert output.read_text("UTF-16") == "a\nc"
+
+
+def test_compressed_files(tmp_path: Path):
+  paths = [tmp_path / "a.txt.gz", tmp_path / "b.txt"]
+  paths[0].write_bytes(gzip.compress(b"a\r\nb"))
+  paths[1].write_bytes(b"c")
+  output = tmp_path / "out.txt.bz2"
+  merged_count, failed = merge_files(paths, output, "UTF-8", silent=True)
+  assert merged_count == 2
+  assert failed == []
+  assert bz2.decompress(output.read_bytes()) == b"a\nb\nc"
+
+
+def test_invalid_utf8_file_is_left_out(tmp_path: Path):
+  paths = [tmp_path / "a.txt", tmp_path / "b.txt", tmp_path / "c.txt", tmp_path / "d.txt"]
+  paths[0].write_bytes(b"a")
+  paths[1].write_bytes(b"b\xff")
+  paths[2].write_bytes("c\nä".encode("UTF-8")[:-1])
+  paths[3].write_bytes(b"d")
+  output = tmp_path / "out.txt"
+  merged_count, failed = merge_files(paths, output, "UTF-8", buffer_size=1, silent=True)
+  assert merged_count == 2
+  assert failed == [paths[1], paths[2]]
+  assert output.read_bytes() == b"a\nd"
@@ -0,0 +1,20 @@
+from io import BytesIO
+from pathlib import Path
+
+from txt_utils.merging import merge_files_into_stream
+
+
+class UnseekableBytesIO(BytesIO):
+  def seekable(self) -> bool:
+    return False
+
+
+def test_unseekable_stream(tmp_path: Path):
+  paths = [tmp_path / "a.txt", tmp_path / "missing.txt", tmp_path / "b.txt"]
+  paths[0].write_bytes(b"a\r\nb")
+  paths[2].write_bytes(b"c")
+  stream = UnseekableBytesIO()
+  merged_count, failed = merge_files_into_stream(paths, stream, "UTF-8", sep="|", silent=True)
+  assert merged_count == 2
+  assert failed == [paths[1]]
+  assert stream.getvalue() == b"a\nb|c"
@@ -0,0 +1,35 @@
+import pstats
+from pathlib import Path
+
+from txt_utils.profiling import (disable_worker_profiling, enable_worker_profiling,
+                                 get_worker_initializer, merge_worker_profiles)
+from txt_utils.shared_text import attach_shared_text
+from txt_utils.vocabulary_exporting import extract_vocabulary_from_file
+
+
+def test_disabled__returns_initializer():
+  assert get_worker_initializer(attach_shared_text) is attach_shared_text
+
+
+def test_workers_are_profiled(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_text("a b\nc d\ne", "UTF-8")
+  profile_dir = tmp_path / "profiles"
+  profile_dir.mkdir()
+
+  enable_worker_profiling(profile_dir)
+  try:
+    extract_vocabulary_from_file(path, "UTF-8", n_jobs=2, chunksize=1, silent=True)
+  finally:
+    disable_worker_profiling()
+  worker_count = merge_worker_profiles(profile_dir, tmp_path / "workers.pstats")
+
+  assert worker_count == 2
+  stats = pstats.Stats(str(tmp_path / "workers.pstats"))
+  function_names = {name for _, _, name in stats.stats}  # type: ignore
+  assert "get_vocab_process" in function_names
+
+
+def test_no_profiles__returns_zero(tmp_path: Path):
+  assert merge_worker_profiles(tmp_path, tmp_path / "workers.pstats") == 0
+  assert not (tmp_path / "workers.pstats").exists()
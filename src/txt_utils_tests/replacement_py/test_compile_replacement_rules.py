@@ -0,0 +1,45 @@
+import pytest
+
+from txt_utils.replacement import compile_replacement_rules
+
+
+def test_combinable_rules_result_in_one_pattern():
+  rules = [(f"w{i}", f"x{i}", i % 2 == 0) for i in range(100)]
+
+  result = compile_replacement_rules(rules)
+
+  assert len(result) == 1
+
+
+def test_duplicate_group_names_result_in_new_pattern():
+  rules = [
+    ("(?P<n>a)", "x", True),
+    ("b", "y", False),
+    ("(?P<n>c)", "z", True),
+  ]
+
+  result = compile_replacement_rules(rules)
+
+  assert len(result) == 2
+
+
+def test_backreference_results_in_own_pattern():
+  rules = [
+    ("a", "x", True),
+    (r"(a)\1", "y", True),
+    ("b", "z", True),
+  ]
+
+  result = compile_replacement_rules(rules)
+
+  assert len(result) == 3
+
+
+def test_invalid_pattern_raises_error():
+  with pytest.raises(ValueError):
+    compile_replacement_rules([("(", "x", True)])
+
+
+def test_empty_pattern_raises_error():
+  with pytest.raises(ValueError):
+    compile_replacement_rules([("", "x", False)])
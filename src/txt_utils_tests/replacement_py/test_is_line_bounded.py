@@ -0,0 +1,47 @@
+import re
+
+import pytest
+
+from txt_utils.replacement import is_line_bounded
+
+
+@pytest.mark.parametrize("pattern", [
+  r"a+", r"[ \t]+", r"[^\n]+", r".+", r"\bfoo\b", r"(?m)^a$", r"x*", r"(a)\1", r"(?i)N", r"(?:ab|c){2,}",
+])
+def test_bounded(pattern: str):
+  assert is_line_bounded(pattern, "\n")
+
+
+@pytest.mark.parametrize("pattern", [
+  r"\s+", r"[^a]", r"(?s).+", r"^a", r"a$", r"a(?=b)", r"(?<=b)a", r"\Ax", r"\W", r"a|\n", r"(",
+])
+def test_not_bounded(pattern: str):
+  assert not is_line_bounded(pattern, "\n")
+
+
+def test_empty_match_multichar_separator():
+  assert is_line_bounded(r"x+", "||")
+  assert not is_line_bounded(r"x*", "||")
+
+
+def test_ignorecase():
+  assert not is_line_bounded(r"(?i)[M-O]", "n")
+  assert is_line_bounded(r"[M-O]", "n")
+
+
+def test_word_boundary_with_word_separator():
+  assert not is_line_bounded(r"\bx", "a")
+
+
+def test_literal():
+  assert is_line_bounded("a.b", "\n", is_regex=False)
+  assert not is_line_bounded("a\nb", "\n", is_regex=False)
+
+
+@pytest.mark.parametrize("pattern", [r"a+", r"x*", r"(?m)^\w", r"\b\w", r"(?m)[^\n]$"])
+def test_same_result_for_each_line(pattern: str):
+  text = "aab\nxa a\n\nb x\na"
+  assert is_line_bounded(pattern, "\n")
+  expected = re.sub(pattern, "-", text)
+  result = "\n".join(re.sub(pattern, "-", line) for line in text.split("\n"))
+  assert result == expected
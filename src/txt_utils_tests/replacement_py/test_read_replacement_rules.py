@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import pytest
+
+from txt_utils.replacement import read_replacement_rules
+
+
+def test_component(tmp_path: Path):
+  path = tmp_path / "rules.tsv"
+  path.write_text("a+\tb\n\nc\t\nd\te\tf\n", "UTF-8")
+
+  result = read_replacement_rules(path, "UTF-8")
+
+  assert result == [
+    ("a+", "b", True),
+    ("c", "", True),
+    ("d", "e\tf", True),
+  ]
+
+
+def test_disable_regex(tmp_path: Path):
+  path = tmp_path / "rules.tsv"
+  path.write_text("a+\tb", "UTF-8")
+
+  result = read_replacement_rules(path, "UTF-8", disable_regex=True)
+
+  assert result == [("a+", "b", False)]
+
+
+def test_line_without_tab_raises_error(tmp_path: Path):
+  path = tmp_path / "rules.tsv"
+  path.write_text("a\tb\nc", "UTF-8")
+
+  with pytest.raises(ValueError):
+    read_replacement_rules(path, "UTF-8")
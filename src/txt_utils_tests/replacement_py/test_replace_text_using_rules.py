@@ -0,0 +1,104 @@
+import re
+
+from txt_utils.replacement import replace_text_using_rules
+
+
+def test_component():
+  rules = [
+    ("ab", "X", False),
+    (r"a(b+)c", r"<\1>", True),
+    ("b", "Y", False),
+  ]
+
+  result = replace_text_using_rules("abbc ab b", rules)
+
+  # "ab" precedes "a(b+)c" and the replaced text isn't scanned again
+  assert result == "XYc X Y"
+
+
+def test_leftmost_match_wins_over_rule_order():
+  rules = [
+    ("b", "1", False),
+    ("a", "2", False),
+  ]
+
+  result = replace_text_using_rules("ab", rules)
+
+  assert result == "21"
+
+
+def test_literal_rules_are_not_parsed_as_regex():
+  rules = [
+    ("a.", "x\\1", False),
+  ]
+
+  result = replace_text_using_rules("ab a.", rules)
+
+  assert result == "ab x\\1"
+
+
+def test_group_references_refer_to_own_groups():
+  rules = [
+    (r"(x)(y)", r"\2\1", True),
+    (r"(?P<first>a)(b)", r"\2\g<first>", True),
+  ]
+
+  result = replace_text_using_rules("xy ab", rules)
+
+  assert result == "yx ba"
+
+
+def test_non_combinable_rules_are_applied_after_previous_rules():
+  rules = [
+    ("a", "b", False),
+    (r"(\w)\1", "D", True),
+    ("(?i)c", "X", True),
+  ]
+
+  result = replace_text_using_rules("ab cC", rules)
+
+  assert result == "D XX"
+
+
+def test_same_as_consecutive_replacements_for_independent_rules():
+  text = "The cat sat on the mat, the end."
+  rules = [
+    ("cat", "dog", False),
+    (r"\bthe\b", "a", True),
+    (r"[,.]", "", True),
+  ]
+
+  expected = text
+  for pattern, replacement, is_regex in rules:
+    expected = re.sub(pattern if is_regex else re.escape(pattern), replacement, expected)
+
+  assert replace_text_using_rules(text, rules) == expected
+
+
+def test_empty_rules_return_text():
+  assert replace_text_using_rules("abc", []) == "abc"
+
+
+def test_longest_of_consecutive_literal_rules_wins():
+  rules = [
+    ("a", "1", False),
+    ("abc", "2", False),
+    ("ab", "3", False),
+    ("a", "4", False),
+  ]
+
+  result = replace_text_using_rules("abc ab a", rules)
+
+  assert result == "2 3 1"
+
+
+def test_rule_order_between_regex_and_literal_rules():
+  rules = [
+    ("ab", "1", False),
+    ("a.", "2", True),
+    ("abc", "3", False),
+  ]
+
+  result = replace_text_using_rules("abc ax", rules)
+
+  assert result == "1c 2"
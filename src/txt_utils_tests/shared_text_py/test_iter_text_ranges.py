@@ -0,0 +1,19 @@
+from txt_utils.shared_text import iter_text_ranges
+
+
+def test_component():
+  data = b"a\nbb\n\nc"
+  result = list(iter_text_ranges(data, len(data), b"\n", 2))
+  assert [data[offset:offset + length] for offset, length in result] == [b"a\nbb", b"\nc"]
+
+
+def test_trailing_sep():
+  data = b"a\nb\n"
+  result = list(iter_text_ranges(data, len(data), b"\n", 1))
+  assert [data[offset:offset + length] for offset, length in result] == [b"a", b"b", b""]
+
+
+def test_start_and_end():
+  data = b"a\nb\nc\nd"
+  result = list(iter_text_ranges(data, 5, b"\n", 1, start=2))
+  assert [data[offset:offset + length] for offset, length in result] == [b"b", b"c"]
@@ -0,0 +1,28 @@
+from collections import Counter
+from pathlib import Path
+
+from txt_utils.statistics_unit_counts import (get_approximate_unit_counts_from_file,
+                                              get_sorted_unit_counts)
+
+
+def test_few_units_are_counted_exactly(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_text("d d\na b b\nc c c\n\na d", "UTF-8")
+
+  result = get_approximate_unit_counts_from_file(path, "UTF-8", chunksize=2, silent=True)
+  result_parallel = get_approximate_unit_counts_from_file(path, "UTF-8", n_jobs=2, chunksize=2, silent=True)
+
+  expected = get_sorted_unit_counts(Counter({"d": 3, "c": 3, "b": 2, "a": 2, "": 1}))
+  assert result.get_sorted_counts() == result_parallel.get_sorted_counts() == expected
+  assert result.total == 11
+
+
+def test_counts_of_multiple_files_are_added(tmp_path: Path):
+  paths = [tmp_path / "a.txt", tmp_path / "b.txt"]
+  paths[0].write_text("a b", "UTF-8")
+  paths[1].write_text("b", "UTF-8")
+
+  result = get_approximate_unit_counts_from_file(paths[0], "UTF-8", silent=True)
+  get_approximate_unit_counts_from_file(paths[1], "UTF-8", approximate_counts=result, silent=True)
+
+  assert result.get_sorted_counts() == [(2, "b"), (1, "a")]
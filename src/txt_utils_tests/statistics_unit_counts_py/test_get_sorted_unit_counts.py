@@ -0,0 +1,15 @@
+from collections import Counter
+
+from txt_utils.statistics_unit_counts import get_sorted_unit_counts
+
+
+def test_component():
+  result = get_sorted_unit_counts(Counter({"b": 2, "d": 3, "a": 2, "c": 3, "e": 1}))
+  assert result == [(3, "c"), (3, "d"), (2, "a"), (2, "b"), (1, "e")]
+
+
+def test_top_k_and_min_count():
+  counter = Counter({"b": 2, "d": 3, "a": 2, "c": 3, "e": 1})
+  assert get_sorted_unit_counts(counter, top_k=3) == [(3, "c"), (3, "d"), (2, "a")]
+  assert get_sorted_unit_counts(counter, min_count=2) == [(3, "c"), (3, "d"), (2, "a"), (2, "b")]
+  assert get_sorted_unit_counts(counter, top_k=10, min_count=3) == [(3, "c"), (3, "d")]
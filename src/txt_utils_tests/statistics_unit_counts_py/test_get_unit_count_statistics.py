@@ -16,3 +16,10 @@ def test_component():
   ], columns=["# Occurrences", "Unit"], index=[0, 1, 2, 3])
 
   pandas.testing.assert_frame_equal(result, assert_res)
+
+
+def test_parallel_equals_serial():
+  content = "\n".join(("d d", "a b b", "c c c", "a d", "", "e")) * 3
+  result = get_unit_count_statistics(content, n_jobs=2, chunksize=2)
+  assert_res = get_unit_count_statistics(content)
+  pandas.testing.assert_frame_equal(result, assert_res)
@@ -0,0 +1,39 @@
+import lzma
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from txt_utils.statistics_unit_counts import get_unit_counts_from_file
+
+
+def test_parallel_equals_serial(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_bytes(b"d d\r\na b b\nc c c\n\na d")
+
+  result = get_unit_counts_from_file(path, "UTF-8", n_jobs=2, chunksize=2, silent=True)
+  assert_res = get_unit_counts_from_file(path, "UTF-8", silent=True)
+
+  assert result == assert_res
+  assert result == Counter({"d": 3, "c": 3, "b": 2, "a": 2, "": 1})
+
+
+def test_byte_counting_equals_text_counting(tmp_path: Path):
+  pytest.importorskip("numpy")
+  path = tmp_path / "test.txt"
+  path.write_text("ä b b\nc ä\n\nb", "UTF-8")
+
+  result = get_unit_counts_from_file(path, "UTF-8", silent=True)
+  result_parallel = get_unit_counts_from_file(path, "UTF-8", n_jobs=2, chunksize=2, silent=True)
+
+  assert result == result_parallel == Counter({"b": 3, "ä": 2, "c": 1, "": 1})
+
+
+def test_compressed_file(tmp_path: Path):
+  path = tmp_path / "test.txt.xz"
+  path.write_bytes(lzma.compress("ä b b\r\nc ä\n\nb".encode("UTF-8")))
+
+  result = get_unit_counts_from_file(path, "UTF-8", silent=True)
+  result_parallel = get_unit_counts_from_file(path, "UTF-8", n_jobs=2, chunksize=2, silent=True)
+
+  assert result == result_parallel == Counter({"b": 3, "ä": 2, "c": 1, "": 1})
@@ -0,0 +1,18 @@
+from collections import Counter
+from pathlib import Path
+
+from txt_utils.statistics_unit_counts import (get_sorted_unit_counts,
+                                              get_unit_count_statistics_from_counts,
+                                              write_unit_counts_csv)
+
+
+def test_equals_pandas_output(tmp_path: Path):
+  counter = Counter({"a": 2, "a;b": 3, "q\"x": 2, "l\nm": 1, "": 3, " ": 1, "ä": 2})
+  path = tmp_path / "out.csv"
+  pandas_path = tmp_path / "out_pandas.csv"
+
+  write_unit_counts_csv(path, get_sorted_unit_counts(counter), "UTF-8")
+  get_unit_count_statistics_from_counts(counter).to_csv(
+    pandas_path, sep=";", header=True, index=False, encoding="UTF-8")
+
+  assert path.read_bytes() == pandas_path.read_bytes()
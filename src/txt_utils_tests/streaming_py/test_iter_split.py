@@ -0,0 +1,17 @@
+from txt_utils.streaming import iter_split
+
+
+def test_component():
+  result = list(iter_split("a\nb\n\nc\n", "\n"))
+  assert result == ["a", "b", "", "c", ""]
+
+
+def test_empty_text():
+  result = list(iter_split("", "\n"))
+  assert result == [""]
+
+
+def test_multi_char_sep():
+  text = "aXYbXYXYcX"
+  result = list(iter_split(text, "XY"))
+  assert result == text.split("XY")
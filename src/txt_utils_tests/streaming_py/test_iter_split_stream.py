@@ -0,0 +1,29 @@
+from io import StringIO
+
+from txt_utils.streaming import iter_split_stream
+
+
+def test_component():
+  result = list(iter_split_stream(StringIO("a\nb\n\nc\n"), "\n", buffer_size=2))
+  assert result == ["a", "b", "", "c", ""]
+
+
+def test_empty_stream():
+  result = list(iter_split_stream(StringIO(""), "\n"))
+  assert result == [""]
+
+
+def test_multi_char_sep_spanning_blocks():
+  texts = ["aXYbXYXYcX", "XYXYXY", "aaXYYXXYY", "XXYXYYX", "abc", "XY"]
+  for text in texts:
+    for buffer_size in range(1, len(text) + 2):
+      result = list(iter_split_stream(StringIO(text), "XY", buffer_size=buffer_size))
+      assert result == text.split("XY"), (text, buffer_size)
+
+
+def test_overlapping_sep():
+  texts = ["aaa", "aaaa", "baaab", "a", "aa"]
+  for text in texts:
+    for buffer_size in range(1, len(text) + 2):
+      result = list(iter_split_stream(StringIO(text), "aa", buffer_size=buffer_size))
+      assert result == text.split("aa"), (text, buffer_size)
@@ -0,0 +1,105 @@
+import gzip
+import re
+from functools import partial
+from pathlib import Path
+
+from txt_utils import streaming
+from txt_utils.streaming import map_lines_in_file
+
+
+def test_component(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_text("a b\nc\nb", "UTF-8")
+
+  result = map_lines_in_file(path, lambda line: line.replace("b", "x"),
+                             line_sep="\n", encoding="UTF-8", silent=True, buffer_size=1)
+
+  assert result == 2
+  assert path.read_text("UTF-8") == "a x\nc\nx"
+  assert list(tmp_path.iterdir()) == [path]
+
+
+def test_unchanged_file_is_kept(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_text("a b\nc", "UTF-8")
+  mtime = path.stat().st_mtime_ns
+
+  result = map_lines_in_file(path, lambda line: line, line_sep="\n", encoding="UTF-8", silent=True)
+
+  assert result == 0
+  assert path.stat().st_mtime_ns == mtime
+  assert list(tmp_path.iterdir()) == [path]
+
+
+def test_parallel(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  lines = [f"a b {i}" if i % 3 == 0 else f"c {i}" for i in range(100)]
+  path.write_text("\n".join(lines), "UTF-8")
+
+  result = map_lines_in_file(path, partial(re.sub, "b", "x"), line_sep="\n",
+                             encoding="UTF-8", silent=True, n_jobs=2, chunksize=7)
+
+  assert result == 34
+  assert path.read_text("UTF-8") == "\n".join(line.replace("b", "x") for line in lines)
+  assert list(tmp_path.iterdir()) == [path]
+
+
+def test_parallel_crlf(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_bytes(b"a b\r\nc\rb\r\n\r\nb")
+
+  result = map_lines_in_file(path, partial(re.sub, "b", "x"), line_sep="\n",
+                             encoding="UTF-8", silent=True, n_jobs=2, chunksize=1)
+
+  assert result == 3
+  assert path.read_text("UTF-8") == "a x\nc\nx\n\nx"
+
+
+def test_parallel_multichar_separator(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_text("a b||c||||b", "UTF-16")
+
+  result = map_lines_in_file(path, partial(re.sub, "b", "x"), line_sep="||",
+                             encoding="UTF-16", silent=True, n_jobs=2, chunksize=2)
+
+  assert result == 2
+  assert path.read_text("UTF-16") == "a x||c||||x"
+
+
+def test_parallel_empty_file(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_text("", "UTF-8")
+
+  result = map_lines_in_file(path, partial(re.sub, "^$", "x"), line_sep="\n",
+                             encoding="UTF-8", silent=True, n_jobs=2)
+
+  assert result == 1
+  assert path.read_text("UTF-8") == "x"
+
+
+def test_compressed_file_stays_compressed(tmp_path: Path):
+  path = tmp_path / "test.txt.gz"
+  lines = [f"a b {i}" if i % 3 == 0 else f"c {i}" for i in range(100)]
+  path.write_bytes(gzip.compress("\n".join(lines).encode("UTF-8")))
+
+  result = map_lines_in_file(path, partial(re.sub, "b", "x"), line_sep="\n",
+                             encoding="UTF-8", silent=True, n_jobs=2, chunksize=7)
+
+  assert result == 34
+  assert gzip.decompress(path.read_bytes()).decode("UTF-8") == "\n".join(line.replace("b", "x") for line in lines)
+  assert list(tmp_path.iterdir()) == [path]
+
+
+def test_single_chunk_is_processed_without_pool(tmp_path: Path, monkeypatch):
+  def fail(*args, **kwargs):
+    raise AssertionError("No pool should be created!")
+
+  monkeypatch.setattr(streaming, "Pool", fail)
+  path = tmp_path / "test.txt"
+  path.write_text("a b\nc", "UTF-8")
+
+  result = map_lines_in_file(path, partial(re.sub, "b", "x"), line_sep="\n",
+                             encoding="UTF-8", silent=True, n_jobs=16)
+
+  assert result == 1
+  assert path.read_text("UTF-8") == "a x\nc"
@@ -0,0 +1,44 @@
+import re
+from functools import partial
+from io import StringIO
+
+from txt_utils import streaming
+from txt_utils.streaming import map_lines_in_stream
+
+
+def test_component():
+  in_stream = StringIO("a b\nc\nb")
+  out_stream = StringIO()
+
+  result = map_lines_in_stream(in_stream, out_stream, lambda line: line.replace("b", "x"),
+                               line_sep="\n", silent=True, buffer_size=1)
+
+  assert result == 2
+  assert out_stream.getvalue() == "a x\nc\nx"
+
+
+def test_parallel():
+  lines = [f"a b {i}" if i % 3 == 0 else f"c {i}" for i in range(100)]
+  in_stream = StringIO("\n".join(lines))
+  out_stream = StringIO()
+
+  result = map_lines_in_stream(in_stream, out_stream, partial(re.sub, "b", "x"), line_sep="\n",
+                               silent=True, n_jobs=2, chunksize=7)
+
+  assert result == 34
+  assert out_stream.getvalue() == "\n".join(line.replace("b", "x") for line in lines)
+
+
+def test_single_chunk_is_processed_without_pool(monkeypatch):
+  def fail(*args, **kwargs):
+    raise AssertionError("No pool should be created!")
+
+  monkeypatch.setattr(streaming, "Pool", fail)
+  in_stream = StringIO("a b\nc")
+  out_stream = StringIO()
+
+  result = map_lines_in_stream(in_stream, out_stream, partial(re.sub, "b", "x"),
+                               line_sep="\n", silent=True, n_jobs=16)
+
+  assert result == 1
+  assert out_stream.getvalue() == "a x\nc"
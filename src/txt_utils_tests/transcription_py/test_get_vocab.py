@@ -0,0 +1,39 @@
+from pronunciation_dictionary import PronunciationDict, Pronunciations
+
+from txt_utils.transcription import PronunciationCache, get_vocab
+
+
+def get_test_dict() -> PronunciationDict:
+  dictionary = PronunciationDict()
+  dictionary["a"] = Pronunciations()
+  dictionary["a"][("A",)] = 1.0
+  dictionary["b"] = Pronunciations()
+  dictionary["b"][("B1",)] = 1.0
+  dictionary["b"][("B2",)] = 1.0
+  return dictionary
+
+
+def test_single_pronunciations_are_cached():
+  cache = PronunciationCache(10)
+
+  result = get_vocab(["a b a", "a x"], " ", get_test_dict(), 1, False, "|", cache)
+
+  assert result == ["A| |B1| |A", "A"]
+  assert cache.entries == {"a": "A", "x": None}
+  assert cache.hits == 2
+  assert cache.misses == 3
+
+
+def test_cache_size_is_bounded():
+  cache = PronunciationCache(1)
+
+  get_vocab(["x a"], " ", get_test_dict(), None, False, "|", cache)
+
+  assert cache.entries == {"x": None}
+
+
+def test_seeded_result_equals_uncached_result():
+  lines = ["b a b", "b"] * 10
+  cached = get_vocab(lines, " ", get_test_dict(), 5, False, "|", PronunciationCache(10))
+  uncached = get_vocab(lines, " ", get_test_dict(), 5, False, "|")
+  assert cached == uncached
@@ -0,0 +1,20 @@
+from pronunciation_dictionary import PronunciationDict, Pronunciations
+
+from txt_utils.transcription import resolve_vocabulary
+
+
+def test_component():
+  dictionary = PronunciationDict()
+  dictionary["a"] = Pronunciations()
+  dictionary["a"][("A", "1")] = 1.0
+  dictionary["b"] = Pronunciations()
+  dictionary["b"][("B1",)] = 1.0
+  dictionary["b"][("B2",)] = 1.0
+  dictionary["c"] = Pronunciations()
+  dictionary["c"][("C",)] = 1.0
+
+  dictionary_trimmed, lookup_table = resolve_vocabulary(["a", "b", "x"], dictionary, None, "|")
+
+  assert list(dictionary_trimmed.keys()) == ["b"]
+  assert dictionary_trimmed["b"] == dictionary["b"]
+  assert lookup_table == {"a": "A|1", "x": None}
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from pronunciation_dictionary import PronunciationDict, Pronunciations
+
+from txt_utils.transcription import transcribe_files_using_dict
+
+
+def get_dictionary() -> PronunciationDict:
+  dictionary = PronunciationDict()
+  dictionary["a"] = Pronunciations()
+  dictionary["a"][("A",)] = 1
+  dictionary["b"] = Pronunciations()
+  dictionary["b"][("B", "B")] = 1
+  return dictionary
+
+
+def test_component(tmp_path: Path):
+  paths = [tmp_path / "1.txt", tmp_path / "2.txt"]
+  paths[0].write_text("a b\nb", "UTF-8")
+  paths[1].write_text("b a\nc", "UTF-8")
+
+  results = list(transcribe_files_using_dict(paths, get_dictionary(), "UTF-8", chunksize=1, n_jobs=2))
+
+  assert sorted(results) == [(paths[0], 2, None), (paths[1], 2, None)]
+  assert paths[0].read_text("UTF-8") == "A| |B|B\nB|B"
+  assert paths[1].read_text("UTF-8") == "B|B| |A\n"
+
+
+def test_vocabulary(tmp_path: Path):
+  paths = [tmp_path / "1.txt", tmp_path / "2.txt"]
+  paths[0].write_text("a b", "UTF-8")
+  paths[1].write_text("b a c", "UTF-8")
+
+  results = list(transcribe_files_using_dict(
+    paths, get_dictionary(), "UTF-8", ignore_missing=True, vocabulary={"a", "b", "c"}, n_jobs=1))
+
+  assert all(error is None for _, _, error in results)
+  assert paths[0].read_text("UTF-8") == "A| |B|B"
+  assert paths[1].read_text("UTF-8") == "B|B| |A| |c"
@@ -13,3 +13,46 @@ def test_component():
   result = transcribe_text_using_dict("test abc\nxyz abc", dictionary)
 
   assert result == 'T|EST| |A|BC\nA|BC'
+
+
+def test_multiple_chunks_keep_order():
+  dictionary = PronunciationDict()
+  dictionary["a"] = Pronunciations()
+  dictionary["a"][("A",)] = 1
+  dictionary["b"] = Pronunciations()
+  dictionary["b"][("B", "B")] = 1
+
+  content = "\n".join(("a b", "b", "a", "b a") * 5)
+  result = transcribe_text_using_dict(content, dictionary, chunksize=1, n_jobs=2)
+
+  assert result == "\n".join(("A| |B|B", "B|B", "A", "B|B| |A") * 5)
+
+
+def test_empty_text():
+  result = transcribe_text_using_dict("", PronunciationDict())
+  assert result == ""
+
+
+def test_ignore_missing_keeps_missing_words():
+  dictionary = PronunciationDict()
+  dictionary["abc"] = Pronunciations()
+  dictionary["abc"][("A", "BC")] = 1.3
+
+  result = transcribe_text_using_dict("xyz abc\nxyz", dictionary, ignore_missing=True)
+
+  assert result == 'xyz| |A|BC\nxyz'
+
+
+def test_vocabulary_first():
+  dictionary = PronunciationDict()
+  dictionary["test"] = Pronunciations()
+  dictionary["test"][("T", "EST")] = 1.2
+  dictionary["abc"] = Pronunciations()
+  dictionary["abc"][("A", "BC")] = 1.3
+  dictionary["abc"][("A", "B", "C")] = 1.3
+  content = "test abc\nxyz abc\n\nabc test"
+
+  result = transcribe_text_using_dict(content, dictionary, seed=1, vocabulary_first=True)
+  result_default = transcribe_text_using_dict(content, dictionary, seed=1)
+
+  assert result == result_default
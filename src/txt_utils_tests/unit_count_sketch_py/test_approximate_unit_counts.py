@@ -0,0 +1,57 @@
+import random
+from collections import Counter
+
+from txt_utils.unit_count_sketch import ApproximateUnitCounts, CountMinSketch, SpaceSaving
+
+
+def get_zipfian_units(count: int) -> list:
+  rng = random.Random(1)
+  return [f"w{int(rng.paretovariate(1.1))}" for _ in range(count)]
+
+
+def test_sketch_never_underestimates():
+  units = get_zipfian_units(20_000)
+  sketch = CountMinSketch(width=50, depth=4)
+  for unit, count in Counter(units).items():
+    sketch.add(unit, count)
+  for unit, count in Counter(units).items():
+    assert sketch.estimate(unit) >= count
+
+
+def test_space_saving_error_bound():
+  units = get_zipfian_units(20_000)
+  heavy_hitters = SpaceSaving(capacity=20)
+  for unit in units:
+    heavy_hitters.add(unit)
+  exact = Counter(units)
+  assert len(heavy_hitters) == 20
+  assert sum(heavy_hitters.counts.values()) == len(units)
+  for unit, count in heavy_hitters.counts.items():
+    assert count - heavy_hitters.errors[unit] <= exact[unit] <= count
+    assert heavy_hitters.errors[unit] <= len(units) // 20
+  # units which occur more often than the maximum error are kept
+  for unit, count in exact.items():
+    if count > len(units) // 20:
+      assert unit in heavy_hitters.counts
+
+
+def test_top_k_within_error_bound():
+  units = get_zipfian_units(50_000)
+  exact = Counter(units)
+  approximate_counts = ApproximateUnitCounts(epsilon=0.01, delta=0.01)
+  for start in range(0, len(units), 1_000):
+    approximate_counts.update(Counter(units[start:start + 1_000]))
+
+  result = approximate_counts.get_sorted_counts(top_k=5)
+
+  assert approximate_counts.total == len(units)
+  assert approximate_counts.max_error == 500
+  assert [unit for _, unit in result] == [unit for unit, _ in exact.most_common(5)]
+  for count, unit in result:
+    assert exact[unit] <= count <= exact[unit] + approximate_counts.max_error
+
+
+def test_min_count():
+  approximate_counts = ApproximateUnitCounts()
+  approximate_counts.update(Counter({"a": 3, "b": 1, "c": 2}))
+  assert approximate_counts.get_sorted_counts(min_count=2) == [(3, "a"), (2, "c")]
@@ -0,0 +1,112 @@
+import gzip
+import json
+from pathlib import Path
+
+from ordered_set import OrderedSet
+
+from txt_utils.vocabulary_exporting import extract_vocabulary_from_file
+
+
+def test_component(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_bytes("b a c\nc b ä\n".encode("UTF-8"))
+  result = extract_vocabulary_from_file(path, "UTF-8", chunksize=1, n_jobs=2)
+  assert result == OrderedSet(("a", "b", "c", "ä"))
+
+
+def test_compressed_file(tmp_path: Path):
+  path = tmp_path / "test.txt.gz"
+  path.write_bytes(gzip.compress("b a c\nc b ä\n".encode("UTF-8")))
+  result = extract_vocabulary_from_file(path, "UTF-8", chunksize=1, n_jobs=2)
+  result_serial = extract_vocabulary_from_file(path, "UTF-8", n_jobs=1)
+  assert result == result_serial == OrderedSet(("a", "b", "c", "ä"))
+
+
+def test_crlf_is_translated(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_bytes(b"a b\r\nc\r\n\r\nd\re")
+  result = extract_vocabulary_from_file(path, "UTF-8", chunksize=1, include_empty=True)
+  assert result == OrderedSet(sorted(path.read_text("UTF-8").replace("\n", " ").split(" ")))
+
+
+def test_empty_file(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_bytes(b"")
+  result = extract_vocabulary_from_file(path, "UTF-8")
+  assert result == OrderedSet()
+
+
+def test_one_job_equals_multiple_jobs(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_bytes("b a c\nc  b ä\n".encode("UTF-8"))
+  result = extract_vocabulary_from_file(path, "UTF-8", n_jobs=1, include_empty=True)
+  assert_res = extract_vocabulary_from_file(path, "UTF-8", chunksize=1, n_jobs=2, include_empty=True)
+  assert result == assert_res == OrderedSet(("", "a", "b", "c", "ä"))
+
+
+def test_one_job_crlf_is_translated(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  path.write_bytes(b"a b\r\nc\rd")
+  result = extract_vocabulary_from_file(path, "UTF-8", n_jobs=1)
+  assert result == OrderedSet(("a", "b", "c", "d"))
+
+
+def test_checkpoint_only_appended_lines_are_processed(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  checkpoint_path = tmp_path / "checkpoint.json"
+  path.write_bytes(b"a b\nc")
+  result = extract_vocabulary_from_file(path, "UTF-8", chunksize=1, n_jobs=2, checkpoint_path=checkpoint_path)
+  assert result == OrderedSet(("a", "b", "c"))
+  checkpoint = json.loads(checkpoint_path.read_text("UTF-8"))
+  assert checkpoint["offset"] == 4
+  assert checkpoint["vocabulary"] == ["a", "b"]
+  # units of the processed lines are taken from the checkpoint
+  checkpoint["vocabulary"].append("x")
+  checkpoint_path.write_text(json.dumps(checkpoint), "UTF-8")
+
+  path.write_bytes(b"a b\ncd\ne")
+  result = extract_vocabulary_from_file(path, "UTF-8", chunksize=1, n_jobs=2, checkpoint_path=checkpoint_path)
+  assert result == OrderedSet(("a", "b", "cd", "e", "x"))
+  assert json.loads(checkpoint_path.read_text("UTF-8"))["offset"] == 7
+
+
+def test_checkpoint_changed_file_is_processed_again(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  checkpoint_path = tmp_path / "checkpoint.json"
+  path.write_bytes(b"a b\nc\n")
+  extract_vocabulary_from_file(path, "UTF-8", n_jobs=1, checkpoint_path=checkpoint_path)
+  path.write_bytes(b"a d\nc\ne")
+  result = extract_vocabulary_from_file(path, "UTF-8", n_jobs=1, checkpoint_path=checkpoint_path)
+  assert result == OrderedSet(("a", "c", "d", "e"))
+
+
+def test_checkpoint_different_separator_is_processed_again(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  checkpoint_path = tmp_path / "checkpoint.json"
+  path.write_bytes(b"a b\nc\n")
+  extract_vocabulary_from_file(path, "UTF-8", n_jobs=1, checkpoint_path=checkpoint_path)
+  result = extract_vocabulary_from_file(path, "UTF-8", n_jobs=1, word_sep="", checkpoint_path=checkpoint_path)
+  assert result == OrderedSet((" ", "a", "b", "c"))
+
+
+def test_checkpoint_equals_full_scan(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  checkpoint_path = tmp_path / "checkpoint.json"
+  content = b"a b\r\nc\r\n\r\nd\re\n"
+  path.write_bytes(content[:6])
+  for n_jobs in (1, 2):
+    extract_vocabulary_from_file(path, "UTF-8", n_jobs=n_jobs, checkpoint_path=checkpoint_path)
+  path.write_bytes(content)
+  for n_jobs in (1, 2):
+    result = extract_vocabulary_from_file(path, "UTF-8", chunksize=1, n_jobs=n_jobs, include_empty=True, checkpoint_path=checkpoint_path)
+    assert_res = extract_vocabulary_from_file(path, "UTF-8", chunksize=1, n_jobs=n_jobs, include_empty=True)
+    assert result == assert_res
+
+
+def test_checkpoint_unsupported_encoding(tmp_path: Path):
+  path = tmp_path / "test.txt"
+  checkpoint_path = tmp_path / "checkpoint.json"
+  path.write_bytes("a b\nc".encode("UTF-16"))
+  result = extract_vocabulary_from_file(path, "UTF-16", n_jobs=1, checkpoint_path=checkpoint_path)
+  assert result == OrderedSet(("a", "b", "c"))
+  assert not checkpoint_path.exists()